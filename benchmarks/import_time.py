@@ -0,0 +1,59 @@
+"""
+Measures the cold-start cost of importing pylibrelinkup and constructing a client.
+
+Each scenario is run in a fresh interpreter, so module caches from earlier runs do not affect the result.
+
+Usage::
+
+    python benchmarks/import_time.py [--runs 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+SCENARIOS: dict[str, str] = {
+    "interpreter": "pass",
+    "import pylibrelinkup": "import pylibrelinkup",
+    "construct client": (
+        "from pylibrelinkup import PyLibreLinkUp; PyLibreLinkUp('email', 'password')"
+    ),
+    "build graph schema": (
+        "from pylibrelinkup.models.connection import GraphResponse; "
+        "GraphResponse.model_json_schema()"
+    ),
+}
+
+TIMER = """
+import time
+_start = time.perf_counter()
+{statement}
+print(time.perf_counter() - _start)
+"""
+
+
+def run(statement: str) -> float:
+    output = subprocess.check_output(
+        [sys.executable, "-c", TIMER.format(statement=statement)], text=True
+    )
+    return float(output)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    for name, statement in SCENARIOS.items():
+        timings = [run(statement) for _ in range(args.runs)]
+        print(
+            f"{name:<24} median {statistics.median(timings) * 1000:8.2f} ms  "
+            f"min {min(timings) * 1000:8.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,43 @@
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
 from .api_url import *
+from .api_url import __all__ as _api_url_all
 from .exceptions import *
-from .models import *
-from .pylibrelinkup import *
+from .exceptions import __all__ as _exceptions_all
+from .instrumentation import *
+from .instrumentation import __all__ as _instrumentation_all
+
+if TYPE_CHECKING:
+    from .models import *
+    from .pylibrelinkup import *
+
+# The client and the pydantic models pull in requests and pydantic, which dominate import time. They are imported on
+# first access instead, so that importing the package (e.g. just to catch its exceptions) stays cheap.
+_LAZY_ATTRIBUTES: dict[str, str] = {
+    "GraphResponse": ".models",
+    "LogbookResponse": ".models",
+    "PyLibreLinkUp": ".pylibrelinkup",
+}
+
+__all__ = [
+    *_api_url_all,
+    *_exceptions_all,
+    *_instrumentation_all,
+    *_LAZY_ATTRIBUTES,
+]
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
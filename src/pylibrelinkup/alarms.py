@@ -0,0 +1,336 @@
+"""
+Local evaluation of a patient's alarm rules against incoming measurements.
+
+The alarm thresholds configured for each connection (:class:`~pylibrelinkup.models.config.AlarmRules`, falling back to
+the limits of the :class:`~pylibrelinkup.models.hardware.PatientDevice`) are compiled once per patient into
+:class:`CompiledAlarmRules`, and each new measurement is then checked in constant time. Alarms are raised when a
+threshold is crossed, repeated while the condition persists, and cleared only once the value has moved back past the
+threshold by the configured hysteresis margin.
+
+An :class:`AlarmEngine` is also a :class:`~pylibrelinkup.instrumentation.RequestHooks`, so it can be attached to a
+client to evaluate every current measurement the client receives as soon as it is parsed:
+
+.. code-block:: python
+
+    engine = AlarmEngine(listeners=[print])
+    client = PyLibreLinkUp(email=email, password=password, hooks=[engine])
+    client.authenticate()
+    client.latest(patient)  # compiles the patient's rules and evaluates the measurement
+    engine.check_signal()  # raises signal loss alarms for patients without recent data
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from enum import StrEnum
+from typing import Any, Callable, Iterable
+from uuid import UUID
+
+from .data_types import Measurement
+from .instrumentation import RequestEvent, RequestHooks
+from .models.connection import Connection, GraphResponse
+
+__all__ = [
+    "AlarmEngine",
+    "AlarmEvent",
+    "AlarmState",
+    "AlarmType",
+    "CompiledAlarmRules",
+    "PatientAlarms",
+    "ThresholdRule",
+]
+
+
+class AlarmType(StrEnum):
+    HIGH = "high"
+    LOW = "low"
+    FIXED_LOW = "fixed_low"
+    SIGNAL_LOSS = "signal_loss"
+
+
+class AlarmState(StrEnum):
+    RAISED = "raised"
+    REPEATED = "repeated"
+    CLEARED = "cleared"
+
+
+@dataclass(frozen=True)
+class AlarmEvent:
+    """AlarmEvent class to store a change in, or repeat of, an alarm."""
+
+    patient_id: UUID
+    type: AlarmType
+    state: AlarmState
+    timestamp: datetime
+    value: float | None = None
+    threshold: float | None = None
+
+
+def _minutes(value: float) -> timedelta | None:
+    return timedelta(minutes=value) if value else None
+
+
+@dataclass(frozen=True)
+class ThresholdRule:
+    """ThresholdRule class to store a compiled threshold alarm. Values are in mg/dL."""
+
+    threshold: float
+    clear: float
+    repeat: timedelta | None = None
+    above: bool = False
+
+    def triggered(self, value: float) -> bool:
+        """Returns True if the value is past the threshold."""
+        return value > self.threshold if self.above else value < self.threshold
+
+    def cleared(self, value: float) -> bool:
+        """Returns True if the value has moved back past the clearing level."""
+        return value <= self.clear if self.above else value >= self.clear
+
+
+@dataclass(frozen=True)
+class CompiledAlarmRules:
+    """CompiledAlarmRules class to store the alarm thresholds of a patient. Disabled alarms are None."""
+
+    high: ThresholdRule | None = None
+    low: ThresholdRule | None = None
+    fixed_low: ThresholdRule | None = None
+    no_data: timedelta | None = None
+    no_data_repeat: timedelta | None = None
+
+    @classmethod
+    def from_connection(
+        cls, connection: Connection, device_alarms: bool = False
+    ) -> CompiledAlarmRules:
+        """Compiles the alarm rules of a connection.
+
+        Each threshold is taken from ``connection.alarm_rules`` and falls back to the patient device limits when the
+        rule has no threshold. The high alarm clears once the value falls by the fraction ``h.f`` below its
+        threshold, the low and fixed low alarms once the value rises ``tl`` above theirs. ``d`` is the repeat interval
+        in minutes. A signal loss alarm is raised after ``nd.i`` minutes without data and repeated every ``nd.r``
+        minutes.
+
+        The high and low alarms are disabled when the follower has switched them off (``h.on``, ``l.on``). The fixed
+        low alarm cannot be switched off.
+
+        :param connection: The connection to compile the rules of.
+        :type connection: Connection
+        :param device_alarms: Also disable the high and low alarms when ``patient_device.alarms`` is off. The API
+            commonly reports it off for followers whose alarms are on, so this is not the default.
+        :type device_alarms: bool
+        """
+        rules = connection.alarm_rules
+        device = connection.patient_device
+        enabled = device.alarms or not device_alarms
+
+        high = (rules.h.th or device.hl) if enabled and rules.h.on else 0
+        low = (rules.l.th or device.ll) if enabled and rules.l.on else 0
+        fixed_low = rules.f.th or device.fixed_low_alarm_values.mgdl
+        return cls(
+            high=(
+                ThresholdRule(
+                    high, high * (1 - rules.h.f), _minutes(rules.h.d), above=True
+                )
+                if high
+                else None
+            ),
+            low=(
+                ThresholdRule(low, low + rules.l.tl, _minutes(rules.l.d))
+                if low
+                else None
+            ),
+            fixed_low=(
+                ThresholdRule(fixed_low, fixed_low + rules.f.tl, _minutes(rules.f.d))
+                if fixed_low
+                else None
+            ),
+            no_data=_minutes(rules.nd.i),
+            no_data_repeat=_minutes(rules.nd.r),
+        )
+
+
+class _AlarmState:
+    __slots__ = ("active", "notified")
+
+    def __init__(self) -> None:
+        self.active = False
+        self.notified: datetime | None = None
+
+    def update(
+        self,
+        triggered: bool,
+        cleared: bool,
+        timestamp: datetime,
+        repeat: timedelta | None,
+    ) -> AlarmState | None:
+        if not self.active:
+            if triggered:
+                self.active, self.notified = True, timestamp
+                return AlarmState.RAISED
+            return None
+        if cleared:
+            self.active = False
+            return AlarmState.CLEARED
+        if repeat is not None and timestamp - self.notified >= repeat:
+            self.notified = timestamp
+            return AlarmState.REPEATED
+        return None
+
+
+class PatientAlarms:
+    """The alarm state of a single patient."""
+
+    def __init__(self, patient_id: UUID, rules: CompiledAlarmRules) -> None:
+        self.patient_id = patient_id
+        self.rules = rules
+        self.last_timestamp: datetime | None = None
+        self._states = {alarm_type: _AlarmState() for alarm_type in AlarmType}
+
+    def active(self) -> set[AlarmType]:
+        """Returns the alarms currently raised."""
+        return {
+            alarm_type for alarm_type, state in self._states.items() if state.active
+        }
+
+    def evaluate(self, measurement: Measurement) -> list[AlarmEvent]:
+        """Evaluates a measurement against the rules.
+
+        Measurements which are not newer than the last one evaluated are ignored, so the same reading polled twice
+        does not count as a repeat.
+
+        :return: The alarm events caused by the measurement.
+        """
+        timestamp = measurement.factory_timestamp
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return []
+        self.last_timestamp = timestamp
+        value = measurement.value_in_mg_per_dl
+
+        events = []
+        if self._states[AlarmType.SIGNAL_LOSS].active:
+            self._states[AlarmType.SIGNAL_LOSS].active = False
+            events.append(
+                self._event(AlarmType.SIGNAL_LOSS, AlarmState.CLEARED, timestamp)
+            )
+        for alarm_type, rule in (
+            (AlarmType.HIGH, self.rules.high),
+            (AlarmType.LOW, self.rules.low),
+            (AlarmType.FIXED_LOW, self.rules.fixed_low),
+        ):
+            if rule is None:
+                continue
+            state = self._states[alarm_type].update(
+                rule.triggered(value), rule.cleared(value), timestamp, rule.repeat
+            )
+            if state is not None:
+                events.append(
+                    self._event(alarm_type, state, timestamp, value, rule.threshold)
+                )
+        return events
+
+    def check_signal(self, now: datetime) -> list[AlarmEvent]:
+        """Raises or repeats the signal loss alarm if no measurement has arrived recently.
+
+        :param now: The current time (UTC), compared against the factory timestamp of the last measurement.
+        """
+        if self.rules.no_data is None or self.last_timestamp is None:
+            return []
+        lost = now - self.last_timestamp >= self.rules.no_data
+        state = self._states[AlarmType.SIGNAL_LOSS].update(
+            lost, not lost, now, self.rules.no_data_repeat
+        )
+        if state is None or state is AlarmState.CLEARED:
+            return []
+        return [self._event(AlarmType.SIGNAL_LOSS, state, now)]
+
+    def _event(
+        self,
+        alarm_type: AlarmType,
+        state: AlarmState,
+        timestamp: datetime,
+        value: float | None = None,
+        threshold: float | None = None,
+    ) -> AlarmEvent:
+        return AlarmEvent(
+            patient_id=self.patient_id,
+            type=alarm_type,
+            state=state,
+            timestamp=timestamp,
+            value=value,
+            threshold=threshold,
+        )
+
+
+class AlarmEngine(RequestHooks):
+    """Evaluates alarms for many patients and passes the resulting events to listeners."""
+
+    def __init__(
+        self,
+        listeners: Iterable[Callable[[AlarmEvent], Any]] = (),
+        device_alarms: bool = False,
+    ) -> None:
+        """
+        Constructor for the AlarmEngine class.
+
+        :param listeners: Callables each alarm event is passed to.
+        :type listeners: Iterable[Callable[[AlarmEvent], Any]]
+        :param device_alarms: Passed to :meth:`CompiledAlarmRules.from_connection` for every connection registered.
+        :type device_alarms: bool
+        """
+        self.listeners = list(listeners)
+        self.device_alarms = device_alarms
+        self.patients: dict[UUID, PatientAlarms] = {}
+        self._lock = threading.Lock()
+
+    def register(self, patient_id: UUID, rules: CompiledAlarmRules) -> PatientAlarms:
+        """Sets the rules for a patient. The current alarm state is kept if the patient is already registered."""
+        with self._lock:
+            patient = self.patients.get(patient_id)
+            if patient is None:
+                patient = self.patients[patient_id] = PatientAlarms(patient_id, rules)
+            else:
+                patient.rules = rules
+            return patient
+
+    def register_connection(self, connection: Connection) -> PatientAlarms:
+        """Compiles and sets the rules for the patient of a connection."""
+        return self.register(
+            connection.patient_id,
+            CompiledAlarmRules.from_connection(connection, self.device_alarms),
+        )
+
+    def evaluate(self, patient_id: UUID, measurement: Measurement) -> list[AlarmEvent]:
+        """Evaluates a measurement for a registered patient and notifies the listeners.
+
+        :raises KeyError: If the patient has not been registered.
+        """
+        with self._lock:
+            events = self.patients[patient_id].evaluate(measurement)
+        self._notify(events)
+        return events
+
+    def check_signal(self, now: datetime | None = None) -> list[AlarmEvent]:
+        """Checks every patient for signal loss and notifies the listeners."""
+        now = now or datetime.now(UTC)
+        with self._lock:
+            events = [
+                event
+                for patient in self.patients.values()
+                for event in patient.check_signal(now)
+            ]
+        self._notify(events)
+        return events
+
+    def _notify(self, events: list[AlarmEvent]) -> None:
+        for event in events:
+            for listener in self.listeners:
+                listener(event)
+
+    def on_parsed(self, event: RequestEvent, result: Any) -> None:
+        """Compiles the rules and evaluates the current measurement of every parsed graph response."""
+        if isinstance(result, GraphResponse):
+            connection = result.data.connection
+            self.register_connection(connection)
+            self.evaluate(connection.patient_id, connection.glucose_measurement)
@@ -0,0 +1,246 @@
+"""
+Rate of change and trend analysis over glucose history.
+
+The API only provides a trend arrow for the current measurement. These functions derive the rate of change and the
+:class:`~pylibrelinkup.models.data.Trend` for every point of a graph or logbook series in one pass over the whole
+series. NumPy is used when it is installed (``pip install pylibrelinkup[analysis]``) and pure Python otherwise; both
+backends give the same results.
+
+.. code-block:: python
+
+    analysis = analyse(client.graph(patient))
+    for timestamp, trend in zip(analysis.timestamps, analysis.trends):
+        print(timestamp, trend.indicator if trend else "?")
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Sequence
+
+from .data_types import Measurement
+from .models.data import Trend
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when numpy is not installed
+    np = None
+
+__all__ = [
+    "FAST_RATE",
+    "HAS_NUMPY",
+    "SLOW_RATE",
+    "UNKNOWN",
+    "TrendAnalysis",
+    "analyse",
+    "classify",
+    "rate_of_change",
+    "smoothed_rate_of_change",
+]
+
+HAS_NUMPY = np is not None
+
+SLOW_RATE = 1.0
+"""The rate of change, in mg/dL/min, at which glucose is considered to be rising or falling."""
+
+FAST_RATE = 2.0
+"""The rate of change, in mg/dL/min, at which glucose is considered to be rising or falling quickly."""
+
+DEFAULT_MAX_GAP = timedelta(minutes=20)
+"""Consecutive points further apart than this are not used to compute a rate of change."""
+
+UNKNOWN = 0
+"""The trend code for points whose rate of change could not be computed."""
+
+
+def _use_numpy(use_numpy: bool | None) -> bool:
+    if use_numpy is None:
+        return HAS_NUMPY
+    if use_numpy and not HAS_NUMPY:
+        raise ImportError("numpy is required, install pylibrelinkup[analysis]")
+    return use_numpy
+
+
+def rate_of_change(
+    minutes: Sequence[float],
+    values: Sequence[float],
+    max_gap: float = DEFAULT_MAX_GAP.total_seconds() / 60,
+    use_numpy: bool | None = None,
+) -> Any:
+    """Returns the rate of change at each point since the previous point, in mg/dL/min.
+
+    :param minutes: The time of each point in minutes, in ascending order.
+    :param values: The glucose value of each point in mg/dL.
+    :param max_gap: The largest interval, in minutes, over which a rate is computed.
+    :param use_numpy: Force the NumPy (True) or pure Python (False) backend. Defaults to NumPy if installed.
+    :return: A NumPy array if NumPy is used, otherwise a list. Points without a rate are NaN.
+    """
+    if _use_numpy(use_numpy):
+        t = np.asarray(minutes, dtype=float)
+        v = np.asarray(values, dtype=float)
+        rates = np.full(len(t), np.nan)
+        dt = np.diff(t)
+        valid = (dt > 0) & (dt <= max_gap)
+        rates[1:][valid] = np.diff(v)[valid] / dt[valid]
+        return rates
+
+    rates = [math.nan] * len(minutes)
+    for i in range(1, len(minutes)):
+        dt = minutes[i] - minutes[i - 1]
+        if 0 < dt <= max_gap:
+            rates[i] = (values[i] - values[i - 1]) / dt
+    return rates
+
+
+def smoothed_rate_of_change(
+    minutes: Sequence[float],
+    values: Sequence[float],
+    window: int = 3,
+    max_gap: float = DEFAULT_MAX_GAP.total_seconds() / 60,
+    use_numpy: bool | None = None,
+) -> Any:
+    """Returns the least-squares slope through each point and the points before it, in mg/dL/min.
+
+    :param minutes: The time of each point in minutes, in ascending order.
+    :param values: The glucose value of each point in mg/dL.
+    :param window: The number of points the slope is fitted through.
+    :param max_gap: The largest interval, in minutes, allowed between consecutive points in the window.
+    :param use_numpy: Force the NumPy (True) or pure Python (False) backend. Defaults to NumPy if installed.
+    :return: A NumPy array if NumPy is used, otherwise a list. Points without a full window are NaN.
+    """
+    if window < 2:
+        raise ValueError("window must be at least 2")
+    count = len(minutes)
+    if _use_numpy(use_numpy):
+        rates = np.full(count, np.nan)
+        if count < window:
+            return rates
+        t = np.asarray(minutes, dtype=float)
+        v = np.asarray(values, dtype=float)
+        # Times and values are centred on each window's mean before the sums are taken, so that the slope does not
+        # come from the difference of large totals, which loses precision over long series.
+        tw = np.lib.stride_tricks.sliding_window_view(t, window)
+        vw = np.lib.stride_tricks.sliding_window_view(v, window)
+        tc = tw - tw.mean(axis=1, keepdims=True)
+        vc = vw - vw.mean(axis=1, keepdims=True)
+        denominator = (tc * tc).sum(axis=1)
+        numerator = (tc * vc).sum(axis=1)
+        # A window is only usable if none of its intervals exceed the maximum gap.
+        bad = np.concatenate(([0], np.cumsum(np.diff(t) > max_gap)))
+        usable = (bad[window - 1 :] == bad[: count - window + 1]) & (denominator > 0)
+        slopes = np.full(count - window + 1, np.nan)
+        slopes[usable] = numerator[usable] / denominator[usable]
+        rates[window - 1 :] = slopes
+        return rates
+
+    rates = [math.nan] * count
+    for i in range(window - 1, count):
+        points = range(i - window + 1, i + 1)
+        if any(minutes[j] - minutes[j - 1] > max_gap for j in points[1:]):
+            continue
+        mean_t = sum(minutes[j] for j in points) / window
+        mean_v = sum(values[j] for j in points) / window
+        denominator = numerator = 0.0
+        for j in points:
+            t = minutes[j] - mean_t
+            denominator += t * t
+            numerator += t * (values[j] - mean_v)
+        if denominator > 0:
+            rates[i] = numerator / denominator
+    return rates
+
+
+def classify(
+    rates: Sequence[float],
+    slow: float = SLOW_RATE,
+    fast: float = FAST_RATE,
+    use_numpy: bool | None = None,
+) -> Any:
+    """Maps rates of change to :class:`~pylibrelinkup.models.data.Trend` values.
+
+    :return: A NumPy array if NumPy is used, otherwise a list, of trend values as integers. Points whose rate is NaN
+        are :data:`UNKNOWN` (0).
+    """
+    if _use_numpy(use_numpy):
+        r = np.asarray(rates, dtype=float)
+        return np.select(
+            [np.isnan(r), r <= -fast, r <= -slow, r < slow, r < fast],
+            [UNKNOWN, Trend.DOWN_FAST, Trend.DOWN_SLOW, Trend.STABLE, Trend.UP_SLOW],
+            default=Trend.UP_FAST,
+        ).astype(np.int8)
+
+    codes = []
+    for rate in rates:
+        if math.isnan(rate):
+            codes.append(UNKNOWN)
+        elif rate <= -fast:
+            codes.append(Trend.DOWN_FAST.value)
+        elif rate <= -slow:
+            codes.append(Trend.DOWN_SLOW.value)
+        elif rate < slow:
+            codes.append(Trend.STABLE.value)
+        elif rate < fast:
+            codes.append(Trend.UP_SLOW.value)
+        else:
+            codes.append(Trend.UP_FAST.value)
+    return codes
+
+
+@dataclass
+class TrendAnalysis:
+    """TrendAnalysis class to store the rate of change and trend of each point in a series.
+
+    ``rates``, ``smoothed`` and ``trend_codes`` are NumPy arrays when NumPy was used, otherwise lists.
+    """
+
+    timestamps: list[datetime]
+    values: Any
+    rates: Any
+    smoothed: Any
+    trend_codes: Any
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def trends(self) -> list[Trend | None]:
+        """Returns the trend of each point, or None where it could not be computed."""
+        return [Trend(int(code)) if code else None for code in self.trend_codes]
+
+
+def analyse(
+    measurements: Iterable[Measurement],
+    window: int = 3,
+    max_gap: timedelta = DEFAULT_MAX_GAP,
+    use_numpy: bool | None = None,
+) -> TrendAnalysis:
+    """Computes the rate of change and trend of every measurement in a series.
+
+    Trends are classified from the smoothed rate of change.
+
+    :param measurements: Graph or logbook measurements. They do not need to be sorted.
+    :param window: The number of points each smoothed rate is fitted through.
+    :param max_gap: Points further apart than this are not used together.
+    :param use_numpy: Force the NumPy (True) or pure Python (False) backend. Defaults to NumPy if installed.
+    :return: The analysis, ordered by factory timestamp.
+    """
+    ordered = sorted(measurements, key=lambda m: m.factory_timestamp)
+    timestamps = [measurement.factory_timestamp for measurement in ordered]
+    values = [measurement.value_in_mg_per_dl for measurement in ordered]
+    origin = timestamps[0] if timestamps else None
+    minutes = [(timestamp - origin).total_seconds() / 60 for timestamp in timestamps]
+    gap = max_gap.total_seconds() / 60
+    use_numpy = _use_numpy(use_numpy)
+    if use_numpy:
+        values = np.asarray(values, dtype=float)
+        minutes = np.asarray(minutes, dtype=float)
+    smoothed = smoothed_rate_of_change(minutes, values, window, gap, use_numpy)
+    return TrendAnalysis(
+        timestamps=timestamps,
+        values=values,
+        rates=rate_of_change(minutes, values, gap, use_numpy),
+        smoothed=smoothed,
+        trend_codes=classify(smoothed, use_numpy=use_numpy),
+    )
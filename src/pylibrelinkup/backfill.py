@@ -0,0 +1,160 @@
+"""
+Detecting gaps in stored glucose history and filling them from the logbook.
+
+The graph endpoint only covers approximately the last 12 hours, so if a poller is down for longer its history has gaps.
+The logbook covers approximately the last 14 days, but only contains the measurements associated with glucose events,
+so it can partially fill those gaps. :func:`backfill` only requests the logbook when there is a gap it could fill.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from typing import Iterable, Sequence
+
+from .data_types import Measurement, PatientIdentifier
+from .history import LOGBOOK_WINDOW
+from .pylibrelinkup import PyLibreLinkUp
+from .utilities import as_utc
+
+__all__ = [
+    "DEFAULT_CADENCE",
+    "LOGBOOK_WINDOW",
+    "BackfillResult",
+    "Gap",
+    "backfill",
+    "find_gaps",
+    "merge_measurements",
+]
+
+DEFAULT_CADENCE = timedelta(minutes=15)
+"""The expected interval between graph measurements."""
+
+
+@dataclass(frozen=True)
+class Gap:
+    """Gap class to store a period without measurements, bounded by the measurements either side of it."""
+
+    start: datetime
+    end: datetime
+
+    @property
+    def duration(self) -> timedelta:
+        """Returns the length of the gap."""
+        return self.end - self.start
+
+    def __contains__(self, timestamp: datetime) -> bool:
+        return self.start < timestamp < self.end
+
+
+@dataclass
+class BackfillResult:
+    """BackfillResult class to store the outcome of a backfill."""
+
+    measurements: list[Measurement]
+    filled: list[Measurement] = field(default_factory=list)
+    gaps: list[Gap] = field(default_factory=list)
+    unfilled: list[Gap] = field(default_factory=list)
+
+
+def find_gaps(
+    measurements: Iterable[Measurement],
+    cadence: timedelta = DEFAULT_CADENCE,
+    tolerance: float = 1.5,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> list[Gap]:
+    """Returns the periods in a series of measurements longer than the expected cadence.
+
+    :param measurements: The measurements to scan. They do not need to be sorted.
+    :param cadence: The expected interval between measurements.
+    :param tolerance: How many multiples of the cadence two measurements may be apart before it counts as a gap.
+    :param start: If set, a gap is also reported between this time and the first measurement.
+    :param end: If set, a gap is also reported between the last measurement and this time. With no measurements, the
+        whole period from ``start`` to ``end`` is a gap.
+    :return: The gaps, oldest first. Times are factory timestamps (UTC); naive ``start`` and ``end`` are taken to be
+        UTC.
+    """
+    limit = cadence * tolerance
+    timestamps = sorted(measurement.factory_timestamp for measurement in measurements)
+    if start is not None:
+        timestamps.insert(0, as_utc(start))
+    if end is not None:
+        timestamps.append(as_utc(end))
+    return [
+        Gap(previous, current)
+        for previous, current in zip(timestamps, timestamps[1:])
+        if current - previous > limit
+    ]
+
+
+def merge_measurements(
+    measurements: Iterable[Measurement], *others: Iterable[Measurement]
+) -> list[Measurement]:
+    """Merges series of measurements, sorted by factory timestamp.
+
+    Measurements are de-duplicated on their factory timestamp; where two share a timestamp, the one from the earlier
+    argument is kept.
+    """
+    merged: dict[datetime, Measurement] = {}
+    for series in (measurements, *others):
+        for measurement in series:
+            merged.setdefault(measurement.factory_timestamp, measurement)
+    return [merged[timestamp] for timestamp in sorted(merged)]
+
+
+def backfill(
+    client: PyLibreLinkUp,
+    patient_identifier: PatientIdentifier,
+    measurements: Sequence[Measurement] | None = None,
+    cadence: timedelta = DEFAULT_CADENCE,
+    tolerance: float = 1.5,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    now: datetime | None = None,
+) -> BackfillResult:
+    """Fills gaps in a patient's history with measurements from the logbook.
+
+    :param client: An authenticated client.
+    :param patient_identifier: The patient whose history is being filled.
+    :param measurements: The stored history to fill. If not given, the graph data is requested and used instead.
+    :param cadence: The expected interval between measurements.
+    :param tolerance: How many multiples of the cadence two measurements may be apart before it counts as a gap.
+    :param start: If set, the history is expected to begin at this time, so a gap before the first measurement is
+        also filled. If there are no measurements, it defaults to the start of the logbook window.
+    :param end: The time the history is expected to run up to, so a gap after the last measurement, e.g. while a
+        poller was down, is also filled. Defaults to ``now``.
+    :param now: The current time, used to decide which gaps are within the logbook window. Defaults to now.
+    :return: The merged history, the measurements that were added, the gaps found and the gaps that remain.
+
+    Naive ``start``, ``end`` and ``now`` are taken to be UTC, like factory timestamps.
+    """
+    if measurements is None:
+        measurements = client.graph(patient_identifier)
+    now = datetime.now(UTC) if now is None else as_utc(now)
+    end = now if end is None else as_utc(end)
+    if start is not None:
+        start = as_utc(start)
+    elif not measurements:
+        # With nothing stored, everything the logbook still holds is missing.
+        start = now - LOGBOOK_WINDOW
+    gaps = find_gaps(measurements, cadence, tolerance, start=start, end=end)
+    window_start = now - LOGBOOK_WINDOW
+    fillable = [gap for gap in gaps if gap.end > window_start]
+    if not fillable:
+        return BackfillResult(
+            measurements=merge_measurements(measurements), gaps=gaps, unfilled=gaps
+        )
+
+    filled = [
+        entry
+        for entry in client.logbook(patient_identifier)
+        if any(entry.factory_timestamp in gap for gap in fillable)
+    ]
+    merged = merge_measurements(measurements, filled)
+    return BackfillResult(
+        measurements=merged,
+        filled=merge_measurements(filled),
+        gaps=gaps,
+        unfilled=find_gaps(merged, cadence, tolerance, start=start, end=end),
+    )
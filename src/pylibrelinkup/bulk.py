@@ -0,0 +1,252 @@
+"""
+Parsing many raw API responses in parallel, for bulk backfills and archive imports.
+
+Decoding and validating responses is CPU-bound, so a single process can only use one core. :func:`parse_bulk` spreads
+the work over a :class:`~concurrent.futures.ProcessPoolExecutor` and yields the results in the order of the payloads.
+Results are returned in one of three forms, chosen with ``output``:
+
+``"columns"``
+    A :class:`MeasurementColumns` holding the measurements as typed arrays, which are the cheapest to send between
+    processes and to keep in memory.
+``"fast"``
+    A list of :class:`~pylibrelinkup.models.fast.FastGlucoseMeasurement`.
+``"models"``
+    The validated :class:`~pylibrelinkup.models.connection.GraphResponse` or
+    :class:`~pylibrelinkup.models.connection.LogbookResponse`.
+
+For graph payloads the columns and fast models hold the graph history, as returned by
+:meth:`~pylibrelinkup.PyLibreLinkUp.graph`.
+
+.. code-block:: python
+
+    with ProcessPoolExecutor() as executor:
+        for columns in parse_bulk(archive_bodies, kind="logbook", executor=executor):
+            store(columns)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from array import array
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from enum import StrEnum
+from functools import partial
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator
+
+from .exceptions import raise_for_response
+from .models.fast import (
+    FastGlucoseMeasurement,
+    parse_graph_history,
+    parse_logbook,
+    parse_timestamp,
+)
+
+__all__ = ["MeasurementColumns", "Output", "PayloadKind", "parse_bulk", "parse_payload"]
+
+DEFAULT_CHUNKSIZE = 16
+"""The number of payloads sent to a worker process at a time."""
+
+
+class PayloadKind(StrEnum):
+    GRAPH = "graph"
+    LOGBOOK = "logbook"
+
+
+class Output(StrEnum):
+    COLUMNS = "columns"
+    FAST = "fast"
+    MODELS = "models"
+
+
+@dataclass
+class MeasurementColumns:
+    """MeasurementColumns class to store a series of measurements as one typed array per field.
+
+    Factory timestamps are POSIX timestamps. Timestamps are the patient's local wall-clock time, stored as if it were
+    UTC.
+    """
+
+    factory_timestamps: array = field(default_factory=lambda: array("d"))
+    timestamps: array = field(default_factory=lambda: array("d"))
+    values_in_mg_per_dl: array = field(default_factory=lambda: array("d"))
+    values: array = field(default_factory=lambda: array("d"))
+    types: array = field(default_factory=lambda: array("b"))
+    glucose_units: array = field(default_factory=lambda: array("b"))
+    measurement_colors: array = field(default_factory=lambda: array("b"))
+    is_high: array = field(default_factory=lambda: array("b"))
+    is_low: array = field(default_factory=lambda: array("b"))
+
+    def __len__(self) -> int:
+        return len(self.factory_timestamps)
+
+    @classmethod
+    def from_items(cls, items: Iterable[dict]) -> MeasurementColumns:
+        """Builds the columns from decoded API measurement objects."""
+        columns = cls()
+        for item in items:
+            columns.factory_timestamps.append(
+                parse_timestamp(item["FactoryTimestamp"], UTC).timestamp()
+            )
+            columns.timestamps.append(
+                parse_timestamp(item["Timestamp"], UTC).timestamp()
+            )
+            columns.values_in_mg_per_dl.append(item.get("ValueInMgPerDl", 0.0))
+            columns.values.append(item.get("Value", 0.0))
+            columns.types.append(item.get("type", 0))
+            columns.glucose_units.append(item.get("GlucoseUnits", 0))
+            columns.measurement_colors.append(item.get("MeasurementColor", 0))
+            columns.is_high.append(item["isHigh"])
+            columns.is_low.append(item["isLow"])
+        return columns
+
+    def measurements(self) -> list[FastGlucoseMeasurement]:
+        """Returns the measurements as fast models."""
+        return [
+            FastGlucoseMeasurement(
+                factory_timestamp=datetime.fromtimestamp(factory_timestamp, UTC),
+                timestamp=datetime.fromtimestamp(timestamp, UTC).replace(tzinfo=None),
+                type=type_,
+                value_in_mg_per_dl=value_in_mg_per_dl,
+                measurement_color=measurement_color,
+                glucose_units=glucose_units,
+                value=value,
+                is_high=bool(is_high),
+                is_low=bool(is_low),
+            )
+            for (
+                factory_timestamp,
+                timestamp,
+                value_in_mg_per_dl,
+                value,
+                type_,
+                glucose_units,
+                measurement_color,
+                is_high,
+                is_low,
+            ) in zip(
+                self.factory_timestamps,
+                self.timestamps,
+                self.values_in_mg_per_dl,
+                self.values,
+                self.types,
+                self.glucose_units,
+                self.measurement_colors,
+                self.is_high,
+                self.is_low,
+            )
+        ]
+
+
+def _parse_columns(kind: PayloadKind, data: Any) -> MeasurementColumns:
+    try:
+        if kind is PayloadKind.GRAPH:
+            return MeasurementColumns.from_items(data["data"]["graphData"])
+        return MeasurementColumns.from_items(data["data"])
+    except (KeyError, TypeError) as exc:
+        raise_for_response(data, exc)
+
+
+def parse_payload(
+    payload: bytes | str,
+    kind: PayloadKind | str = PayloadKind.GRAPH,
+    output: Output | str = Output.COLUMNS,
+) -> Any:
+    """Decodes and parses one raw response body.
+
+    :param payload: The raw JSON body of a graph or logbook response.
+    :param kind: Which endpoint the payload came from.
+    :param output: The form of the result. See the module documentation.
+    :raises PatientNotFoundError: If the response says the patient could not be loaded.
+    :raises ValueError: If the payload is not a valid response.
+    """
+    kind, output = PayloadKind(kind), Output(output)
+    data = json.loads(payload)
+    if output is Output.MODELS:
+        from .models.connection import GraphResponse, LogbookResponse
+
+        model = GraphResponse if kind is PayloadKind.GRAPH else LogbookResponse
+        return model.model_validate(data)
+    if output is Output.FAST:
+        if kind is PayloadKind.GRAPH:
+            return parse_graph_history(data)
+        return parse_logbook(data)
+    return _parse_columns(kind, data)
+
+
+def _parse_or_return_error(
+    payload: bytes | str, kind: PayloadKind, output: Output
+) -> Any:
+    try:
+        return parse_payload(payload, kind, output)
+    except Exception as exc:
+        return exc
+
+
+def _parse_chunk(payloads: list[bytes | str], worker: Callable[[Any], Any]) -> list:
+    return [worker(payload) for payload in payloads]
+
+
+def parse_bulk(
+    payloads: Iterable[bytes | str],
+    kind: PayloadKind | str = PayloadKind.GRAPH,
+    output: Output | str = Output.COLUMNS,
+    executor: Executor | None = None,
+    max_workers: int | None = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    return_exceptions: bool = False,
+) -> Iterator[Any]:
+    """Parses raw response bodies in worker processes, yielding the results in the order of the payloads.
+
+    Payloads are read from ``payloads`` as results are consumed, so at most about ``2 * max_workers * chunksize``
+    payloads and results are held in memory at once, however many there are in total.
+
+    :param payloads: The raw JSON bodies of graph or logbook responses.
+    :param kind: Which endpoint the payloads came from.
+    :param output: The form of the results. See the module documentation.
+    :param executor: The executor to parse in. A :class:`~concurrent.futures.ProcessPoolExecutor` with
+        ``max_workers`` processes is created, and shut down once every payload has been parsed, if not provided.
+    :param max_workers: The number of processes to create, if no executor is provided. Defaults to the number of CPUs.
+        Also used to size the window of payloads parsed ahead of the results consumed.
+    :param chunksize: The number of payloads sent to a worker at a time.
+    :param return_exceptions: Yield the error for a payload which cannot be parsed, instead of raising it and stopping.
+    :raises PatientNotFoundError: If a response says the patient could not be loaded, unless ``return_exceptions``.
+    :raises ValueError: If a payload is not a valid response, unless ``return_exceptions``.
+    """
+    worker = partial(
+        _parse_or_return_error if return_exceptions else parse_payload,
+        kind=PayloadKind(kind),
+        output=Output(output),
+    )
+    if executor is not None:
+        yield from _map_bounded(executor, worker, payloads, max_workers, chunksize)
+        return
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        yield from _map_bounded(pool, worker, payloads, max_workers, chunksize)
+
+
+def _map_bounded(
+    executor: Executor,
+    worker: Callable[[Any], Any],
+    payloads: Iterable[bytes | str],
+    max_workers: int | None,
+    chunksize: int,
+) -> Iterator[Any]:
+    """Like :meth:`Executor.map`, but only reads ahead a bounded number of chunks instead of the whole input."""
+    window = 2 * (max_workers or os.cpu_count() or 1)
+    pending: deque[Future] = deque()
+    iterator = iter(payloads)
+    try:
+        while chunk := list(islice(iterator, chunksize)):
+            pending.append(executor.submit(_parse_chunk, chunk, worker))
+            if len(pending) >= window:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
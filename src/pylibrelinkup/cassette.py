@@ -0,0 +1,261 @@
+"""
+Recording the requests made by a client, and replaying them later without a network.
+
+:class:`RecordingTransport` wraps another transport and keeps every exchange. Saving them writes a cassette: one JSON
+object per line, gzip compressed if the file name ends in ``.gz``. Credentials are redacted before anything is kept:
+request headers are not recorded at all, and the values of keys such as ``password`` and ``token`` are replaced in
+request and response bodies.
+
+:class:`ReplayTransport` serves the responses from a cassette, in the order they were recorded for each method and
+URL. With ``speed=None`` responses are returned immediately, to measure the client's own throughput and CPU use;
+otherwise each response's headers and body are delayed by their recorded times divided by ``speed``, so that the
+``ttfb`` and ``download`` timings seen by the client match the recording.
+
+.. code-block:: python
+
+    recorder = RecordingTransport()
+    client = PyLibreLinkUp(email=email, password=password, transport=recorder)
+    ...
+    recorder.save("fleet.ndjson.gz")
+
+    client = PyLibreLinkUp(email="", password="", transport=ReplayTransport.from_file("fleet.ndjson.gz"))
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, fields
+from os import PathLike
+from typing import IO, Any, Iterable, Mapping
+
+from .exceptions import LLUAPIConnectionError
+from .transport import Timeout, Transport, TransportResponse
+
+__all__ = [
+    "Exchange",
+    "RecordingTransport",
+    "ReplayTransport",
+    "load_cassette",
+    "redact",
+    "save_cassette",
+]
+
+REDACTED = "REDACTED"
+
+DEFAULT_REDACTED_KEYS = frozenset({"email", "password", "token"})
+"""Keys whose values are redacted from recorded bodies."""
+
+RECORDED_HEADERS = ("content-type", "retry-after")
+"""Response headers kept in a cassette. Other headers are dropped."""
+
+
+def redact(data: Any, keys: Iterable[str] = DEFAULT_REDACTED_KEYS) -> Any:
+    """Returns a copy of decoded JSON data with the values of the given keys replaced, at any depth."""
+    keys = frozenset(keys)
+    if isinstance(data, dict):
+        return {
+            key: REDACTED if key in keys else redact(value, keys)
+            for key, value in data.items()
+        }
+    if isinstance(data, list):
+        return [redact(item, keys) for item in data]
+    return data
+
+
+@dataclass
+class Exchange:
+    """Exchange class to store one recorded request and its response.
+
+    The response body is kept as decoded JSON in ``json`` when possible, and as text in ``body`` otherwise.
+    ``ttfb`` is the number of seconds taken to receive the response headers, and ``download`` the number taken to then
+    read the body.
+    """
+
+    method: str
+    url: str
+    status_code: int
+    ttfb: float = 0.0
+    download: float = 0.0
+    request_json: Any = None
+    headers: dict[str, str] | None = None
+    json: Any = None
+    body: str | None = None
+
+    def content(self) -> bytes:
+        """Returns the response body."""
+        if self.json is not None:
+            return json.dumps(self.json).encode()
+        return (self.body or "").encode()
+
+
+_EXCHANGE_FIELDS = frozenset(field.name for field in fields(Exchange))
+
+
+def _open(path: str | PathLike[str], mode: str) -> IO[str]:
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _exchange(record: dict[str, Any]) -> Exchange:
+    # Ignore keys written by other versions, e.g. the request offset and total duration of earlier cassettes.
+    return Exchange(**{k: v for k, v in record.items() if k in _EXCHANGE_FIELDS})
+
+
+def save_cassette(path: str | PathLike[str], exchanges: Iterable[Exchange]) -> None:
+    """Writes exchanges to a cassette file."""
+    with _open(path, "w") as f:
+        for exchange in exchanges:
+            record = {k: v for k, v in asdict(exchange).items() if v is not None}
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+def load_cassette(path: str | PathLike[str]) -> list[Exchange]:
+    """Reads the exchanges from a cassette file."""
+    with _open(path, "r") as f:
+        return [_exchange(json.loads(line)) for line in f if line.strip()]
+
+
+class RecordingTransport(Transport):
+    """Sends requests through another transport and records each exchange, with credentials redacted."""
+
+    def __init__(
+        self,
+        transport: Transport | None = None,
+        redact_keys: Iterable[str] = DEFAULT_REDACTED_KEYS,
+    ) -> None:
+        """
+        Constructor for the RecordingTransport class.
+
+        :param transport: The transport requests are sent with. Defaults to a
+            :class:`~pylibrelinkup.transport.RequestsTransport`.
+        :type transport: Transport | None
+        :param redact_keys: Keys whose values are redacted from request and response bodies.
+        :type redact_keys: Iterable[str]
+        """
+        if transport is None:
+            from .transport import RequestsTransport
+
+            transport = RequestsTransport()
+        self.transport = transport
+        self.redact_keys = frozenset(redact_keys)
+        self.exchanges: list[Exchange] = []
+        self._lock = threading.Lock()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        json_body: dict | None,
+        timeout: Timeout,
+    ) -> TransportResponse:
+        r = self.transport.request(method, url, headers, json_body, timeout)
+        exchange = Exchange(
+            method=method.upper(),
+            url=url,
+            status_code=r.status_code,
+            ttfb=r.ttfb,
+            download=r.download,
+            request_json=redact(json_body, self.redact_keys),
+            headers={
+                name: r.headers[name] for name in RECORDED_HEADERS if name in r.headers
+            }
+            or None,
+        )
+        try:
+            exchange.json = redact(json.loads(r.content), self.redact_keys)
+        except ValueError:
+            exchange.body = r.content.decode("utf-8", errors="replace")
+        with self._lock:
+            self.exchanges.append(exchange)
+        return r
+
+    def save(self, path: str | PathLike[str]) -> None:
+        """Writes the exchanges recorded so far to a cassette file."""
+        with self._lock:
+            exchanges = list(self.exchanges)
+        save_cassette(path, exchanges)
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class ReplayTransport(Transport):
+    """Serves recorded responses, in the order they were recorded for each method and URL."""
+
+    def __init__(
+        self,
+        exchanges: Iterable[Exchange],
+        speed: float | None = None,
+        repeat: bool = True,
+    ) -> None:
+        """
+        Constructor for the ReplayTransport class.
+
+        :param exchanges: The recorded exchanges.
+        :type exchanges: Iterable[Exchange]
+        :param speed: None to respond immediately, or how many times faster than recorded to respond, e.g. 1 for the
+            original timing.
+        :type speed: float | None
+        :param repeat: Whether to start again from the first response for a method and URL once all of its responses
+            have been served. Otherwise further requests raise
+            :class:`~pylibrelinkup.exceptions.LLUAPIConnectionError`.
+        :type repeat: bool
+        """
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be positive")
+        self.speed = speed
+        self.repeat = repeat
+        self.requests = 0
+        self._recorded: dict[tuple[str, str], list[Exchange]] = {}
+        for exchange in exchanges:
+            self._recorded.setdefault((exchange.method, exchange.url), []).append(
+                exchange
+            )
+        self._queues = {key: deque(value) for key, value in self._recorded.items()}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(
+        cls, path: str | PathLike[str], speed: float | None = None, repeat: bool = True
+    ) -> ReplayTransport:
+        """Creates a transport which replays a cassette file."""
+        return cls(load_cassette(path), speed=speed, repeat=repeat)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        json_body: dict | None,
+        timeout: Timeout,
+    ) -> TransportResponse:
+        key = (method.upper(), url)
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue is not None and not queue and self.repeat:
+                queue.extend(self._recorded[key])
+            if not queue:
+                raise LLUAPIConnectionError(f"No recorded response for {method} {url}")
+            exchange = queue.popleft()
+            self.requests += 1
+
+        started = time.perf_counter()
+        if self.speed is not None:
+            time.sleep(exchange.ttfb / self.speed)
+        headers_received = time.perf_counter()
+        if self.speed is not None:
+            time.sleep(exchange.download / self.speed)
+        return TransportResponse(
+            status_code=exchange.status_code,
+            headers=exchange.headers or {},
+            content=exchange.content(),
+            url=url,
+            ttfb=headers_received - started,
+            download=time.perf_counter() - headers_received,
+        )
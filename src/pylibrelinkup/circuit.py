@@ -0,0 +1,203 @@
+"""
+Circuit breakers which stop requests to a regional API URL while it is failing.
+
+Give a client a :class:`CircuitBreakers` registry and each API URL it talks to gets its own :class:`CircuitBreaker`.
+After ``failure_threshold`` consecutive failures (connection errors, timeouts, 5xx responses, or responses slower than
+``slow_call_duration``) the breaker opens and requests to that URL fail immediately with
+:class:`~pylibrelinkup.exceptions.CircuitOpenError`. Once ``reset_timeout`` has passed the breaker is half open: up to
+``half_open_probes`` requests are let through, and if they all succeed the breaker closes again, while a failure
+re-opens it. A registry may be shared by several clients, e.g. every client in a
+:class:`~pylibrelinkup.pool.ClientPool`, whose requests fail over to other accounts while a region's breaker is open.
+
+.. code-block:: python
+
+    client = PyLibreLinkUp(
+        email=email,
+        password=password,
+        circuit_breakers=CircuitBreakers(failure_threshold=3, slow_call_duration=10, reset_timeout=60),
+    )
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from enum import StrEnum
+from typing import Callable
+
+from .exceptions import CircuitOpenError
+
+__all__ = ["CircuitBreaker", "CircuitBreakers", "CircuitState"]
+
+
+class CircuitState(StrEnum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """A thread-safe circuit breaker for one API URL."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        slow_call_duration: float | None = None,
+        reset_timeout: float = 30.0,
+        half_open_probes: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Constructor for the CircuitBreaker class.
+
+        :param name: The API URL the breaker protects, used in errors.
+        :type name: str
+        :param failure_threshold: The number of consecutive failures which open the breaker.
+        :type failure_threshold: int
+        :param slow_call_duration: Seconds after which a successful request counts as a failure, or None.
+        :type slow_call_duration: float | None
+        :param reset_timeout: Seconds the breaker stays open before letting probe requests through.
+        :type reset_timeout: float
+        :param half_open_probes: The number of probe requests which must succeed to close the breaker.
+        :type half_open_probes: int
+        :param clock: The monotonic clock used to time the open state.
+        :type clock: Callable[[], float]
+        """
+        if failure_threshold < 1 or half_open_probes < 1:
+            raise ValueError(
+                "failure_threshold and half_open_probes must be at least 1"
+            )
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_duration = slow_call_duration
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self._clock = clock
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> CircuitState:
+        """Returns the current state, moving from open to half open once the reset timeout has passed."""
+        with self._lock:
+            self._update(self._clock())
+            return self._state
+
+    def _update(self, now: float) -> None:
+        if (
+            self._state is CircuitState.OPEN
+            and now - self._opened_at >= self.reset_timeout
+        ):
+            self._state = CircuitState.HALF_OPEN
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+
+    def _open(self, now: float) -> None:
+        self._state = CircuitState.OPEN
+        self._opened_at = now
+        self._failures = 0
+
+    def before_call(self) -> None:
+        """Admits a request, or raises if the breaker is not letting requests through.
+
+        Every admitted request must be followed by :meth:`record_success`, :meth:`record_failure` or :meth:`release`.
+
+        :raises CircuitOpenError: If the breaker is open, or half open with all of its probes in flight.
+        """
+        with self._lock:
+            now = self._clock()
+            self._update(now)
+            if self._state is CircuitState.CLOSED:
+                return
+            if (
+                self._state is CircuitState.HALF_OPEN
+                and self._probes_in_flight + self._probe_successes
+                < self.half_open_probes
+            ):
+                self._probes_in_flight += 1
+                return
+            retry_after = (
+                max(0.0, self._opened_at + self.reset_timeout - now)
+                if self._state is CircuitState.OPEN
+                else None
+            )
+            raise CircuitOpenError(self.name, self._state.value, retry_after)
+
+    def record_success(self, duration: float = 0.0) -> None:
+        """Records a completed request. A request slower than ``slow_call_duration`` is recorded as a failure."""
+        if self.slow_call_duration is not None and duration > self.slow_call_duration:
+            self.record_failure()
+            return
+        with self._lock:
+            if self._state is CircuitState.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_probes:
+                    self._state = CircuitState.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        """Records a failed request, opening the breaker if there have been too many."""
+        with self._lock:
+            now = self._clock()
+            if self._state is CircuitState.HALF_OPEN:
+                self._open(now)
+            elif self._state is CircuitState.CLOSED:
+                self._failures += 1
+                if self._failures >= self.failure_threshold:
+                    self._open(now)
+
+    def release(self) -> None:
+        """Releases an admitted request whose outcome says nothing about the health of the API."""
+        with self._lock:
+            if self._state is CircuitState.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+
+class CircuitBreakers:
+    """A circuit breaker for each API URL, created on first use with shared settings."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        slow_call_duration: float | None = None,
+        reset_timeout: float = 30.0,
+        half_open_probes: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Constructor for the CircuitBreakers class. The parameters are passed to each :class:`CircuitBreaker`.
+        """
+        self.failure_threshold = failure_threshold
+        self.slow_call_duration = slow_call_duration
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self._clock = clock
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, api_url: str) -> CircuitBreaker:
+        """Returns the breaker for an API URL."""
+        with self._lock:
+            breaker = self._breakers.get(api_url)
+            if breaker is None:
+                breaker = self._breakers[api_url] = CircuitBreaker(
+                    api_url,
+                    failure_threshold=self.failure_threshold,
+                    slow_call_duration=self.slow_call_duration,
+                    reset_timeout=self.reset_timeout,
+                    half_open_probes=self.half_open_probes,
+                    clock=self._clock,
+                )
+            return breaker
+
+    def states(self) -> dict[str, CircuitState]:
+        """Returns the state of every breaker, by API URL."""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.state for breaker in breakers}
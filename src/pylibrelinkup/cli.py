@@ -0,0 +1,193 @@
+"""
+The ``pylibrelinkup`` command line interface.
+
+Every command writes newline-delimited JSON to stdout, one measurement per line, flushing after each line so the
+output can be piped straight into other tools. Credentials are read from the ``LIBRELINKUP_EMAIL`` and
+``LIBRELINKUP_PASSWORD`` environment variables.
+
+.. code-block:: console
+
+    $ pylibrelinkup --region EU watch --interval 60
+    $ pylibrelinkup dump graph --patient "Jane Doe" > graph.ndjson
+    $ pylibrelinkup dump logbook > logbook.ndjson
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Sequence, TextIO
+from uuid import UUID
+
+from .api_url import APIUrl
+from .data_types import Measurement
+from .pool import authenticate_all
+from .pylibrelinkup import PyLibreLinkUp
+from .utilities import coerce_patient_id
+
+__all__ = ["dump", "main", "measurement_record", "watch"]
+
+
+def measurement_record(patient_id: UUID, measurement: Measurement) -> dict[str, Any]:
+    """Returns the JSON-serialisable record written for a measurement."""
+    record: dict[str, Any] = {
+        "patient_id": str(patient_id),
+        "factory_timestamp": measurement.factory_timestamp.isoformat(),
+        "timestamp": measurement.timestamp.isoformat(),
+        "value": measurement.value,
+        "value_in_mg_per_dl": measurement.value_in_mg_per_dl,
+    }
+    trend = getattr(measurement, "trend", None)
+    if trend is not None:
+        record["trend"] = trend.name
+    return record
+
+
+def _write(out: TextIO, record: dict[str, Any]) -> None:
+    out.write(json.dumps(record, separators=(",", ":")) + "\n")
+    out.flush()
+
+
+def _patient_ids(client: PyLibreLinkUp, patients: Sequence[str]) -> list[UUID]:
+    if not patients:
+        return [patient.patient_id for patient in client.get_patients()]
+    return [
+        coerce_patient_id(patient, client.patient_directory) for patient in patients
+    ]
+
+
+def watch(
+    client: PyLibreLinkUp,
+    patients: Sequence[str] = (),
+    interval: float = 60.0,
+    out: TextIO | None = None,
+    err: TextIO | None = None,
+    iterations: int | None = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> None:
+    """Polls the latest measurement of each patient and writes each new one as a line of JSON.
+
+    A failed poll is reported on ``err`` and retried on the next iteration.
+
+    :param client: An authenticated client.
+    :param patients: Patient ids or names to watch. Every followed patient is watched if empty.
+    :param interval: Seconds between polls.
+    :param out: Where measurements are written. Defaults to stdout.
+    :param err: Where errors are written. Defaults to stderr.
+    :param iterations: The number of polls to make, or None to poll until interrupted.
+    :param sleep: The function used to wait between polls.
+    """
+    out = out or sys.stdout
+    err = err or sys.stderr
+    patient_ids = _patient_ids(client, patients)
+    latest: dict[UUID, datetime] = {}
+    iteration = 0
+    while iterations is None or iteration < iterations:
+        if iteration:
+            sleep(interval)
+        iteration += 1
+        for patient_id in patient_ids:
+            try:
+                measurement = client.latest(patient_id)
+            except Exception as exc:
+                err.write(f"{patient_id}: {exc!r}\n")
+                err.flush()
+                continue
+            timestamp = measurement.factory_timestamp
+            if patient_id not in latest or timestamp > latest[patient_id]:
+                latest[patient_id] = timestamp
+                _write(out, measurement_record(patient_id, measurement))
+
+
+def dump(
+    client: PyLibreLinkUp,
+    source: str,
+    patients: Sequence[str] = (),
+    out: TextIO | None = None,
+) -> int:
+    """Writes every graph or logbook measurement of each patient as a line of JSON.
+
+    :param client: An authenticated client.
+    :param source: ``graph`` or ``logbook``.
+    :param patients: Patient ids or names to dump. Every followed patient is dumped if empty.
+    :param out: Where measurements are written. Defaults to stdout.
+    :return: The number of measurements written.
+    """
+    out = out or sys.stdout
+    if source not in ("graph", "logbook"):
+        raise ValueError(f"Unknown source: {source!r}")
+    fetch = getattr(client, source)
+    count = 0
+    for patient_id in _patient_ids(client, patients):
+        for measurement in fetch(patient_id):
+            _write(out, measurement_record(patient_id, measurement))
+            count += 1
+    return count
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="pylibrelinkup",
+        description="Stream LibreLinkUp measurements as newline-delimited JSON.",
+    )
+    parser.add_argument("--region", default="US", choices=[url.name for url in APIUrl])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    patient_help = "a patient id or name; may be repeated (default: all patients)"
+    watch_parser = commands.add_parser("watch", help="stream new readings")
+    watch_parser.add_argument(
+        "--patient", action="append", default=[], help=patient_help
+    )
+    watch_parser.add_argument(
+        "--interval", type=float, default=60.0, help="seconds between polls"
+    )
+
+    dump_parser = commands.add_parser("dump", help="write graph or logbook data")
+    dump_parser.add_argument("source", choices=["graph", "logbook"])
+    dump_parser.add_argument(
+        "--patient", action="append", default=[], help=patient_help
+    )
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Runs the command line interface and returns the exit status."""
+    parser = _parser()
+    args = parser.parse_args(argv)
+    try:
+        email = os.environ["LIBRELINKUP_EMAIL"]
+        password = os.environ["LIBRELINKUP_PASSWORD"]
+    except KeyError as exc:
+        parser.error(f"{exc.args[0]} must be set")
+
+    client = PyLibreLinkUp(
+        email=email,
+        password=password,
+        api_url=APIUrl[args.region],
+        fast_models=True,
+        patient_directory_ttl=3600,
+    )
+    [login] = authenticate_all([client])
+    if not login.ok:
+        print(f"Login failed: {login.error!r}", file=sys.stderr)
+        return 1
+
+    try:
+        if args.command == "watch":
+            watch(client, args.patient, args.interval)
+        else:
+            dump(client, args.source, args.patient)
+    except KeyboardInterrupt:
+        pass
+    except BrokenPipeError:
+        # The reader went away, e.g. ``pylibrelinkup watch | head``. Stop writing to the closed pipe.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,8 @@
 from uuid import UUID
 
-from pylibrelinkup.models.data import Patient
+from pylibrelinkup.models.data import GlucoseMeasurement, Patient
+from pylibrelinkup.models.fast import FastGlucoseMeasurement
 
 PatientIdentifier = UUID | str | Patient
+
+Measurement = GlucoseMeasurement | FastGlucoseMeasurement
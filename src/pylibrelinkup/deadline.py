@@ -0,0 +1,67 @@
+"""
+End-to-end deadlines for calls to the LibreLinkUp API.
+
+A deadline bounds the total time spent on everything inside a ``with`` block: waiting for the rate limiter, connecting,
+reading, redirects and logging in again all draw on the same budget. Deadlines are held in a context variable, so they
+apply to every client used in the block, follow ``asyncio`` tasks and ``asyncio.to_thread``, and nest, with the
+earliest deadline winning.
+
+.. code-block:: python
+
+    with client.deadline(5):
+        client.authenticate()
+        measurement = client.latest(patient)
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from .exceptions import DeadlineExceededError
+
+__all__ = ["check", "deadline", "remaining"]
+
+_deadline: ContextVar[float | None] = ContextVar("pylibrelinkup_deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[float]:
+    """Limits the total time the calls inside the block may take.
+
+    :param seconds: The time allowed, from now.
+    :type seconds: float
+    :return: The deadline in effect, as a :func:`time.monotonic` time. This is earlier than requested if an enclosing
+        deadline expires first.
+    :rtype: float
+    """
+    current = _deadline.get()
+    expires = time.monotonic() + seconds
+    if current is not None:
+        expires = min(current, expires)
+    token = _deadline.set(expires)
+    try:
+        yield expires
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """Returns the seconds left before the current deadline, or None if there is no deadline."""
+    expires = _deadline.get()
+    if expires is None:
+        return None
+    return expires - time.monotonic()
+
+
+def check() -> float | None:
+    """Returns the seconds left before the current deadline.
+
+    :raises DeadlineExceededError: If the deadline has passed.
+    """
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceededError()
+    return left
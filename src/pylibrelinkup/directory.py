@@ -0,0 +1,149 @@
+"""
+A cached, indexed view of the patients followed by a LibreLinkUp account.
+
+Enable it with ``PyLibreLinkUp(..., patient_directory_ttl=300)``. Patient identifiers passed to the client are then
+resolved through the directory, so patients can be referred to by name or by connection id as well as by patient id,
+without a request to ``/llu/connections`` each time.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Iterator
+from uuid import UUID
+
+from .exceptions import PatientNotFoundError
+from .models.data import Patient
+
+__all__ = ["PatientDirectory", "normalise_name"]
+
+
+def normalise_name(name: str) -> str:
+    """Normalises a patient name for lookup: case-insensitive, with runs of whitespace collapsed."""
+    return " ".join(name.split()).casefold()
+
+
+class PatientDirectory:
+    """PatientDirectory class to store patients indexed by patient id, connection id and name."""
+
+    def __init__(
+        self,
+        fetch: Callable[[], list[Patient]],
+        ttl: float = 300.0,
+        on_lookup: Callable[[bool], None] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Constructor for the PatientDirectory class.
+
+        :param fetch: Called to retrieve the current list of patients when the directory is stale.
+        :type fetch: Callable[[], list[Patient]]
+        :param ttl: The number of seconds a fetched list of patients is considered fresh.
+        :type ttl: float
+        :param on_lookup: Called with ``True`` for lookups answered from the cache, ``False`` for those that refreshed.
+        :type on_lookup: Callable[[bool], None] | None
+        :param clock: The monotonic clock used to measure the TTL.
+        :type clock: Callable[[], float]
+        """
+        self._fetch = fetch
+        self.ttl = ttl
+        self._on_lookup = on_lookup
+        self._clock = clock
+        self._by_patient_id: dict[UUID, Patient] = {}
+        self._by_connection_id: dict[UUID, Patient] = {}
+        self._by_name: dict[str, list[Patient]] = {}
+        self._loaded_at: float | None = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._by_patient_id)
+
+    def __iter__(self) -> Iterator[Patient]:
+        return iter(list(self._by_patient_id.values()))
+
+    @property
+    def is_stale(self) -> bool:
+        """Returns True if the directory has never been loaded or its TTL has expired."""
+        return self._loaded_at is None or self._clock() - self._loaded_at >= self.ttl
+
+    def update(self, patients: list[Patient]) -> None:
+        """Replaces the contents of the directory with a freshly fetched list of patients."""
+        by_patient_id = {}
+        by_connection_id = {}
+        by_name: dict[str, list[Patient]] = {}
+        for patient in patients:
+            by_patient_id[patient.patient_id] = patient
+            by_connection_id[patient.id] = patient
+            name = normalise_name(f"{patient.first_name} {patient.last_name}")
+            by_name.setdefault(name, []).append(patient)
+        # Swap the indexes in one step, so concurrent readers never see a partially built directory.
+        self._by_patient_id, self._by_connection_id, self._by_name = (
+            by_patient_id,
+            by_connection_id,
+            by_name,
+        )
+        self._loaded_at = self._clock()
+
+    def refresh(self) -> None:
+        """Fetches the list of patients and rebuilds the indexes."""
+        self.update(self._fetch())
+
+    def _ensure_fresh(self) -> None:
+        if not self.is_stale:
+            self._record_lookup(True)
+            return
+        with self._lock:
+            # Another thread may have refreshed the directory while this one waited for the lock.
+            if self.is_stale:
+                self._record_lookup(False)
+                self.refresh()
+            else:
+                self._record_lookup(True)
+
+    def _record_lookup(self, hit: bool) -> None:
+        if self._on_lookup is not None:
+            self._on_lookup(hit)
+
+    def resolve_uuid(self, identifier: UUID) -> UUID:
+        """Returns the patient id for a patient id or connection id.
+
+        A known patient id is returned without a fetch. Any other id is looked up after refreshing the directory if it
+        is stale, so a connection id is mapped even when the directory is cold or expired. Ids still not found are
+        assumed to be patient ids and returned unchanged; the API rejects them if the account does not follow them.
+        """
+        if identifier in self._by_patient_id:
+            return identifier
+        self._ensure_fresh()
+        if identifier in self._by_patient_id:
+            return identifier
+        patient = self._by_connection_id.get(identifier)
+        return patient.patient_id if patient is not None else identifier
+
+    def get(self, patient_id: UUID) -> Patient:
+        """Returns the patient with the given patient id or connection id, refreshing the directory if stale.
+
+        :raises PatientNotFoundError: If no such patient is followed by the account.
+        """
+        self._ensure_fresh()
+        patient = self._by_patient_id.get(patient_id) or self._by_connection_id.get(
+            patient_id
+        )
+        if patient is None:
+            raise PatientNotFoundError()
+        return patient
+
+    def find_by_name(self, name: str) -> Patient:
+        """Returns the patient with the given full name, refreshing the directory if stale.
+
+        :param name: The patient's first and last name, e.g. ``"Jane Doe"``. Matching ignores case and extra whitespace.
+        :raises PatientNotFoundError: If no such patient is followed by the account.
+        :raises ValueError: If more than one followed patient has that name.
+        """
+        self._ensure_fresh()
+        matches = self._by_name.get(normalise_name(name), [])
+        if not matches:
+            raise PatientNotFoundError()
+        if len(matches) > 1:
+            raise ValueError(f"More than one patient is named {name!r}")
+        return matches[0]
@@ -1,5 +1,24 @@
+from typing import Any, NoReturn
+
 from .api_url import APIUrl
 
+__all__ = [
+    "PyLibreLinkUpError",
+    "AuthenticationError",
+    "RedirectError",
+    "TermsOfUseError",
+    "PrivacyPolicyError",
+    "EmailVerificationError",
+    "PatientNotFoundError",
+    "LLUAPIError",
+    "LLUAPIRateLimitError",
+    "LLUAPITimeoutError",
+    "DeadlineExceededError",
+    "LLUAPIConnectionError",
+    "CircuitOpenError",
+    "raise_for_response",
+]
+
 
 class PyLibreLinkUpError(Exception):
     """Base class for PyLibreLinkUp exceptions."""
@@ -15,11 +34,13 @@ class AuthenticationError(PyLibreLinkUpError):
 
 class RedirectError(PyLibreLinkUpError):
     """Raised when a redirect is encountered during authentication. This is a signal to retry the request with the new region.
-    The new region is stored in the `region` attribute of the exception, which is an APIUrl enum value.
+    The new region is stored in the `region` attribute of the exception, which is an APIUrl enum value, and the number
+    of redirects followed so far, including this one, in the `redirects` attribute.
     """
 
-    def __init__(self, region: APIUrl):
+    def __init__(self, region: APIUrl, redirects: int = 1):
         self.region = region
+        self.redirects = redirects
         super().__init__(f"Redirected to {region}")
 
 
@@ -50,6 +71,10 @@ class PatientNotFoundError(PyLibreLinkUpError):
     def __init__(self):
         super().__init__("Patient not found")
 
+    def __reduce__(self):
+        # Pickle without the message argument, so the error can be raised in another process, e.g. by parse_bulk.
+        return type(self), ()
+
 
 class LLUAPIError(PyLibreLinkUpError):
     """Raised when the LibreLinkUp API returns an error."""
@@ -70,3 +95,49 @@ class LLUAPIRateLimitError(LLUAPIError):
     ):
         self.retry_after = retry_after
         super().__init__(response_code, message)
+
+
+class LLUAPITimeoutError(PyLibreLinkUpError, TimeoutError):
+    """Raised when a request to the LibreLinkUp API times out, or the deadline for a call has passed."""
+
+    def __init__(self, message: str = "Request timed out"):
+        super().__init__(message)
+
+
+class DeadlineExceededError(LLUAPITimeoutError):
+    """Raised when the deadline set by the caller has passed, rather than the API having failed to respond in time."""
+
+    def __init__(self, message: str = "Deadline exceeded"):
+        super().__init__(message)
+
+
+class LLUAPIConnectionError(PyLibreLinkUpError, ConnectionError):
+    """Raised by a transport when the LibreLinkUp API cannot be reached."""
+
+
+class CircuitOpenError(PyLibreLinkUpError):
+    """Raised without sending a request when the circuit breaker for the API URL is open.
+
+    The `state` attribute is the breaker state (``open`` or ``half_open``), and `retry_after` is the number of seconds
+    until the breaker lets a probe request through, if known.
+    """
+
+    def __init__(self, api_url: str, state: str, retry_after: float | None = None):
+        self.api_url = api_url
+        self.state = state
+        self.retry_after = retry_after
+        super().__init__(f"Circuit breaker for {api_url} is {state}")
+
+
+def raise_for_response(response: Any, exc: Exception) -> NoReturn:
+    """Raises the error corresponding to a decoded API response which could not be parsed.
+
+    :param response: The decoded response.
+    :param exc: The error raised while parsing it, chained to the error raised.
+    :raises PatientNotFoundError: If the API could not load the patient.
+    :raises ValueError: For any other response.
+    """
+    if isinstance(response, dict) and response.get("status") == 4:
+        # 4 is the status code for "couldNotLoadPatient"
+        raise PatientNotFoundError() from exc
+    raise ValueError(f"Unexpected response from the LibreLinkUp API: {exc!r}") from exc
@@ -0,0 +1,257 @@
+"""
+Incremental glycemic statistics over sliding time windows.
+
+Each new measurement updates the statistics in constant (amortised) time: the mean and standard deviation use Welford
+accumulators which support removal as readings leave the window, and time in, below and above range are kept as running
+totals. Nothing is recomputed from the full history.
+
+.. code-block:: python
+
+    stats = GlycemicStatsEngine()
+    stats.register(patient.patient_id, target_low=70, target_high=180)
+    for measurement in client.graph(patient):
+        stats.add(patient.patient_id, measurement)
+    print(stats.summaries(patient.patient_id)[DAY].time_in_range)
+"""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, Sequence
+from uuid import UUID
+
+from .data_types import Measurement
+from .models.connection import Connection
+
+__all__ = [
+    "DAY",
+    "DEFAULT_WINDOWS",
+    "GlycemicStatsEngine",
+    "GlycemicSummary",
+    "PatientGlycemicStats",
+    "RollingGlycemicStats",
+    "glucose_management_indicator",
+]
+
+DAY = timedelta(days=1)
+DEFAULT_WINDOWS: tuple[timedelta, ...] = (DAY, timedelta(days=7), timedelta(days=14))
+
+DEFAULT_MAX_INTERVAL = timedelta(minutes=15)
+"""The longest interval a single reading is assumed to represent. Any time beyond it is treated as missing data."""
+
+_BELOW, _IN_RANGE, _ABOVE = 0, 1, 2
+
+
+def glucose_management_indicator(mean_mg_per_dl: float) -> float:
+    """Returns the Glucose Management Indicator (estimated HbA1c, %) for a mean glucose in mg/dL."""
+    return 3.31 + 0.02392 * mean_mg_per_dl
+
+
+@dataclass(frozen=True)
+class GlycemicSummary:
+    """GlycemicSummary class to store the statistics for one window. Glucose values are in mg/dL."""
+
+    window: timedelta
+    count: int
+    mean: float | None
+    sd: float | None
+    cv: float | None
+    gmi: float | None
+    time_in_range: float | None
+    minutes_below: float
+    minutes_in_range: float
+    minutes_above: float
+
+
+class RollingGlycemicStats:
+    """Statistics for a single sliding window of measurements."""
+
+    def __init__(
+        self,
+        window: timedelta,
+        target_low: float,
+        target_high: float,
+        max_interval: timedelta = DEFAULT_MAX_INTERVAL,
+    ) -> None:
+        """
+        Constructor for the RollingGlycemicStats class.
+
+        :param window: The length of the sliding window.
+        :type window: timedelta
+        :param target_low: The lower bound of the target range, in mg/dL.
+        :type target_low: float
+        :param target_high: The upper bound of the target range, in mg/dL.
+        :type target_high: float
+        :param max_interval: The longest interval a single reading is assumed to represent.
+        :type max_interval: timedelta
+        """
+        self.window = window
+        self.target_low = target_low
+        self.target_high = target_high
+        self._max_minutes = max_interval.total_seconds() / 60
+        # (factory timestamp, value, minutes represented, band)
+        self._readings: deque[tuple[datetime, float, float, int]] = deque()
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._minutes = [0.0, 0.0, 0.0]
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def latest(self) -> datetime | None:
+        """Returns the factory timestamp of the most recent reading in the window."""
+        return self._readings[-1][0] if self._readings else None
+
+    def _band(self, value: float) -> int:
+        if value < self.target_low:
+            return _BELOW
+        if value > self.target_high:
+            return _ABOVE
+        return _IN_RANGE
+
+    def add(self, measurement: Measurement) -> bool:
+        """Adds a measurement to the window and evicts readings which have fallen out of it.
+
+        Measurements must arrive in order; one which is not newer than the latest reading is ignored.
+
+        :return: True if the measurement was added.
+        """
+        timestamp = measurement.factory_timestamp
+        value = measurement.value_in_mg_per_dl
+        latest = self.latest
+        if latest is not None and timestamp <= latest:
+            return False
+        minutes = 0.0
+        if latest is not None:
+            minutes = min((timestamp - latest).total_seconds() / 60, self._max_minutes)
+        band = self._band(value)
+        self._readings.append((timestamp, value, minutes, band))
+        self._minutes[band] += minutes
+        self._count += 1
+        delta = value - self._mean
+        self._mean += delta / self._count
+        self._m2 += delta * (value - self._mean)
+        self._evict(timestamp - self.window)
+        return True
+
+    def _evict(self, cutoff: datetime) -> None:
+        while self._readings and self._readings[0][0] <= cutoff:
+            _, value, minutes, band = self._readings.popleft()
+            self._minutes[band] -= minutes
+            if self._count == 1:
+                self._count, self._mean, self._m2 = 0, 0.0, 0.0
+                self._minutes = [0.0, 0.0, 0.0]
+                continue
+            previous_mean = (self._count * self._mean - value) / (self._count - 1)
+            self._m2 = max(
+                0.0, self._m2 - (value - self._mean) * (value - previous_mean)
+            )
+            self._mean = previous_mean
+            self._count -= 1
+
+    def summary(self) -> GlycemicSummary:
+        """Returns the current statistics for the window."""
+        count = self._count
+        mean = self._mean if count else None
+        sd = math.sqrt(self._m2 / (count - 1)) if count > 1 else None
+        below, in_range, above = self._minutes
+        total = below + in_range + above
+        return GlycemicSummary(
+            window=self.window,
+            count=count,
+            mean=mean,
+            sd=sd,
+            cv=sd / mean if sd is not None and mean else None,
+            gmi=glucose_management_indicator(mean) if mean is not None else None,
+            time_in_range=in_range / total if total else None,
+            minutes_below=below,
+            minutes_in_range=in_range,
+            minutes_above=above,
+        )
+
+
+class PatientGlycemicStats:
+    """Statistics for one patient over several sliding windows."""
+
+    def __init__(
+        self,
+        target_low: float,
+        target_high: float,
+        windows: Sequence[timedelta] = DEFAULT_WINDOWS,
+        max_interval: timedelta = DEFAULT_MAX_INTERVAL,
+    ) -> None:
+        self.windows = {
+            window: RollingGlycemicStats(window, target_low, target_high, max_interval)
+            for window in windows
+        }
+
+    @classmethod
+    def from_connection(
+        cls, connection: Connection, windows: Sequence[timedelta] = DEFAULT_WINDOWS
+    ) -> PatientGlycemicStats:
+        """Creates statistics using the patient's target range from their connection data."""
+        return cls(connection.target_low, connection.target_high, windows)
+
+    def add(self, measurement: Measurement) -> bool:
+        """Adds a measurement to every window.
+
+        :return: True if the measurement was newer than the latest reading and was added.
+        """
+        added = False
+        for stats in self.windows.values():
+            added = stats.add(measurement) or added
+        return added
+
+    def extend(self, measurements: Iterable[Measurement]) -> None:
+        """Adds measurements in factory timestamp order. Measurements already seen are ignored."""
+        for measurement in sorted(measurements, key=lambda m: m.factory_timestamp):
+            self.add(measurement)
+
+    def summaries(self) -> dict[timedelta, GlycemicSummary]:
+        """Returns the current statistics for each window."""
+        return {window: stats.summary() for window, stats in self.windows.items()}
+
+
+class GlycemicStatsEngine:
+    """Statistics for many patients, keyed by patient id."""
+
+    def __init__(
+        self,
+        windows: Sequence[timedelta] = DEFAULT_WINDOWS,
+        max_interval: timedelta = DEFAULT_MAX_INTERVAL,
+    ) -> None:
+        self.windows = tuple(windows)
+        self.max_interval = max_interval
+        self.patients: dict[UUID, PatientGlycemicStats] = {}
+
+    def register(
+        self, patient_id: UUID, target_low: float, target_high: float
+    ) -> PatientGlycemicStats:
+        """Starts tracking a patient with the given target range, in mg/dL."""
+        stats = PatientGlycemicStats(
+            target_low, target_high, self.windows, self.max_interval
+        )
+        self.patients[patient_id] = stats
+        return stats
+
+    def register_connection(self, connection: Connection) -> PatientGlycemicStats:
+        """Starts tracking the patient of a connection, using its target range."""
+        return self.register(
+            connection.patient_id, connection.target_low, connection.target_high
+        )
+
+    def add(self, patient_id: UUID, measurement: Measurement) -> bool:
+        """Adds a measurement for a registered patient.
+
+        :raises KeyError: If the patient has not been registered.
+        """
+        return self.patients[patient_id].add(measurement)
+
+    def summaries(self, patient_id: UUID) -> dict[timedelta, GlycemicSummary]:
+        """Returns the current statistics for each window for a patient."""
+        return self.patients[patient_id].summaries()
@@ -0,0 +1,190 @@
+"""
+Hedged requests, to cut the latency tail of idempotent API calls.
+
+With a :class:`HedgingPolicy` attached, a GET which has not completed within a percentile of the recent latency of its
+regional API URL is sent a second time, and whichever response arrives first is used. The second request is only sent
+if the client's rate limiter has a token to spare right away, so hedging never delays other requests or exceeds the
+client's rate. Requests never queue for the policy's worker threads: when they are all busy, requests are sent from the
+calling thread and are not hedged.
+
+.. code-block:: python
+
+    client = PyLibreLinkUp(email=email, password=password, hedging=HedgingPolicy(percentile=0.95))
+"""
+
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, TypeVar
+
+__all__ = ["HedgingPolicy"]
+
+T = TypeVar("T")
+
+
+class HedgingPolicy:
+    """Decides when to hedge a request, from the latencies recently observed for each API URL."""
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        window: int = 100,
+        min_samples: int = 10,
+        initial_delay: float = 1.0,
+        min_delay: float = 0.05,
+        max_delay: float | None = None,
+        max_workers: int = 8,
+    ) -> None:
+        """
+        Constructor for the HedgingPolicy class.
+
+        :param percentile: The fraction of requests expected to complete before a hedge is sent, e.g. 0.95.
+        :type percentile: float
+        :param window: The number of recent latencies kept for each API URL.
+        :type window: int
+        :param min_samples: The number of latencies needed before the percentile is used.
+        :type min_samples: int
+        :param initial_delay: Seconds to wait before hedging until enough latencies have been observed.
+        :type initial_delay: float
+        :param min_delay: The shortest time to wait before hedging.
+        :type min_delay: float
+        :param max_delay: The longest time to wait before hedging, or None for no limit.
+        :type max_delay: float | None
+        :param max_workers: The number of threads used to send requests. A request which finds them all busy is sent
+            from the calling thread without hedging.
+        :type max_workers: int
+        """
+        if not 0 < percentile < 1:
+            raise ValueError("percentile must be between 0 and 1")
+        self.percentile = percentile
+        self.window = window
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.max_workers = max_workers
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self.hedges_skipped = 0
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._latencies: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+
+    def record(self, api_url: str, seconds: float) -> None:
+        """Records the latency of a completed request."""
+        with self._lock:
+            latencies = self._latencies.get(api_url)
+            if latencies is None:
+                latencies = self._latencies[api_url] = deque(maxlen=self.window)
+            latencies.append(seconds)
+
+    def delay(self, api_url: str) -> float:
+        """Returns how long to wait for a request to an API URL before hedging it."""
+        with self._lock:
+            latencies = sorted(self._latencies.get(api_url, ()))
+        if len(latencies) < self.min_samples:
+            delay = self.initial_delay
+        else:
+            delay = latencies[
+                min(len(latencies) - 1, int(self.percentile * len(latencies)))
+            ]
+        delay = max(delay, self.min_delay)
+        if self.max_delay is not None:
+            delay = min(delay, self.max_delay)
+        return delay
+
+    def _submit(self, call: Callable[[], T]) -> Future[T] | None:
+        """Starts a call on a worker thread, or returns None without queueing it if every worker is busy."""
+        if not self._slots.acquire(blocking=False):
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="pylibrelinkup-hedge",
+                )
+            executor = self._executor
+        # Run in a copy of the caller's context, so that its deadline applies.
+        future = executor.submit(contextvars.copy_context().run, call)
+        future.add_done_callback(lambda f: self._slots.release())
+        return future
+
+    def run(
+        self,
+        api_url: str,
+        call: Callable[[], T],
+        may_hedge: Callable[[], bool] = lambda: True,
+        discard: Callable[[T], None] = lambda result: None,
+        on_hedge: Callable[[], None] = lambda: None,
+    ) -> T:
+        """Runs a call, starting a second copy of it if the first is slow, and returns the first successful result.
+
+        The delay before hedging is counted from when the first call starts. Calls never wait for a worker thread:
+        if every worker is busy, the first call runs on the calling thread without a hedge, and a hedge which finds
+        no free worker is not sent.
+
+        :param api_url: The API URL the call is made to, used to choose the delay.
+        :param call: The request to make. It must be safe to make twice.
+        :param may_hedge: Called once the delay has passed; the hedge is only sent if it returns True.
+        :param discard: Called with the result of the slower call if it also succeeds.
+        :param on_hedge: Called when the second call is started.
+        :raises Exception: The error of the first call, if both calls fail.
+        """
+        started = threading.Event()
+        start_time = [0.0]
+
+        def primary_call() -> T:
+            start_time[0] = time.monotonic()
+            started.set()
+            return call()
+
+        primary = self._submit(primary_call)
+        if primary is None:
+            with self._lock:
+                self.hedges_skipped += 1
+            return call()
+        started.wait()
+        delay = self.delay(api_url) - (time.monotonic() - start_time[0])
+        done, _ = wait([primary], timeout=max(delay, 0))
+        if done or not may_hedge():
+            return primary.result()
+
+        hedge = self._submit(call)
+        if hedge is None:
+            with self._lock:
+                self.hedges_skipped += 1
+            return primary.result()
+        with self._lock:
+            self.hedges_sent += 1
+        on_hedge()
+
+        def release(loser: Future[T]) -> None:
+            # Retrieve the loser's error, or hand its result back to be closed.
+            if loser.exception() is None:
+                discard(loser.result())
+
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in (primary, hedge):
+                if future in done and future.exception() is None:
+                    if future is hedge:
+                        with self._lock:
+                            self.hedges_won += 1
+                    loser = hedge if future is primary else primary
+                    # The loser may have finished in the same round as the winner, or may still be running.
+                    loser.add_done_callback(release)
+                    return future.result()
+        return primary.result()
+
+    def shutdown(self) -> None:
+        """Stops the worker threads once any requests in progress have finished."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
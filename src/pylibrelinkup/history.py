@@ -0,0 +1,236 @@
+"""
+A per-patient index of glucose history, merged from the graph and logbook endpoints, for time-range queries.
+
+:meth:`~pylibrelinkup.PyLibreLinkUp.history` answers a query for any time range from a :class:`HistoryIndex`. The index
+keeps each patient's measurements sorted by factory timestamp, so a range is found with a binary search, and
+measurements received more than once are stored once. It also records which periods each endpoint has covered: the
+graph endpoint returns the last 12 hours and the logbook the last 14 days, so the client only makes a request when part
+of the range has not been covered recently enough.
+"""
+
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from enum import StrEnum
+from typing import Iterable
+from uuid import UUID
+
+from .data_types import Measurement
+from .utilities import as_utc
+
+__all__ = [
+    "DEFAULT_MAX_AGE",
+    "GRAPH_WINDOW",
+    "LOGBOOK_WINDOW",
+    "HistoryIndex",
+    "HistorySource",
+]
+
+GRAPH_WINDOW = timedelta(hours=12)
+"""How far back the graph endpoint returns measurements."""
+
+LOGBOOK_WINDOW = timedelta(days=14)
+"""How far back the logbook endpoint returns measurements."""
+
+DEFAULT_MAX_AGE = timedelta(minutes=1)
+"""How recently an endpoint must have been requested for its data to count as up to date."""
+
+
+class HistorySource(StrEnum):
+    GRAPH = "graph"
+    LOGBOOK = "logbook"
+
+
+_WINDOWS = {HistorySource.GRAPH: GRAPH_WINDOW, HistorySource.LOGBOOK: LOGBOOK_WINDOW}
+
+
+@dataclass
+class _Coverage:
+    """The periods an endpoint has returned data for, as sorted, non-overlapping intervals."""
+
+    intervals: list[tuple[datetime, datetime]] = field(default_factory=list)
+
+    def add(self, start: datetime, end: datetime) -> None:
+        merged = []
+        for interval_start, interval_end in sorted([*self.intervals, (start, end)]):
+            if merged and interval_start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], interval_end))
+            else:
+                merged.append((interval_start, interval_end))
+        self.intervals = merged
+
+    def trim(self, cutoff: datetime) -> None:
+        """Forgets the coverage before ``cutoff``."""
+        self.intervals = [
+            (max(interval_start, cutoff), interval_end)
+            for interval_start, interval_end in self.intervals
+            if interval_end >= cutoff
+        ]
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        return any(
+            interval_start <= start and end <= interval_end
+            for interval_start, interval_end in self.intervals
+        )
+
+    @property
+    def end(self) -> datetime | None:
+        return self.intervals[-1][1] if self.intervals else None
+
+
+class _PatientHistory:
+    def __init__(self) -> None:
+        self.timestamps: list[datetime] = []
+        self.measurements: list[Measurement] = []
+        self.coverage = {source: _Coverage() for source in HistorySource}
+
+
+class HistoryIndex:
+    """The merged, sorted glucose history of each patient, and the periods it covers."""
+
+    def __init__(self, retention: timedelta | None = LOGBOOK_WINDOW) -> None:
+        """
+        Constructor for the HistoryIndex class.
+
+        :param retention: How long measurements are kept, counting back from each patient's newest measurement, or
+            None to keep every measurement.
+        :type retention: timedelta | None
+        """
+        self.retention = retention
+        self._patients: dict[UUID, _PatientHistory] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._patients)
+
+    def _patient(self, patient_id: UUID) -> _PatientHistory:
+        history = self._patients.get(patient_id)
+        if history is None:
+            history = self._patients[patient_id] = _PatientHistory()
+        return history
+
+    def merge(
+        self,
+        patient_id: UUID,
+        measurements: Iterable[Measurement],
+        source: HistorySource | str | None = None,
+        fetched_at: datetime | None = None,
+    ) -> int:
+        """Adds measurements to a patient's history, skipping any already present.
+
+        A measurement with the same factory timestamp as one in the index replaces it only if it has a trend and the
+        existing one does not, so the current reading is kept in preference to the same reading in the history.
+
+        :param patient_id: The patient the measurements belong to.
+        :param measurements: The measurements, in any order.
+        :param source: The endpoint the measurements were returned by, to record the period it covered.
+        :param fetched_at: When the endpoint was requested. Required if ``source`` is given.
+        :return: The number of measurements added.
+        """
+        added = 0
+        with self._lock:
+            history = self._patient(patient_id)
+            timestamps, stored = history.timestamps, history.measurements
+            for measurement in sorted(measurements, key=lambda m: m.factory_timestamp):
+                timestamp = measurement.factory_timestamp
+                if not timestamps or timestamp > timestamps[-1]:
+                    timestamps.append(timestamp)
+                    stored.append(measurement)
+                    added += 1
+                    continue
+                i = bisect_left(timestamps, timestamp)
+                if i < len(timestamps) and timestamps[i] == timestamp:
+                    if getattr(measurement, "trend", None) is not None and (
+                        getattr(stored[i], "trend", None) is None
+                    ):
+                        stored[i] = measurement
+                    continue
+                timestamps.insert(i, timestamp)
+                stored.insert(i, measurement)
+                added += 1
+            if source is not None:
+                if fetched_at is None:
+                    raise ValueError("fetched_at is required with source")
+                source, fetched_at = HistorySource(source), as_utc(fetched_at)
+                history.coverage[source].add(fetched_at - _WINDOWS[source], fetched_at)
+            if self.retention is not None and timestamps:
+                cutoff = timestamps[-1] - self.retention
+                pruned = bisect_left(timestamps, cutoff)
+                del timestamps[:pruned]
+                del stored[:pruned]
+                # The measurements before the cutoff are gone, so the index no longer covers that period.
+                for coverage in history.coverage.values():
+                    coverage.trim(cutoff)
+        return added
+
+    def query(
+        self, patient_id: UUID, start: datetime, end: datetime
+    ) -> list[Measurement]:
+        """Returns a patient's measurements with factory timestamps from ``start`` to ``end`` inclusive, oldest first.
+
+        Naive datetimes are taken to be UTC.
+        """
+        start, end = as_utc(start), as_utc(end)
+        with self._lock:
+            history = self._patients.get(patient_id)
+            if history is None:
+                return []
+            low = bisect_left(history.timestamps, start)
+            high = bisect_right(history.timestamps, end, lo=low)
+            return history.measurements[low:high]
+
+    def missing(
+        self,
+        patient_id: UUID,
+        start: datetime,
+        end: datetime,
+        now: datetime,
+        max_age: timedelta = DEFAULT_MAX_AGE,
+    ) -> list[HistorySource]:
+        """Returns the endpoints which must be requested to answer a query for a time range.
+
+        The graph endpoint is needed for the part of the range within the last 12 hours, and the logbook for the part
+        before that, back to 14 days ago. An endpoint is not needed if the index already covers its part of the range,
+        treating an endpoint requested within ``max_age`` as covering everything up to ``now``.
+        Naive datetimes are taken to be UTC.
+
+        :param patient_id: The patient to query.
+        :param start: The start of the range.
+        :param end: The end of the range. Times after ``now`` are ignored.
+        :param now: The current time.
+        :param max_age: How recently an endpoint must have been requested for its data to count as up to date.
+        """
+        start, end, now = as_utc(start), as_utc(end), as_utc(now)
+        end = min(end, now)
+        ranges = {
+            HistorySource.GRAPH: (max(start, now - GRAPH_WINDOW), end),
+            HistorySource.LOGBOOK: (
+                max(start, now - LOGBOOK_WINDOW),
+                min(end, now - GRAPH_WINDOW),
+            ),
+        }
+        with self._lock:
+            history = self._patient(patient_id)
+            missing = []
+            for source, (range_start, range_end) in ranges.items():
+                if range_start > range_end:
+                    continue
+                coverage = history.coverage[source]
+                if coverage.end is not None and now - coverage.end <= max_age:
+                    range_end = min(range_end, coverage.end)
+                if range_start > range_end:
+                    continue
+                if not coverage.covers(range_start, range_end):
+                    missing.append(source)
+            return missing
+
+    def clear(self, patient_id: UUID | None = None) -> None:
+        """Forgets the history of one patient, or of every patient."""
+        with self._lock:
+            if patient_id is None:
+                self._patients.clear()
+            else:
+                self._patients.pop(patient_id, None)
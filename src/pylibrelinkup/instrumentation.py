@@ -0,0 +1,85 @@
+"""
+Instrumentation hooks for observing the requests made by a PyLibreLinkUp client.
+
+Subclass :class:`RequestHooks`, override the callbacks you are interested in and pass an instance to the
+:class:`~pylibrelinkup.PyLibreLinkUp` constructor (or append it to ``client.hooks``). Every request made by the client
+produces a single :class:`RequestEvent`, which is passed to each callback as the request progresses.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any
+from uuid import UUID
+
+__all__ = ["PhaseTimings", "RequestEvent", "RequestHooks"]
+
+
+@dataclass
+class PhaseTimings:
+    """Durations, in seconds, of the phases of a single request.
+
+    A phase is ``None`` when it was not reached. Connections are reused between requests, so DNS resolution and
+    connecting are not measured separately: when a request opens a new connection, they are included in ``ttfb``.
+    """
+
+    ttfb: float | None = None
+    download: float | None = None
+    decode: float | None = None
+    validate: float | None = None
+
+    @property
+    def total(self) -> float:
+        """Returns the sum of all measured phases."""
+        return sum(
+            phase
+            for phase in (
+                self.ttfb,
+                self.download,
+                self.decode,
+                self.validate,
+            )
+            if phase is not None
+        )
+
+
+@dataclass
+class RequestEvent:
+    """RequestEvent class to store the details of a single API request.
+
+    ``endpoint`` is the last segment of the request path, e.g. ``graph`` or ``connections``. ``retry_count`` is the
+    number of times the request was sent again: a hedged second request, or a login repeated at the regional URL after
+    a redirect. ``cache_hit`` is True if the result was reused from the client's parse cache, in which case the body
+    was neither decoded nor validated and those timings are None.
+    """
+
+    endpoint: str
+    region: str
+    patient_id: UUID | None = None
+    method: str = "GET"
+    url: str = ""
+    status_code: int | None = None
+    bytes_received: int = 0
+    retry_count: int = 0
+    cache_hit: bool = False
+    timings: PhaseTimings = field(default_factory=PhaseTimings)
+    error: BaseException | None = None
+
+
+class RequestHooks:
+    """Base class for request instrumentation. All callbacks are no-ops by default."""
+
+    def on_request_start(self, event: RequestEvent) -> None:
+        """Called immediately before a request is sent."""
+
+    def on_response(self, event: RequestEvent) -> None:
+        """Called once the response body has been received, before it is decoded."""
+
+    def on_parsed(self, event: RequestEvent, result: Any) -> None:
+        """Called once the response has been decoded and validated. ``result`` is the validated model."""
+
+    def on_error(self, event: RequestEvent, error: BaseException) -> None:
+        """Called when a request fails at any phase. The error is re-raised afterwards."""
+
+    def on_cache_lookup(self, cache: str, hit: bool) -> None:
+        """Called whenever one of the client's caches is consulted."""
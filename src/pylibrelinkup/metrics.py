@@ -0,0 +1,276 @@
+"""
+In-process metrics for PyLibreLinkUp clients, exposed in the Prometheus text format.
+
+A :class:`MetricsRegistry` is a :class:`~pylibrelinkup.instrumentation.RequestHooks` implementation, so it is enabled
+by passing it to the client constructor. A single registry may be shared between any number of clients.
+
+.. code-block:: python
+
+    metrics = MetricsRegistry()
+    client = PyLibreLinkUp(email="...", password="...", hooks=[metrics])
+    metrics.serve(port=9464)  # optional, exposes /metrics
+    print(metrics.render())
+"""
+
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Sequence
+
+from .instrumentation import RequestEvent, RequestHooks
+
+__all__ = ["Counter", "Histogram", "MetricsRegistry"]
+
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+VALIDATION_BUCKETS: tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+)
+SIZE_BUCKETS: tuple[float, ...] = (
+    1_000,
+    5_000,
+    10_000,
+    25_000,
+    50_000,
+    100_000,
+    250_000,
+    1_000_000,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """A monotonically increasing counter, partitioned by label values."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        """Increments the counter for the given label values."""
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def value(self, *label_values: str) -> float:
+        """Returns the current value of the counter for the given label values."""
+        with self._lock:
+            return self._values.get(label_values, 0.0)
+
+    def collect(self) -> list[str]:
+        """Returns the exposition lines for this counter."""
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram:
+    """A histogram of observed values with cumulative buckets, partitioned by label values."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """Records an observation for the given label values."""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.setdefault(
+                label_values, [0] * (len(self.buckets) + 1)
+            )
+            counts[index] += 1
+            self._sums[label_values] = self._sums.get(label_values, 0.0) + value
+
+    def count(self, *label_values: str) -> int:
+        """Returns the number of observations recorded for the given label values."""
+        with self._lock:
+            return sum(self._counts.get(label_values, ()))
+
+    def collect(self) -> list[str]:
+        """Returns the exposition lines for this histogram."""
+        with self._lock:
+            items = sorted(
+                (key, list(counts), self._sums[key])
+                for key, counts in self._counts.items()
+            )
+        lines = []
+        bucket_labels = self.labels + ("le",)
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(bucket_labels, key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry(RequestHooks):
+    """Collects request metrics from one or more clients."""
+
+    def __init__(self, prefix: str = "pylibrelinkup") -> None:
+        self.requests = Counter(
+            f"{prefix}_requests_total",
+            "Requests made to the LibreLinkUp API.",
+            ("endpoint", "status", "region"),
+        )
+        self.rate_limited = Counter(
+            f"{prefix}_rate_limited_total",
+            "Requests rejected by the LibreLinkUp API with status 429.",
+            ("endpoint", "region"),
+        )
+        self.token_refreshes = Counter(
+            f"{prefix}_token_refreshes_total",
+            "Successful authentications.",
+            ("region",),
+        )
+        self.cache_lookups = Counter(
+            f"{prefix}_cache_lookups_total",
+            "Cache lookups made by the client.",
+            ("cache", "result"),
+        )
+        self.latency = Histogram(
+            f"{prefix}_request_duration_seconds",
+            "Time from sending a request to receiving the full response body.",
+            ("endpoint", "region"),
+            LATENCY_BUCKETS,
+        )
+        self.payload_size = Histogram(
+            f"{prefix}_response_size_bytes",
+            "Size of response bodies.",
+            ("endpoint", "region"),
+            SIZE_BUCKETS,
+        )
+        self.validation_time = Histogram(
+            f"{prefix}_validation_duration_seconds",
+            "Time spent decoding and validating response bodies.",
+            ("endpoint",),
+            VALIDATION_BUCKETS,
+        )
+        self.metrics: list[Counter | Histogram] = [
+            self.requests,
+            self.rate_limited,
+            self.token_refreshes,
+            self.cache_lookups,
+            self.latency,
+            self.payload_size,
+            self.validation_time,
+        ]
+
+    def on_response(self, event: RequestEvent) -> None:
+        status = str(event.status_code)
+        self.requests.inc(event.endpoint, status, event.region)
+        if event.status_code == 429:
+            self.rate_limited.inc(event.endpoint, event.region)
+        network_time = (event.timings.ttfb or 0.0) + (event.timings.download or 0.0)
+        self.latency.observe(network_time, event.endpoint, event.region)
+        self.payload_size.observe(event.bytes_received, event.endpoint, event.region)
+
+    def on_parsed(self, event: RequestEvent, result: Any) -> None:
+        # Results reused from the parse cache are counted by cache_lookups, and were not parsed at all.
+        if not event.cache_hit:
+            parse_time = (event.timings.decode or 0.0) + (event.timings.validate or 0.0)
+            self.validation_time.observe(parse_time, event.endpoint)
+        if event.endpoint == "login":
+            self.token_refreshes.inc(event.region)
+
+    def on_error(self, event: RequestEvent, error: BaseException) -> None:
+        if event.status_code is None:
+            # The request never produced a response, e.g. a connection error.
+            self.requests.inc(event.endpoint, "error", event.region)
+
+    def on_cache_lookup(self, cache: str, hit: bool) -> None:
+        self.cache_lookups.inc(cache, "hit" if hit else "miss")
+
+    def render(self) -> str:
+        """Returns a snapshot of all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int, addr: str = "") -> ThreadingHTTPServer:
+        """Serves the metrics over HTTP from a daemon thread.
+
+        :param port: The port to listen on. Use 0 to pick a free port.
+        :param addr: The address to bind to. Defaults to all interfaces.
+        :return: The running server. Call ``shutdown()`` on it to stop serving.
+        """
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        server = ThreadingHTTPServer((addr, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
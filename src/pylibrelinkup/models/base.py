@@ -10,4 +10,6 @@ class ConfigBaseModel(BaseModel):
         alias_generator=to_camel,
         populate_by_name=True,
         from_attributes=True,
+        # Build validators on first use rather than at import time, so unused models cost nothing at startup.
+        defer_build=True,
     )
@@ -108,6 +108,7 @@ class F(ConfigBaseModel):
 class L(ConfigBaseModel):
     """L class to store L data."""
 
+    on: bool = Field(default=True)
     th: int = Field(default=0)
     thmm: float = Field(default=0.0)
     d: int = Field(default=0)
@@ -118,6 +119,7 @@ class L(ConfigBaseModel):
 class H(ConfigBaseModel):
     """H class to store H data."""
 
+    on: bool = Field(default=True)
     th: int = Field(default=0)
     thmm: float = Field(default=0.0)
     d: int = Field(default=0)
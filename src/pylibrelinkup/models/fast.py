@@ -0,0 +1,144 @@
+"""
+Lightweight alternatives to the pydantic glucose measurement models, for retaining large amounts of history.
+
+The classes here have the same attribute names as :class:`~pylibrelinkup.models.data.GlucoseMeasurement` and
+:class:`~pylibrelinkup.models.data.GlucoseMeasurementWithTrend`, but are frozen ``__slots__`` dataclasses built directly
+from the decoded JSON. They carry no ``__dict__``, field-set tracking or validators, and share the ``Trend`` members and
+the UTC ``tzinfo`` between instances. Enable them with ``PyLibreLinkUp(..., fast_models=True)``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any, Self
+
+from ..exceptions import raise_for_response
+from .data import Trend
+
+__all__ = [
+    "FastGlucoseMeasurement",
+    "FastGlucoseMeasurementWithTrend",
+    "parse_graph_history",
+    "parse_graph_measurements",
+    "parse_logbook",
+    "parse_timestamp",
+]
+
+_TRENDS: dict[int, Trend] = {trend.value: trend for trend in Trend}
+
+
+def parse_timestamp(value: str, tzinfo: Any = None) -> datetime:
+    """Parses a LibreLinkUp timestamp, e.g. ``5/21/2022 1:38:50 PM``.
+
+    Equivalent to ``datetime.strptime(value, "%m/%d/%Y %I:%M:%S %p")``, but several times faster.
+    """
+    try:
+        date, time, meridiem = value.split(" ")
+        month, day, year = date.split("/")
+        hour, minute, second = time.split(":")
+        hour_value = int(hour)
+        if not 1 <= hour_value <= 12 or meridiem not in ("AM", "PM"):
+            raise ValueError
+        hour_value %= 12
+        if meridiem == "PM":
+            hour_value += 12
+        return datetime(
+            int(year),
+            int(month),
+            int(day),
+            hour_value,
+            int(minute),
+            int(second),
+            tzinfo=tzinfo,
+        )
+    except (AttributeError, ValueError) as exc:
+        raise ValueError(f"Invalid timestamp: {value!r}") from exc
+
+
+def _measurement_fields(data: dict) -> tuple:
+    """Returns the fields of :class:`FastGlucoseMeasurement`, in order, from a decoded API measurement object."""
+    return (
+        parse_timestamp(data["FactoryTimestamp"], UTC),
+        parse_timestamp(data["Timestamp"]),
+        data.get("type", 0),
+        data.get("ValueInMgPerDl", 0.0),
+        data.get("MeasurementColor", 0),
+        data.get("GlucoseUnits", 0),
+        data.get("Value", 0.0),
+        data["isHigh"],
+        data["isLow"],
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class FastGlucoseMeasurement:
+    """FastGlucoseMeasurement class to store glucose measurement data without pydantic overhead."""
+
+    factory_timestamp: datetime
+    timestamp: datetime
+    type: int = 0
+    value_in_mg_per_dl: float = 0.0
+    measurement_color: int = 0
+    glucose_units: int = 0
+    value: float = 0.0
+    is_high: bool = False
+    is_low: bool = False
+
+    def __str__(self):
+        return f"{self.timestamp}: {self.value}"
+
+    @classmethod
+    def from_dict(cls, data: dict) -> Self:
+        """Builds a measurement from a decoded API measurement object."""
+        return cls(*_measurement_fields(data))
+
+
+@dataclass(frozen=True, slots=True)
+class FastGlucoseMeasurementWithTrend(FastGlucoseMeasurement):
+    """FastGlucoseMeasurementWithTrend class to store glucose measurement data and the trend at that time."""
+
+    trend: Trend = Trend.STABLE
+
+    @classmethod
+    def from_dict(cls, data: dict) -> Self:
+        """Builds a measurement from a decoded API measurement object."""
+        return cls(
+            *_measurement_fields(data),
+            _TRENDS[data.get("TrendArrow", Trend.STABLE.value)],
+        )
+
+
+def parse_graph_history(response: Any) -> list[FastGlucoseMeasurement]:
+    """Returns the historical measurements from a decoded graph response."""
+    try:
+        return [
+            FastGlucoseMeasurement.from_dict(item)
+            for item in response["data"]["graphData"]
+        ]
+    except (KeyError, TypeError) as exc:
+        raise_for_response(response, exc)
+
+
+def parse_graph_measurements(response: Any) -> list[FastGlucoseMeasurement]:
+    """Returns the historical measurements and the current measurement, last, from a decoded graph response."""
+    try:
+        return [
+            *(
+                FastGlucoseMeasurement.from_dict(item)
+                for item in response["data"]["graphData"]
+            ),
+            FastGlucoseMeasurementWithTrend.from_dict(
+                response["data"]["connection"]["glucoseMeasurement"]
+            ),
+        ]
+    except (KeyError, TypeError) as exc:
+        raise_for_response(response, exc)
+
+
+def parse_logbook(response: Any) -> list[FastGlucoseMeasurement]:
+    """Returns the measurements from a decoded logbook response."""
+    try:
+        return [FastGlucoseMeasurement.from_dict(item) for item in response["data"]]
+    except (KeyError, TypeError) as exc:
+        raise_for_response(response, exc)
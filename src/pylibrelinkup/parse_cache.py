@@ -0,0 +1,131 @@
+"""
+Reusing parsed responses when the API returns the same data again.
+
+Polling a patient's graph every minute often returns exactly the same body as the previous poll. A client created
+with ``parse_cache=True`` keeps a fingerprint of the last body received from each endpoint for each patient, and
+returns the previously parsed result without decoding or validating when the fingerprint matches.
+
+When the body has changed, the parts of the graph response which rarely change (the active sensors, sensor, alarm
+rules and patient device) are compared with the previous response after decoding, and any part which is unchanged is
+reused instead of being validated again.
+
+Results are shared between calls while the data is unchanged, so they should not be modified.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Hashable, TypeVar
+
+__all__ = ["GRAPH_PARTS", "ParseCache", "fingerprint"]
+
+T = TypeVar("T")
+
+Path = tuple[str, ...]
+
+GRAPH_PARTS: tuple[tuple[Path, Path], ...] = (
+    (("data", "activeSensors"), ("data", "active_sensors")),
+    (("data", "connection", "sensor"), ("data", "connection", "sensor")),
+    (("data", "connection", "alarmRules"), ("data", "connection", "alarm_rules")),
+    (
+        ("data", "connection", "patientDevice"),
+        ("data", "connection", "patient_device"),
+    ),
+)
+"""The reusable parts of a graph response, as the path to each in the decoded JSON and in the parsed model."""
+
+
+def fingerprint(content: bytes) -> bytes:
+    """Returns a fingerprint of a response body."""
+    return hashlib.blake2b(content, digest_size=16).digest()
+
+
+def _get_item(data: Any, path: Path) -> Any:
+    for key in path:
+        if not isinstance(data, dict) or key not in data:
+            return None
+        data = data[key]
+    return data
+
+
+def _get_attribute(result: Any, path: Path) -> Any:
+    for name in path:
+        result = getattr(result, name, None)
+    return result
+
+
+@dataclass
+class _Entry:
+    fingerprint: bytes
+    result: Any
+    parts: dict[Path, tuple[Any, Any]] = field(default_factory=dict)
+
+
+class ParseCache:
+    """The last parsed response from each endpoint for each patient, keyed by a fingerprint of its body."""
+
+    def __init__(self, on_lookup: Callable[[str, bool], Any] | None = None) -> None:
+        """
+        Constructor for the ParseCache class.
+
+        :param on_lookup: Called with the cache key's endpoint name and whether the body was unchanged.
+        :type on_lookup: Callable[[str, bool], Any] | None
+        """
+        self.on_lookup = on_lookup
+        self._entries: dict[Hashable, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def parse(
+        self,
+        key: tuple[str, Hashable],
+        content: bytes,
+        decode: Callable[[], Any],
+        parse: Callable[[Any], T],
+        parts: tuple[tuple[Path, Path], ...] = (),
+    ) -> tuple[T, bool]:
+        """Returns the parsed result for a body, reusing the previous result if the body has not changed.
+
+        :param key: The endpoint name and patient the body was received for.
+        :param content: The response body.
+        :param decode: Decodes the body, if it has changed.
+        :param parse: Parses the decoded body.
+        :param parts: Parts of the decoded body which are reused from the previous result when they are unchanged.
+        :return: The result, and whether it was reused.
+        """
+        digest = fingerprint(content)
+        with self._lock:
+            entry = self._entries.get(key)
+        hit = entry is not None and entry.fingerprint == digest
+        if self.on_lookup is not None:
+            self.on_lookup(key[0], hit)
+        if hit:
+            return entry.result, True
+
+        data = decode()
+        raw_parts = {json_path: _get_item(data, json_path) for json_path, _ in parts}
+        if entry is not None:
+            for json_path, raw in raw_parts.items():
+                previous = entry.parts.get(json_path)
+                if raw is not None and previous is not None and previous[0] == raw:
+                    *parents, name = json_path
+                    _get_item(data, tuple(parents))[name] = previous[1]
+        result = parse(data)
+
+        new_entry = _Entry(digest, result)
+        for json_path, model_path in parts:
+            raw = raw_parts[json_path]
+            if raw is not None:
+                new_entry.parts[json_path] = (raw, _get_attribute(result, model_path))
+        with self._lock:
+            self._entries[key] = new_entry
+        return result, False
+
+    def clear(self) -> None:
+        """Forgets every cached response."""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,376 @@
+"""
+Sharding patients across many LibreLinkUp follower accounts.
+
+A :class:`ClientPool` holds one authenticated :class:`~pylibrelinkup.PyLibreLinkUp` client per account, each with its
+own token, region and :class:`~pylibrelinkup.ratelimit.TokenBucket`. Patient requests are routed to an account that
+follows the patient, preferring the account with the most rate budget left, and an account which is throttled with a
+429 is paused while its requests fail over to the other accounts following the same patient.
+
+.. code-block:: python
+
+    pool = ClientPool(
+        [PyLibreLinkUp(email=email, password=password) for email, password in accounts],
+        rate=0.5,
+        burst=5,
+    )
+    failed = [result for result in pool.authenticate_all(stagger=0.1) if not result.ok]
+    pool.refresh_index()
+    for client, patient in pool.poll_order():
+        client.latest(patient)
+"""
+
+from __future__ import annotations
+
+import contextvars
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Sequence, TypeVar
+from uuid import UUID
+
+from . import deadline as deadlines
+from .data_types import PatientIdentifier
+from .directory import normalise_name
+from .exceptions import (
+    CircuitOpenError,
+    DeadlineExceededError,
+    LLUAPIRateLimitError,
+    PatientNotFoundError,
+    RedirectError,
+)
+from .models.data import GlucoseMeasurement, GlucoseMeasurementWithTrend, Patient
+from .pylibrelinkup import PyLibreLinkUp
+from .ratelimit import TokenBucket
+
+__all__ = ["Account", "ClientPool", "LoginResult", "authenticate_all"]
+
+T = TypeVar("T")
+
+DEFAULT_RETRY_AFTER = 60.0
+"""Seconds an account is paused after a 429 response which did not include a usable Retry-After header."""
+
+
+@dataclass
+class LoginResult:
+    """LoginResult class to store the outcome of authenticating one client."""
+
+    client: PyLibreLinkUp
+    error: Exception | None = None
+    redirects: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """Returns True if the client authenticated successfully."""
+        return self.error is None
+
+    @property
+    def region(self) -> str:
+        """Returns the region the client ended up using, e.g. ``EU``."""
+        return self.client.region
+
+
+def _authenticate(
+    client: PyLibreLinkUp,
+    start_at: float,
+    rate_limiter: TokenBucket | None,
+    max_redirects: int,
+) -> LoginResult:
+    delay = start_at - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+    result = LoginResult(client=client)
+    started = time.monotonic()
+    try:
+        while True:
+            left = deadlines.check()
+            if rate_limiter is not None and not rate_limiter.acquire(timeout=left):
+                raise DeadlineExceededError(
+                    "Deadline exceeded waiting for the rate limiter"
+                )
+            try:
+                client.authenticate(retry_count=result.redirects)
+                break
+            except RedirectError as exc:
+                if result.redirects >= max_redirects:
+                    raise
+                result.redirects += 1
+                client.api_url = exc.region.value
+    except Exception as exc:
+        result.error = exc
+    result.elapsed = time.monotonic() - started
+    return result
+
+
+def authenticate_all(
+    clients: Sequence[PyLibreLinkUp],
+    max_concurrency: int = 8,
+    rate_limiter: TokenBucket | None = None,
+    stagger: float = 0.0,
+    max_redirects: int = 3,
+) -> list[LoginResult]:
+    """Authenticates many clients concurrently.
+
+    Regional redirects are followed by switching the client to the new region and retrying. Other errors, such as
+    :class:`~pylibrelinkup.exceptions.TermsOfUseError`, are captured in the result for that client rather than raised.
+    A :func:`~pylibrelinkup.deadline.deadline` set by the caller applies to every login, including redirects.
+
+    :param clients: The clients to authenticate.
+    :type clients: Sequence[PyLibreLinkUp]
+    :param max_concurrency: The maximum number of logins in flight at once.
+    :type max_concurrency: int
+    :param rate_limiter: A bucket shared by all login attempts, including those made after a redirect.
+    :type rate_limiter: TokenBucket | None
+    :param stagger: Seconds between the start of consecutive logins.
+    :type stagger: float
+    :param max_redirects: The maximum number of redirects to follow for each client.
+    :type max_redirects: int
+    :return: One result per client, in the same order as ``clients``.
+    :rtype: list[LoginResult]
+    """
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        # Each login runs in a copy of the caller's context, so that a deadline set by the caller applies to it.
+        futures = [
+            executor.submit(
+                contextvars.copy_context().run,
+                _authenticate,
+                client,
+                start + index * stagger,
+                rate_limiter,
+                max_redirects,
+            )
+            for index, client in enumerate(clients)
+        ]
+        return [future.result() for future in futures]
+
+
+@dataclass(eq=False)
+class Account:
+    """Account class to store a pooled client and its rate budget."""
+
+    client: PyLibreLinkUp
+    limiter: TokenBucket
+    patients: list[Patient] = field(default_factory=list)
+
+    @property
+    def name(self) -> str:
+        """Returns the email address of the account."""
+        return self.client.email
+
+    @property
+    def region(self) -> str:
+        """Returns the region of the account, e.g. ``EU``."""
+        return self.client.region
+
+
+class ClientPool:
+    """ClientPool class to route patient requests across many follower accounts."""
+
+    def __init__(
+        self,
+        clients: Iterable[PyLibreLinkUp] = (),
+        rate: float = 1.0,
+        burst: float = 5.0,
+    ) -> None:
+        """
+        Constructor for the ClientPool class.
+
+        :param clients: Clients to add to the pool.
+        :type clients: Iterable[PyLibreLinkUp]
+        :param rate: The default number of requests per second allowed for each account.
+        :type rate: float
+        :param burst: The default number of requests each account may make in a burst.
+        :type burst: float
+        """
+        self.rate = rate
+        self.burst = burst
+        self.accounts: list[Account] = []
+        self._owners: dict[UUID, list[Account]] = {}
+        self._by_name: dict[str, list[UUID]] = {}
+        self._indexed = False
+        self._lock = threading.Lock()
+        for client in clients:
+            self.add(client)
+
+    def add(
+        self,
+        client: PyLibreLinkUp,
+        rate: float | None = None,
+        burst: float | None = None,
+    ) -> Account:
+        """Adds a client to the pool.
+
+        The client's existing rate limiter is kept if it has one, otherwise it is given its own bucket.
+
+        :return: The account created for the client.
+        :rtype: Account
+        """
+        if client.rate_limiter is None:
+            client.rate_limiter = TokenBucket(
+                rate=rate or self.rate, burst=burst or self.burst
+            )
+        account = Account(client=client, limiter=client.rate_limiter)
+        with self._lock:
+            self.accounts.append(account)
+            self._indexed = False
+        return account
+
+    def authenticate_all(
+        self,
+        max_concurrency: int = 8,
+        rate_limiter: TokenBucket | None = None,
+        stagger: float = 0.0,
+        max_redirects: int = 3,
+    ) -> list[LoginResult]:
+        """Authenticates every account in the pool concurrently. See :func:`authenticate_all`."""
+        return authenticate_all(
+            [account.client for account in self.accounts],
+            max_concurrency=max_concurrency,
+            rate_limiter=rate_limiter,
+            stagger=stagger,
+            max_redirects=max_redirects,
+        )
+
+    def refresh_index(self) -> None:
+        """Fetches the patients followed by every account and rebuilds the patient to account index."""
+        owners: dict[UUID, list[Account]] = {}
+        by_name: dict[str, list[UUID]] = {}
+        for account in list(self.accounts):
+            account.patients = account.client.get_patients()
+            for patient in account.patients:
+                if patient.patient_id not in owners:
+                    name = normalise_name(f"{patient.first_name} {patient.last_name}")
+                    by_name.setdefault(name, []).append(patient.patient_id)
+                owners.setdefault(patient.patient_id, []).append(account)
+        with self._lock:
+            self._owners, self._by_name = owners, by_name
+            self._indexed = True
+
+    def _patient_id(self, patient_identifier: PatientIdentifier) -> UUID:
+        if isinstance(patient_identifier, Patient):
+            return patient_identifier.patient_id
+        if isinstance(patient_identifier, UUID):
+            return patient_identifier
+        if isinstance(patient_identifier, str):
+            try:
+                return UUID(patient_identifier)
+            except ValueError:
+                matches = self._by_name.get(normalise_name(patient_identifier), [])
+                if len(matches) > 1:
+                    raise ValueError(
+                        f"More than one patient is named {patient_identifier!r}"
+                    )
+                if matches:
+                    return matches[0]
+                raise PatientNotFoundError()
+        raise ValueError("Invalid patient_identifier")
+
+    def owners(self, patient_identifier: PatientIdentifier) -> list[Account]:
+        """Returns the accounts which follow a patient, most available rate budget first.
+
+        Accounts paused after a 429 come last, behind accounts which have merely used up their budget, as their
+        requests would wait for the whole pause rather than fail over.
+
+        :raises PatientNotFoundError: If no account in the pool follows the patient.
+        """
+        if not self._indexed:
+            self.refresh_index()
+        owners = self._owners.get(self._patient_id(patient_identifier))
+        if not owners:
+            raise PatientNotFoundError()
+        return sorted(
+            owners,
+            key=lambda account: (account.limiter.paused, -account.limiter.available),
+        )
+
+    def client_for(self, patient_identifier: PatientIdentifier) -> PyLibreLinkUp:
+        """Returns the client best placed to make the next request for a patient."""
+        return self.owners(patient_identifier)[0].client
+
+    def _route(
+        self,
+        patient_identifier: PatientIdentifier,
+        call: Callable[[PyLibreLinkUp, UUID], T],
+    ) -> T:
+        """Calls the API through the owners of a patient in turn, failing over when an account is throttled or its
+        region's circuit breaker is open."""
+        if not self._indexed:
+            self.refresh_index()
+        patient_id = self._patient_id(patient_identifier)
+        error: LLUAPIRateLimitError | CircuitOpenError | None = None
+        for account in self.owners(patient_id):
+            try:
+                return call(account.client, patient_id)
+            except LLUAPIRateLimitError as exc:
+                account.limiter.pause(exc.retry_after or DEFAULT_RETRY_AFTER)
+                error = exc
+            except CircuitOpenError as exc:
+                error = exc
+        assert error is not None
+        raise error
+
+    def graph(self, patient_identifier: PatientIdentifier) -> list[GlucoseMeasurement]:
+        """Requests the graph data for a patient through an account which follows them."""
+        return self._route(patient_identifier, PyLibreLinkUp.graph)
+
+    def latest(
+        self, patient_identifier: PatientIdentifier
+    ) -> GlucoseMeasurementWithTrend:
+        """Requests the latest measurement for a patient through an account which follows them."""
+        return self._route(patient_identifier, PyLibreLinkUp.latest)
+
+    def logbook(
+        self, patient_identifier: PatientIdentifier
+    ) -> list[GlucoseMeasurement]:
+        """Requests the logbook for a patient through an account which follows them."""
+        return self._route(patient_identifier, PyLibreLinkUp.logbook)
+
+    def assignments(self) -> dict[UUID, Account]:
+        """Assigns each patient to exactly one of the accounts following them, balancing the load.
+
+        Patients followed by fewer accounts are placed first. Each is given to the owner whose assigned polling load,
+        relative to its rate, is lowest.
+        """
+        if not self._indexed:
+            self.refresh_index()
+        load: dict[int, int] = {id(account): 0 for account in self.accounts}
+        assignments = {}
+        for patient_id, owners in sorted(
+            self._owners.items(), key=lambda item: len(item[1])
+        ):
+            account = min(
+                owners,
+                key=lambda owner: (load[id(owner)] + 1) / owner.limiter.rate,
+            )
+            load[id(account)] += 1
+            assignments[patient_id] = account
+        return assignments
+
+    def poll_order(self) -> list[tuple[PyLibreLinkUp, UUID]]:
+        """Returns one (client, patient id) pair per patient, interleaved across regions and accounts.
+
+        Consecutive requests go to different regions where possible, so that polling one region does not hold up the
+        others.
+        """
+        by_region: dict[str, dict[int, list[tuple[PyLibreLinkUp, UUID]]]] = {}
+        for patient_id, account in self.assignments().items():
+            by_account = by_region.setdefault(account.region, {})
+            by_account.setdefault(id(account), []).append((account.client, patient_id))
+        region_queues = [
+            [
+                pair
+                for round_ in itertools.zip_longest(*by_account.values())
+                for pair in round_
+                if pair is not None
+            ]
+            for by_account in by_region.values()
+        ]
+        return [
+            pair
+            for round_ in itertools.zip_longest(*region_queues)
+            for pair in round_
+            if pair is not None
+        ]
@@ -0,0 +1,230 @@
+"""
+Opt-in profiling of client calls, usually enabled through :meth:`pylibrelinkup.PyLibreLinkUp.profile`.
+
+.. code-block:: python
+
+    with client.profile() as profiler:
+        client.graph(patient)
+    print(profiler.report())
+
+Every request made inside the block is run under :mod:`cProfile` and, optionally, bracketed by :mod:`tracemalloc`
+snapshots. Results are grouped by endpoint, with the request phases recorded by the client (see
+:class:`~pylibrelinkup.instrumentation.PhaseTimings`) and the time spent in model validation and the timestamp field
+validators broken out. Only one request is profiled at a time; requests which start while
+another is being profiled (e.g. from other threads) are counted as skipped.
+
+Profiling never makes a request fail. From Python 3.12, only one :mod:`cProfile` profiler can be active in the process at
+a time, so a request which starts while another profiler is active (e.g. another client's profiler, or under
+``python -m cProfile``) is also counted as skipped. Also from Python 3.12, a profiler records the functions called by
+every thread while it is active, so the profile of a request can include work done by other threads at the same time.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import pstats
+import threading
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Any
+
+from .instrumentation import RequestEvent, RequestHooks
+
+__all__ = [
+    "PROFILED_FUNCTIONS",
+    "AllocationStat",
+    "ClientProfiler",
+    "EndpointProfile",
+    "FunctionStat",
+    "ProfileReport",
+]
+
+PHASES: tuple[str, ...] = ("ttfb", "download", "decode", "validate")
+
+PROFILED_FUNCTIONS: tuple[str, ...] = ("model_validate", "parse_timestamp")
+"""Functions whose cumulative time is reported alongside the request phases of each endpoint."""
+
+
+@dataclass(frozen=True)
+class FunctionStat:
+    """FunctionStat class to store the profile of a single function."""
+
+    function: str
+    calls: int
+    total_time: float
+    cumulative_time: float
+
+
+@dataclass(frozen=True)
+class AllocationStat:
+    """AllocationStat class to store the memory allocated by a single source line."""
+
+    location: str
+    size: int
+    count: int
+
+
+@dataclass
+class EndpointProfile:
+    """EndpointProfile class to store the profile of all calls made to one endpoint."""
+
+    endpoint: str
+    calls: int = 0
+    phases: dict[str, float] = field(default_factory=dict)
+    top_functions: list[FunctionStat] = field(default_factory=list)
+    top_allocations: list[AllocationStat] = field(default_factory=list)
+    stats: pstats.Stats | None = None
+
+
+@dataclass
+class ProfileReport:
+    """ProfileReport class to store the summary produced by a :class:`ClientProfiler`."""
+
+    endpoints: dict[str, EndpointProfile]
+    skipped: int = 0
+
+    def __str__(self) -> str:
+        out = io.StringIO()
+        for profile in self.endpoints.values():
+            out.write(f"== {profile.endpoint} ({profile.calls} calls)\n")
+            for phase, seconds in profile.phases.items():
+                out.write(f"  phase {phase:<20} {seconds * 1000:10.3f} ms\n")
+            for stat in profile.top_functions:
+                out.write(
+                    f"  {stat.cumulative_time * 1000:10.3f} ms cum "
+                    f"{stat.total_time * 1000:10.3f} ms own "
+                    f"{stat.calls:8d}x  {stat.function}\n"
+                )
+            for allocation in profile.top_allocations:
+                out.write(
+                    f"  {allocation.size / 1024:10.1f} KiB "
+                    f"{allocation.count:8d} blocks  {allocation.location}\n"
+                )
+        if self.skipped:
+            out.write(f"{self.skipped} concurrent requests were not profiled\n")
+        return out.getvalue()
+
+
+class ClientProfiler(RequestHooks):
+    """Profiles requests made by the clients it is registered with."""
+
+    def __init__(self, top: int = 10, trace_allocations: bool = True) -> None:
+        self.top = top
+        self.trace_allocations = trace_allocations
+        self.skipped = 0
+        self._profiles: dict[str, cProfile.Profile] = {}
+        self._calls: dict[str, int] = {}
+        self._phases: dict[str, dict[str, float]] = {}
+        self._allocations: dict[str, dict[str, list[int]]] = {}
+        self._active: RequestEvent | None = None
+        self._snapshot: tracemalloc.Snapshot | None = None
+        self._started_tracemalloc = False
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Starts allocation tracing if it is enabled and not already running."""
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def stop(self) -> None:
+        """Stops any profiling still in progress and allocation tracing if this profiler started it."""
+        if self._active is not None:
+            self._finish(self._active)
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def on_request_start(self, event: RequestEvent) -> None:
+        with self._lock:
+            if self._active is not None:
+                self.skipped += 1
+                return
+            self._active = event
+        profile = self._profiles.get(event.endpoint) or cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is active, which Python 3.12 and later do not allow.
+            with self._lock:
+                self.skipped += 1
+                self._active = None
+            return
+        self._profiles[event.endpoint] = profile
+        if self.trace_allocations and tracemalloc.is_tracing():
+            self._snapshot = tracemalloc.take_snapshot()
+
+    def on_parsed(self, event: RequestEvent, result: Any) -> None:
+        if self._active is event:
+            self._finish(event)
+
+    def on_error(self, event: RequestEvent, error: BaseException) -> None:
+        if self._active is event:
+            self._finish(event)
+
+    def _finish(self, event: RequestEvent) -> None:
+        self._profiles[event.endpoint].disable()
+        self._calls[event.endpoint] = self._calls.get(event.endpoint, 0) + 1
+        phases = self._phases.setdefault(event.endpoint, dict.fromkeys(PHASES, 0.0))
+        for phase in PHASES:
+            phases[phase] += getattr(event.timings, phase) or 0.0
+        if self._snapshot is not None and tracemalloc.is_tracing():
+            self._record_allocations(event.endpoint, tracemalloc.take_snapshot())
+        self._snapshot = None
+        with self._lock:
+            self._active = None
+
+    def _record_allocations(
+        self, endpoint: str, snapshot: tracemalloc.Snapshot
+    ) -> None:
+        assert self._snapshot is not None
+        ignored = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        differences = snapshot.filter_traces(ignored).compare_to(
+            self._snapshot.filter_traces(ignored), "lineno"
+        )
+        totals = self._allocations.setdefault(endpoint, {})
+        for difference in differences:
+            if difference.size_diff <= 0:
+                continue
+            frame = difference.traceback[0]
+            location = f"{frame.filename}:{frame.lineno}"
+            total = totals.setdefault(location, [0, 0])
+            total[0] += difference.size_diff
+            total[1] += max(difference.count_diff, 0)
+
+    def report(self) -> ProfileReport:
+        """Returns a summary of everything profiled so far, grouped by endpoint."""
+        endpoints = {}
+        for endpoint, profiler in self._profiles.items():
+            stats = pstats.Stats(profiler)
+            raw_stats: dict = stats.stats  # type: ignore[attr-defined]
+            phases = dict(self._phases.get(endpoint, {}))
+            phases.update(dict.fromkeys(PROFILED_FUNCTIONS, 0.0))
+            functions = []
+            for (filename, lineno, name), (_, calls, tt, ct, _) in raw_stats.items():
+                if name in PROFILED_FUNCTIONS:
+                    phases[name] += ct
+                functions.append(
+                    FunctionStat(f"{filename}:{lineno}({name})", calls, tt, ct)
+                )
+            functions.sort(key=lambda stat: stat.cumulative_time, reverse=True)
+            allocations = sorted(
+                (
+                    AllocationStat(location, size, count)
+                    for location, (size, count) in self._allocations.get(
+                        endpoint, {}
+                    ).items()
+                ),
+                key=lambda allocation: allocation.size,
+                reverse=True,
+            )
+            endpoints[endpoint] = EndpointProfile(
+                endpoint=endpoint,
+                calls=self._calls.get(endpoint, 0),
+                phases=phases,
+                top_functions=functions[: self.top],
+                top_allocations=allocations[: self.top],
+                stats=stats,
+            )
+        return ProfileReport(endpoints=endpoints, skipped=self.skipped)
@@ -0,0 +1,374 @@
+"""
+A caching HTTP proxy which shares one LibreLinkUp session between many internal clients.
+
+The proxy polls the API on a schedule and serves the most recent responses from memory, so the number of upstream
+requests does not depend on how many clients there are. Responses carry an ``ETag``; a client which sends it back in
+``If-None-Match`` gets an empty ``304 Not Modified`` until the data changes. The ``Age`` header gives the seconds since the
+data was last fetched from the API, which grows past ``refresh_interval`` while refreshes are failing.
+
+========================================  ===========================================================================
+Path                                      Response
+========================================  ===========================================================================
+``/patients``                             The followed patients.
+``/patients/{patient_id}/latest``         The most recent glucose measurement.
+``/patients/{patient_id}/graph``          The graph measurements (approximately the last 12 hours).
+``/patients/{patient_id}/logbook``        The logbook measurements (approximately the last 14 days).
+========================================  ===========================================================================
+
+Run it with the account credentials in the environment:
+
+.. code-block:: console
+
+    $ LIBRELINKUP_EMAIL=me@example.com LIBRELINKUP_PASSWORD=... python -m pylibrelinkup.proxy --region EU --port 8080
+
+The proxy has no authentication of its own, so it should only be exposed to a trusted network.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Sequence
+from uuid import UUID
+
+from .api_url import APIUrl
+from .pool import authenticate_all
+from .pylibrelinkup import PyLibreLinkUp
+from .ratelimit import TokenBucket
+
+__all__ = ["CachedResponse", "LibreLinkUpProxy", "main"]
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFRESH_INTERVAL = 60.0
+"""Seconds between refreshes of each patient's graph data."""
+
+DEFAULT_LOGBOOK_INTERVAL = 900.0
+"""Seconds between refreshes of each patient's logbook, and of the patient list."""
+
+DEFAULT_MAX_CONCURRENCY = 4
+"""The maximum number of patients refreshed at once."""
+
+_REASONS = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    503: "Service Unavailable",
+}
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """CachedResponse class to store a serialised response body and its entity tag.
+
+    ``updated`` is when the body last changed, and ``refreshed`` when it was last fetched from the API.
+    """
+
+    body: bytes
+    etag: str
+    updated: float
+    refreshed: float
+
+    @classmethod
+    def from_data(cls, data: Any) -> CachedResponse:
+        """Serialises data to JSON and derives the entity tag from the body."""
+        body = json.dumps(data, separators=(",", ":")).encode()
+        now = time.time()
+        return cls(
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            updated=now,
+            refreshed=now,
+        )
+
+
+def _dump(model: Any) -> Any:
+    return model.model_dump(mode="json", by_alias=True)
+
+
+class LibreLinkUpProxy:
+    """Serves cached LibreLinkUp data over HTTP, refreshing it from the API on a schedule."""
+
+    def __init__(
+        self,
+        client: PyLibreLinkUp,
+        refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+        logbook_interval: float = DEFAULT_LOGBOOK_INTERVAL,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> None:
+        """
+        Constructor for the LibreLinkUpProxy class.
+
+        :param client: An authenticated client. Its blocking requests are run in a worker thread.
+        :type client: PyLibreLinkUp
+        :param refresh_interval: Seconds between refreshes of each patient's graph data and latest measurement.
+        :type refresh_interval: float
+        :param logbook_interval: Seconds between refreshes of the patient list and each patient's logbook.
+        :type logbook_interval: float
+        :param max_concurrency: The maximum number of patients refreshed at once, so that refreshing a large account
+            does not send a burst of requests upstream.
+        :type max_concurrency: int
+        """
+        self.client = client
+        self.refresh_interval = refresh_interval
+        self.logbook_interval = logbook_interval
+        self.cache: dict[str, CachedResponse] = {}
+        self.patient_ids: set[UUID] = set()
+        self._patients_refreshed: float | None = None
+        self._logbooks_refreshed: dict[UUID, float] = {}
+        self._lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    def _store(self, path: str, data: Any) -> None:
+        response = CachedResponse.from_data(data)
+        cached = self.cache.get(path)
+        # Keep the original timestamp while the body is unchanged.
+        if cached is None or cached.etag != response.etag:
+            self.cache[path] = response
+        else:
+            self.cache[path] = replace(cached, refreshed=response.refreshed)
+
+    async def refresh_patients(self) -> None:
+        """Fetches the patient list."""
+        patients = await asyncio.to_thread(self.client.get_patients)
+        self.patient_ids = {patient.patient_id for patient in patients}
+        self._logbooks_refreshed = {
+            patient_id: refreshed
+            for patient_id, refreshed in self._logbooks_refreshed.items()
+            if patient_id in self.patient_ids
+        }
+        self._store("/patients", [_dump(patient) for patient in patients])
+
+    async def refresh_patient(self, patient_id: UUID, logbook: bool = False) -> None:
+        """Fetches the graph data, and optionally the logbook, for a patient."""
+        response = await asyncio.to_thread(self.client.graph_response, patient_id)
+        self._store(f"/patients/{patient_id}/latest", _dump(response.current))
+        self._store(
+            f"/patients/{patient_id}/graph",
+            [_dump(measurement) for measurement in response.history],
+        )
+        if logbook:
+            entries = await asyncio.to_thread(self.client.logbook, patient_id)
+            self._store(
+                f"/patients/{patient_id}/logbook",
+                [_dump(entry) for entry in entries],
+            )
+            self._logbooks_refreshed[patient_id] = time.monotonic()
+
+    def _due(self, refreshed: float | None, now: float) -> bool:
+        return refreshed is None or now - refreshed >= self.logbook_interval
+
+    async def _refresh_patient_slot(self, patient_id: UUID, logbook: bool) -> None:
+        async with self._slots:
+            await self.refresh_patient(patient_id, logbook)
+
+    async def refresh(self) -> None:
+        """Refreshes every patient's graph data, and the patient list and each patient's logbook when they are due.
+
+        At most ``max_concurrency`` patients are refreshed at once. A failure for one patient does not stop the others
+        from being refreshed, and only that patient's logbook is requested again at the next refresh. Failures are logged, and the last good data keeps being served.
+        """
+        async with self._lock:
+            now = time.monotonic()
+            if not self.patient_ids or self._due(self._patients_refreshed, now):
+                try:
+                    await self.refresh_patients()
+                    self._patients_refreshed = now
+                except Exception:
+                    logger.exception("Failed to refresh the patient list")
+            patient_ids = sorted(self.patient_ids)
+            results = await asyncio.gather(
+                *(
+                    self._refresh_patient_slot(
+                        patient_id,
+                        logbook=self._due(
+                            self._logbooks_refreshed.get(patient_id), now
+                        ),
+                    )
+                    for patient_id in patient_ids
+                ),
+                return_exceptions=True,
+            )
+            for patient_id, result in zip(patient_ids, results):
+                if isinstance(result, Exception):
+                    logger.error(
+                        "Failed to refresh patient %s",
+                        patient_id,
+                        exc_info=result,
+                    )
+
+    async def run_refresh(self) -> None:
+        """Refreshes the cache every ``refresh_interval`` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception:
+                # Keep serving the last good data; the next refresh will try again.
+                logger.exception("Failed to refresh the cache")
+
+    def respond(
+        self, method: str, path: str, headers: dict[str, str]
+    ) -> tuple[int, dict[str, str], bytes]:
+        """Returns the status, headers and body of the response to a request.
+
+        :param method: The request method.
+        :param path: The request path. Any query string is ignored.
+        :param headers: The request headers, with lower case names.
+        """
+        if method not in ("GET", "HEAD"):
+            return 405, {"Allow": "GET, HEAD"}, b""
+        key = self._cache_key(path)
+        if key is None:
+            return 404, {}, b""
+        cached = self.cache.get(key)
+        if cached is None:
+            return 503, {"Retry-After": str(int(self.refresh_interval))}, b""
+        response_headers = {
+            "Content-Type": "application/json",
+            "ETag": cached.etag,
+            "Cache-Control": f"max-age={int(self.refresh_interval)}",
+            "Last-Modified": time.strftime(
+                "%a, %d %b %Y %H:%M:%S GMT", time.gmtime(cached.updated)
+            ),
+            "Age": str(max(0, int(time.time() - cached.refreshed))),
+        }
+        if_none_match = headers.get("if-none-match", "")
+        if cached.etag in {tag.strip() for tag in if_none_match.split(",")}:
+            return 304, response_headers, b""
+        return 200, response_headers, b"" if method == "HEAD" else cached.body
+
+    def _cache_key(self, path: str) -> str | None:
+        """Returns the cache key for a request path, or None if it is not a path the proxy serves."""
+        path = path.split("?", 1)[0].rstrip("/")
+        if path == "/patients":
+            return path
+        parts = path.split("/")
+        if len(parts) != 4 or parts[1] != "patients":
+            return None
+        if parts[3] not in ("latest", "graph", "logbook"):
+            return None
+        try:
+            patient_id = UUID(parts[2])
+        except ValueError:
+            return None
+        if patient_id not in self.patient_ids:
+            return None
+        return f"/patients/{patient_id}/{parts[3]}"
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Handles HTTP/1.1 requests on a connection until the client closes it.
+
+        A malformed request line is answered with ``400 Bad Request`` and the connection is closed.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._write(writer, 400, {}, b"", keep_alive=False)
+                    break
+                headers = {}
+                while line := (await reader.readline()).strip():
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                status, response_headers, body = self.respond(method, path, headers)
+                keep_alive = version == "HTTP/1.1" and (
+                    headers.get("connection", "").lower() != "close"
+                )
+                await self._write(writer, status, response_headers, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ValueError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _write(
+        writer: asyncio.StreamWriter,
+        status: int,
+        headers: dict[str, str],
+        body: bytes,
+        keep_alive: bool,
+    ) -> None:
+        headers["Content-Length"] = str(len(body))
+        headers["Connection"] = "keep-alive" if keep_alive else "close"
+        head = f"HTTP/1.1 {status} {_REASONS[status]}\r\n" + "".join(
+            f"{name}: {value}\r\n" for name, value in headers.items()
+        )
+        writer.write(head.encode("latin-1") + b"\r\n" + body)
+        await writer.drain()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8080) -> None:
+        """Fills the cache, then serves requests and refreshes the cache until cancelled."""
+        await self.refresh()
+        server = await asyncio.start_server(self.handle, host, port)
+        refresher = asyncio.create_task(self.run_refresh())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            refresher.cancel()
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Runs the proxy. Credentials are read from ``LIBRELINKUP_EMAIL`` and ``LIBRELINKUP_PASSWORD``."""
+    parser = argparse.ArgumentParser(
+        prog="python -m pylibrelinkup.proxy",
+        description="Serve cached LibreLinkUp data over HTTP.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--region", default="US", choices=[url.name for url in APIUrl])
+    parser.add_argument(
+        "--refresh-interval", type=float, default=DEFAULT_REFRESH_INTERVAL
+    )
+    parser.add_argument(
+        "--logbook-interval", type=float, default=DEFAULT_LOGBOOK_INTERVAL
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=None,
+        help="maximum upstream requests per second",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        email = os.environ["LIBRELINKUP_EMAIL"]
+        password = os.environ["LIBRELINKUP_PASSWORD"]
+    except KeyError as exc:
+        parser.error(f"{exc.args[0]} must be set")
+    client = PyLibreLinkUp(
+        email=email,
+        password=password,
+        api_url=APIUrl[args.region],
+        rate_limiter=TokenBucket(args.rate, burst=5) if args.rate else None,
+    )
+    [login] = authenticate_all([client])
+    if not login.ok:
+        parser.exit(1, f"Login failed: {login.error!r}\n")
+    proxy = LibreLinkUpProxy(client, args.refresh_interval, args.logbook_interval)
+    try:
+        asyncio.run(proxy.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
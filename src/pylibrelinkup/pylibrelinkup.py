@@ -7,31 +7,77 @@ In order to authenticate, you will need to sign up for an account at https://www
 from __future__ import annotations
 
 import hashlib
+import json
+import sys
+import threading
+import time
 import warnings
+from contextlib import contextmanager
+from datetime import UTC, datetime, timedelta
+from types import MappingProxyType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ContextManager,
+    Iterable,
+    Iterator,
+    Mapping,
+    NamedTuple,
+    TypeVar,
+)
 from uuid import UUID
 
-import requests
-from pydantic import ValidationError
-from requests import HTTPError
+from pydantic import BaseModel, ValidationError
 
-from . import LLUAPIRateLimitError
+from . import deadline as deadlines
 from .api_url import APIUrl
 from .data_types import PatientIdentifier
 from .decorators import authenticated
+from .directory import PatientDirectory
 from .exceptions import (
     AuthenticationError,
+    DeadlineExceededError,
     EmailVerificationError,
+    LLUAPIRateLimitError,
+    LLUAPITimeoutError,
     PrivacyPolicyError,
     RedirectError,
     TermsOfUseError,
 )
+from .history import DEFAULT_MAX_AGE, HistoryIndex, HistorySource
+from .instrumentation import RequestEvent, RequestHooks
 from .models.connection import GraphResponse, LogbookResponse
 from .models.data import GlucoseMeasurement, GlucoseMeasurementWithTrend, Patient
-from .models.login import LoginArgs, LoginResponse
+from .models.fast import (
+    FastGlucoseMeasurement,
+    parse_graph_history,
+    parse_graph_measurements,
+    parse_logbook,
+)
+from .parse_cache import GRAPH_PARTS, ParseCache
+from .ratelimit import TokenBucket
 from .utilities import coerce_patient_id
 
+if TYPE_CHECKING:
+    from .circuit import CircuitBreakers
+    from .hedging import HedgingPolicy
+    from .models.login import LoginArgs
+    from .profiling import ClientProfiler
+    from .subscriptions import Subscription, SubscriptionHub
+    from .transport import Transport, TransportResponse
+
 __all__ = ["PyLibreLinkUp"]
 
+ModelT = TypeVar("ModelT", bound=BaseModel)
+ResultT = TypeVar("ResultT")
+
+DEFAULT_CONNECT_TIMEOUT = 10.0
+"""Seconds to wait for a connection to the API."""
+
+DEFAULT_READ_TIMEOUT = 30.0
+"""Seconds to wait for the API to send data."""
+
 
 HEADERS: dict[str, str] = {
     "accept-encoding": "gzip",
@@ -43,15 +89,86 @@ HEADERS: dict[str, str] = {
 }
 
 
+class _Auth(NamedTuple):
+    """An immutable snapshot of the login state and the headers sent with it."""
+
+    token: str | None
+    account_id_hash: str | None
+    headers: Mapping[str, str]
+
+
+def _make_auth(token: str | None, account_id_hash: str | None) -> _Auth:
+    headers = dict(HEADERS)
+    if token:
+        headers["authorization"] = "Bearer " + token
+    if account_id_hash:
+        headers["account-id"] = account_id_hash
+    return _Auth(token, account_id_hash, MappingProxyType(headers))
+
+
+class _PatientURLs(NamedTuple):
+    graph: str
+    logbook: str
+
+
+def _is_transport_failure(exc: Exception) -> bool:
+    """Returns True if an error means the API could not be reached or did not respond in time.
+
+    Running out of the caller's own deadline says nothing about the API, so it is not a failure.
+    """
+    if isinstance(exc, DeadlineExceededError):
+        return False
+    if isinstance(exc, (LLUAPITimeoutError, ConnectionError)):
+        return True
+    # requests is only imported once a request has been made, so if it is not loaded the error cannot be from it.
+    requests = sys.modules.get("requests")
+    return requests is not None and isinstance(exc, requests.ConnectionError)
+
+
+def _endpoint_label(endpoint: str) -> str:
+    """Returns the label events use for an endpoint name or URL: the last segment of its path, e.g. ``connections``
+    for ``/llu/connections``, so that every request to an endpoint is reported under the same name.
+    """
+    return endpoint.rstrip("/").rsplit("/", 1)[-1]
+
+
+def _count_retry(event: RequestEvent) -> None:
+    event.retry_count += 1
+
+
+def _parse_patients(data: dict) -> list[Patient]:
+    return [Patient.model_validate(patient) for patient in data["data"]]
+
+
 class PyLibreLinkUp:
-    """PyLibreLinkUp class to request data from the LibreLinkUp API."""
+    """PyLibreLinkUp class to request data from the LibreLinkUp API.
+
+    A client may be shared between threads. The login state and request headers are kept in an immutable snapshot
+    which :meth:`authenticate` replaces in one step, so a request never sends the token of one login with the account
+    id of another.
+    """
 
     email: str
     password: str
-    token: str | None
-    account_id_hash: str | None
 
-    def __init__(self, email: str, password: str, api_url: APIUrl = APIUrl.US) -> None:
+    hooks: list[RequestHooks]
+
+    def __init__(
+        self,
+        email: str,
+        password: str,
+        api_url: APIUrl = APIUrl.US,
+        hooks: Iterable[RequestHooks] | None = None,
+        fast_models: bool = False,
+        patient_directory_ttl: float | None = None,
+        rate_limiter: TokenBucket | None = None,
+        connect_timeout: float | None = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float | None = DEFAULT_READ_TIMEOUT,
+        hedging: HedgingPolicy | None = None,
+        circuit_breakers: CircuitBreakers | None = None,
+        transport: Transport | None = None,
+        parse_cache: bool = False,
+    ) -> None:
         """
         Constructor for the PyLibreLinkUp class.
 
@@ -61,37 +178,352 @@ class PyLibreLinkUp:
         :type password: str
         :param api_url: The regional API URL to use. Defaults to US.
         :type api_url: APIUrl
+        :param hooks: Instrumentation hooks which are notified of every request made by the client.
+        :type hooks: Iterable[RequestHooks] | None
+        :param fast_models: Return lightweight :class:`~pylibrelinkup.models.fast.FastGlucoseMeasurement` objects
+            from graph and logbook instead of pydantic models. Useful when retaining large amounts of history.
+        :type fast_models: bool
+        :param patient_directory_ttl: If set, keep a directory of followed patients for this many seconds, so that
+            patients can be identified by name or connection id without fetching the patient list on every call.
+        :type patient_directory_ttl: float | None
+        :param rate_limiter: If set, every request waits for a token from this bucket before it is sent.
+        :type rate_limiter: TokenBucket | None
+        :param connect_timeout: Seconds to wait for a connection to the API, or None to wait indefinitely.
+        :type connect_timeout: float | None
+        :param read_timeout: Seconds to wait for the API to send data, or None to wait indefinitely.
+        :type read_timeout: float | None
+        :param hedging: If set, GET requests which are slow to complete are sent a second time, as decided by this
+            policy, and the first response is used.
+        :type hedging: HedgingPolicy | None
+        :param circuit_breakers: If set, requests to an API URL which keeps failing are stopped for a while and raise
+            :class:`~pylibrelinkup.exceptions.CircuitOpenError` instead. May be shared between clients.
+        :type circuit_breakers: CircuitBreakers | None
+        :param transport: Sends the client's HTTP requests. Defaults to a
+            :class:`~pylibrelinkup.transport.RequestsTransport`.
+        :type transport: Transport | None
+        :param parse_cache: Reuse the previously parsed graph or logbook data for a patient when the API returns the
+            same response body again, skipping decoding and validation. Results are then shared between calls and
+            should not be modified. See :mod:`pylibrelinkup.parse_cache`.
+        :type parse_cache: bool
         :return: None
         """
-        self.login_args: LoginArgs = LoginArgs(email=email, password=password)
         self.email = email or ""
         self.password = password or ""
-        self.token = None
-        self.account_id_hash = None
-        self.api_url: str = api_url.value
-
-    def _call_api(self, url: str) -> dict:
-        """Calls the LibreLinkUp API and returns the response
+        self._lock = threading.Lock()
+        self._auth = _make_auth(None, None)
+        self._endpoints: tuple[str, dict[UUID, _PatientURLs]] = (api_url.value, {})
+        self.hooks = list(hooks or [])
+        self.fast_models = fast_models
+        self.rate_limiter = rate_limiter
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.hedging = hedging
+        self.circuit_breakers = circuit_breakers
+        self._transport = transport
+        self.patient_directory: PatientDirectory | None = None
+        self._subscription_hub: SubscriptionHub | None = None
+        self.history_index = HistoryIndex()
+        self.parse_cache: ParseCache | None = None
+        if parse_cache:
+            self.parse_cache = ParseCache(
+                on_lookup=lambda name, hit: self._emit("on_cache_lookup", name, hit)
+            )
+        if patient_directory_ttl is not None:
+            self.patient_directory = PatientDirectory(
+                self._fetch_patients,
+                ttl=patient_directory_ttl,
+                on_lookup=lambda hit: self._emit("on_cache_lookup", "patients", hit),
+            )
+
+    @property
+    def api_url(self) -> str:
+        """Returns the regional API URL the client sends requests to."""
+        return self._endpoints[0]
+
+    @api_url.setter
+    def api_url(self, api_url: str) -> None:
+        with self._lock:
+            self._endpoints = (api_url, {})
+
+    @property
+    def token(self) -> str | None:
+        """Returns the authentication token, or None if the client has not logged in."""
+        return self._auth.token
+
+    @token.setter
+    def token(self, token: str | None) -> None:
+        with self._lock:
+            self._auth = _make_auth(token, self._auth.account_id_hash)
+
+    @property
+    def account_id_hash(self) -> str | None:
+        """Returns the hashed account id sent with each request, or None if the client has not logged in."""
+        return self._auth.account_id_hash
+
+    @account_id_hash.setter
+    def account_id_hash(self, account_id_hash: str | None) -> None:
+        with self._lock:
+            self._auth = _make_auth(self._auth.token, account_id_hash)
+
+    @property
+    def transport(self) -> Transport:
+        """Returns the transport which sends the client's requests, creating the default one if needed."""
+        if self._transport is None:
+            # requests is only imported once the client makes its first request.
+            from .transport import RequestsTransport
+
+            with self._lock:
+                if self._transport is None:
+                    self._transport = RequestsTransport()
+        return self._transport
+
+    @transport.setter
+    def transport(self, transport: Transport) -> None:
+        self._transport = transport
+
+    @property
+    def login_args(self) -> LoginArgs:
+        """Returns the credentials sent to the login endpoint."""
+        # The login models are only needed by authenticate, so they are not imported with the client.
+        from .models.login import LoginArgs
+
+        return LoginArgs(email=self.email, password=self.password)
+
+    @property
+    def region(self) -> str:
+        """Returns the name of the region the client is currently using, e.g. ``EU``."""
+        try:
+            return APIUrl(self.api_url).name
+        except ValueError:
+            return self.api_url
+
+    @contextmanager
+    def profile(
+        self, top: int = 10, trace_allocations: bool = True
+    ) -> Iterator[ClientProfiler]:
+        """Profiles every request made by the client inside the ``with`` block.
+
+        :param top: The number of functions and allocation sites to include in the report for each endpoint.
+        :type top: int
+        :param trace_allocations: Whether to record tracemalloc allocation snapshots around each request.
+        :type trace_allocations: bool
+        :return: The profiler. Call its ``report()`` method once the block has exited.
+        :rtype: ClientProfiler
+        """
+        from .profiling import ClientProfiler
 
-        :type url: str
-        :rtype: object
+        profiler = ClientProfiler(top=top, trace_allocations=trace_allocations)
+        profiler.start()
+        self.hooks.append(profiler)
+        try:
+            yield profiler
+        finally:
+            self.hooks.remove(profiler)
+            profiler.stop()
+
+    def _emit(self, callback: str, *args: Any) -> None:
+        """Calls the named callback on every registered hook."""
+        # Iterate over a copy, as another thread may be adding or removing a hook, e.g. in profile().
+        for hook in tuple(self.hooks):
+            getattr(hook, callback)(*args)
+
+    @contextmanager
+    def _trace(
+        self, endpoint: str, patient_id: UUID | None = None
+    ) -> Iterator[RequestEvent]:
+        """Creates the event for a request, notifying hooks of any error raised while handling it."""
+        event = RequestEvent(
+            endpoint=_endpoint_label(endpoint),
+            region=self.region,
+            patient_id=patient_id,
+        )
+        try:
+            yield event
+        except Exception as exc:
+            event.error = exc
+            self._emit("on_error", event, exc)
+            raise
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        event: RequestEvent,
+        json_body: dict | None = None,
+        hedge: bool = False,
+    ) -> TransportResponse:
+        """Sends a request and reads the response body, recording the network phases on the event.
+
+        If ``hedge`` is True and the client has a hedging policy, a slow request is sent a second time.
+
+        :raises CircuitOpenError: If the client has circuit breakers and the breaker for the API URL is open.
         """
-        r = requests.get(url=url, headers=self._get_headers())
+        breaker = None
+        if self.circuit_breakers is not None:
+            breaker = self.circuit_breakers.get(self.api_url)
+            breaker.before_call()
+        sent = False
         try:
-            r.raise_for_status()
-        except HTTPError as e:
-            if e.response.status_code == 429:
-                retry_after = e.response.headers.get("Retry-After", "Unknown")
-                raise LLUAPIRateLimitError(
-                    response_code=e.response.status_code,
-                    message=f"Too many requests. Please try again later.",
-                    retry_after=int(retry_after) if retry_after.isdigit() else None,
+            left = deadlines.check()
+            if self.rate_limiter is not None and not self.rate_limiter.acquire(
+                timeout=left
+            ):
+                raise DeadlineExceededError(
+                    "Deadline exceeded waiting for the rate limiter"
                 )
+            event.method = method
+            event.url = url
+            self._emit("on_request_start", event)
+            sent = True
+            if hedge and self.hedging is not None:
+                r, ttfb, download = self.hedging.run(
+                    self.api_url,
+                    lambda: self._fetch(method, url, json_body),
+                    may_hedge=lambda: (
+                        self.rate_limiter is None or self.rate_limiter.try_acquire()
+                    ),
+                    discard=lambda result: result[0].close(),
+                    on_hedge=lambda: _count_retry(event),
+                )
+            else:
+                r, ttfb, download = self._fetch(method, url, json_body)
+        except Exception as exc:
+            if breaker is not None:
+                if sent and _is_transport_failure(exc):
+                    breaker.record_failure()
+                else:
+                    breaker.release()
+            raise
+        if breaker is not None:
+            if r.status_code >= 500:
+                breaker.record_failure()
             else:
-                raise
-        data = r.json()
+                breaker.record_success(ttfb + download)
+        event.timings.ttfb = ttfb
+        event.timings.download = download
+        event.status_code = r.status_code
+        event.bytes_received = len(r.content)
+        self._emit("on_response", event)
+        return r
+
+    def _fetch(
+        self, method: str, url: str, json_body: dict | None = None
+    ) -> tuple[TransportResponse, float, float]:
+        """Makes a request through the transport and reads the whole response body.
+
+        :return: The response, and the seconds taken to receive its headers and then its body.
+        """
+        timeout = self._timeout(deadlines.check())
+        try:
+            r = self.transport.request(
+                method, url, self._get_headers(), json_body, timeout
+            )
+        except LLUAPITimeoutError as exc:
+            # A timeout shortened to fit the deadline means the deadline ran out, not the API's time to respond.
+            if timeout != self._timeout(None):
+                raise DeadlineExceededError(str(exc)) from exc
+            raise
+        if self.hedging is not None:
+            self.hedging.record(self.api_url, r.ttfb + r.download)
+        return r, r.ttfb, r.download
+
+    def _timeout(self, left: float | None) -> tuple[float | None, float | None]:
+        """Returns the connect and read timeouts for a request, shortened to fit the time left before the deadline."""
+        connect, read = self.connect_timeout, self.read_timeout
+        if left is not None:
+            connect = left if connect is None else min(connect, left)
+            read = left if read is None else min(read, left)
+        return connect, read
+
+    def deadline(self, seconds: float) -> ContextManager[float]:
+        """Limits the total time of the calls made inside a ``with`` block, including waiting for the rate limiter.
+
+        The deadline is shared by every client used in the block. See :mod:`pylibrelinkup.deadline`.
+
+        :param seconds: The time allowed, from now.
+        :type seconds: float
+        :raises DeadlineExceededError: From the call that is in progress, or about to start, when the deadline passes.
+        """
+        return deadlines.deadline(seconds)
+
+    @staticmethod
+    def _decode(r: TransportResponse, event: RequestEvent) -> dict:
+        """Decodes the JSON body of a response, recording the decode time on the event."""
+        started = time.perf_counter()
+        data = json.loads(r.content)
+        event.timings.decode = time.perf_counter() - started
         return data
 
+    def _parse(
+        self, parser: Callable[[Any], ResultT], data: Any, event: RequestEvent
+    ) -> ResultT:
+        """Parses decoded data, recording the validation time on the event."""
+        started = time.perf_counter()
+        result = parser(data)
+        event.timings.validate = time.perf_counter() - started
+        self._emit("on_parsed", event, result)
+        return result
+
+    def _validate(self, model: type[ModelT], data: dict, event: RequestEvent) -> ModelT:
+        """Validates decoded data against a model, recording the validation time on the event."""
+        return self._parse(model.model_validate, data, event)
+
+    def _call_api(self, url: str, event: RequestEvent | None = None) -> dict:
+        """Calls the LibreLinkUp API and returns the response
+
+        :type url: str
+        :param event: The event to record the request on. One is created if not provided.
+        :type event: RequestEvent | None
+        :rtype: object
+        """
+        if event is None:
+            event = RequestEvent(endpoint=_endpoint_label(url), region=self.region)
+        return self._decode(self._get(url, event), event)
+
+    def _get(self, url: str, event: RequestEvent) -> TransportResponse:
+        """Sends a GET request to the LibreLinkUp API and returns the response, raising for error statuses."""
+        r = self._send("GET", url, event, hedge=True)
+        if r.status_code == 429:
+            retry_after = r.headers.get("retry-after", "Unknown")
+            raise LLUAPIRateLimitError(
+                response_code=r.status_code,
+                message=f"Too many requests. Please try again later.",
+                retry_after=int(retry_after) if retry_after.isdigit() else None,
+            )
+        r.raise_for_status()
+        return r
+
+    def _get_patient_data(
+        self,
+        endpoint: str,
+        patient_id: UUID,
+        url: str,
+        event: RequestEvent,
+        parser: Callable[[Any], ResultT],
+        parts: tuple = (),
+    ) -> ResultT:
+        """Requests and parses patient data, reusing the previous result if the client has a parse cache and the
+        response body is unchanged.
+
+        :param endpoint: The name the result is cached under, which must be distinct for each parser.
+        :param parts: Parts of the response reused from the previous result when unchanged. See
+            :mod:`pylibrelinkup.parse_cache`.
+        """
+        if self.parse_cache is None:
+            return self._parse(parser, self._call_api(url, event), event)
+        r = self._get(url, event)
+        result, hit = self.parse_cache.parse(
+            (endpoint, patient_id),
+            r.content,
+            decode=lambda: self._decode(r, event),
+            parse=lambda data: self._parse(parser, data, event),
+            parts=parts,
+        )
+        if hit:
+            event.cache_hit = True
+            self._emit("on_parsed", event, result)
+        return result
+
     def _set_token(self, token: str):
         """Saves the token for future requests."""
         self.token = token
@@ -100,65 +532,78 @@ class PyLibreLinkUp:
         """Saves the account_id_hash for future requests."""
         self.account_id_hash = hashlib.sha256(account_id.encode()).hexdigest()
 
-    def _get_graph_data_json(self, patient_id: UUID) -> dict:
-        """Requests and returns patient graph data
-
-        :param patient_id: UUID
-        :return:
-        """
-        return self._call_api(url=f"{self.api_url}/llu/connections/{patient_id}/graph")
-
-    def _get_headers(self) -> dict:
-        """Returns the headers for the request."""
-        headers = HEADERS.copy()
-        if self.token:
-            headers.update({"authorization": "Bearer " + self.token})
-        if self.account_id_hash:
-            headers.update({"account-id": self.account_id_hash})
-        return headers
-
-    def _get_logbook_json(self, patient_id: UUID) -> dict:
-        """Requests and returns patient logbook data
-
-        :param patient_id: UUID
-        :return:
-        """
-        return self._call_api(
-            url=f"{self.api_url}/llu/connections/{patient_id}/logbook"
-        )
-
-    def authenticate(self) -> None:
+    def _set_credentials(self, token: str, account_id: str):
+        """Saves the token and account_id_hash for future requests, replacing both at once."""
+        account_id_hash = hashlib.sha256(account_id.encode()).hexdigest()
+        with self._lock:
+            self._auth = _make_auth(token, account_id_hash)
+
+    def _patient_urls(self, patient_id: UUID) -> _PatientURLs:
+        """Returns the endpoint URLs for a patient, building them on first use for the current API URL."""
+        api_url, urls = self._endpoints
+        patient_urls = urls.get(patient_id)
+        if patient_urls is None:
+            base = f"{api_url}/llu/connections/{patient_id}"
+            patient_urls = urls[patient_id] = _PatientURLs(
+                graph=f"{base}/graph", logbook=f"{base}/logbook"
+            )
+        return patient_urls
+
+    def _get_headers(self) -> Mapping[str, str]:
+        """Returns the headers for the request. The mapping is read-only and shared between requests."""
+        return self._auth.headers
+
+    def authenticate(self, retry_count: int = 0) -> None:
         """Authenticate with the LibreLinkUp API
 
+        :param retry_count: The number of redirects followed before this login, reported as the ``retry_count`` of
+            its :class:`~pylibrelinkup.instrumentation.RequestEvent`. Pass ``RedirectError.redirects`` when logging in
+            again at the regional URL.
+        :type retry_count: int
         :rtype: None
         """
-        r = requests.post(
-            url=f"{self.api_url}/llu/auth/login",
-            headers=self._get_headers(),
-            json=self.login_args.model_dump(),
+        from .models.login import LoginResponse
+
+        with self._trace("login") as event:
+            event.retry_count = retry_count
+            r = self._send(
+                "POST",
+                f"{self.api_url}/llu/auth/login",
+                event,
+                json_body=self.login_args.model_dump(),
+            )
+            r.raise_for_status()
+            data = self._decode(r, event)
+            # Response to login can either be a request to use a different regional host, just successful, or a
+            # request to accept terms or privacy policy.
+            data_dict = data.get("data", {})
+            if data_dict.get("redirect", False):
+                raise RedirectError(
+                    APIUrl.from_string(data_dict["region"].upper()),
+                    redirects=retry_count + 1,
+                )
+
+            match data_dict.get("step", {}).get("type"):
+                case "tou":
+                    raise TermsOfUseError()
+                case "pp":
+                    raise PrivacyPolicyError()
+                case "verifyEmail":
+                    raise EmailVerificationError()
+
+            try:
+                login_response = self._validate(LoginResponse, data, event)
+            except ValidationError:
+                raise AuthenticationError("Invalid login credentials")
+        self._set_credentials(
+            login_response.data.authTicket.token, login_response.data.user.id
         )
-        r.raise_for_status()
-        data = r.json()
-        # Response to login can either be a request to use a different regional host, just successful, or a request
-        # to accept terms or privacy policy.
-        data_dict = data.get("data", {})
-        if data_dict.get("redirect", False):
-            raise RedirectError(APIUrl.from_string(data_dict["region"].upper()))
-
-        match data_dict.get("step", {}).get("type"):
-            case "tou":
-                raise TermsOfUseError()
-            case "pp":
-                raise PrivacyPolicyError()
-            case "verifyEmail":
-                raise EmailVerificationError()
 
-        try:
-            login_response = LoginResponse.model_validate(data)
-        except ValidationError:
-            raise AuthenticationError("Invalid login credentials")
-        self._set_token(login_response.data.authTicket.token)
-        self._set_account_id_hash(login_response.data.user.id)
+    def _fetch_patients(self) -> list[Patient]:
+        """Requests and returns patient data, without updating the patient directory."""
+        with self._trace("connections") as event:
+            data = self._call_api(url=f"{self.api_url}/llu/connections", event=event)
+            return self._parse(_parse_patients, data, event)
 
     def get_patients(self) -> list[Patient]:
         """Requests and returns patient data
@@ -166,8 +611,10 @@ class PyLibreLinkUp:
         :return: A list of patients.
         :rtype: list[Patient]
         """
-        data = self._call_api(url=f"{self.api_url}/llu/connections")
-        return [Patient.model_validate(patient) for patient in data["data"]]
+        patients = self._fetch_patients()
+        if self.patient_directory is not None:
+            self.patient_directory.update(patients)
+        return patients
 
     @authenticated
     def read(self, patient_identifier: PatientIdentifier) -> GraphResponse:
@@ -189,25 +636,55 @@ class PyLibreLinkUp:
             "and latest to access the most recently reported glucose measurement.",
             DeprecationWarning,
         )
-        patient_id = coerce_patient_id(patient_identifier)
+        patient_id = coerce_patient_id(patient_identifier, self.patient_directory)
+        return self._graph_response(patient_id)
 
-        response_json = self._get_graph_data_json(patient_id)
+    @authenticated
+    def graph_response(self, patient_identifier: PatientIdentifier) -> GraphResponse:
+        """Requests and returns the full graph endpoint response, with both the graph data and the latest measurement.
 
-        return GraphResponse.model_validate(response_json)
+        :param patient_identifier: PatientIdentifier: The identifier of the patient.
+        :return: The validated graph response.
+        :rtype: GraphResponse
+        """
+        patient_id = coerce_patient_id(patient_identifier, self.patient_directory)
+        return self._graph_response(patient_id)
+
+    def _graph_response(self, patient_id: UUID) -> GraphResponse:
+        """Requests and validates the full graph endpoint response for a patient."""
+        with self._trace("graph", patient_id) as event:
+            return self._get_patient_data(
+                "graph",
+                patient_id,
+                self._patient_urls(patient_id).graph,
+                event,
+                GraphResponse.model_validate,
+                GRAPH_PARTS,
+            )
 
     @authenticated
-    def graph(self, patient_identifier: PatientIdentifier) -> list[GlucoseMeasurement]:
+    def graph(
+        self, patient_identifier: PatientIdentifier
+    ) -> list[GlucoseMeasurement] | list[FastGlucoseMeasurement]:
         """Requests and returns glucose measurements used to display graph data. Returns approximately the last 12 hours of data.
 
         :param patient_identifier: PatientIdentifier: The identifier of the patient.
-        :return: A list of glucose measurements.
-        :rtype: list[GlucoseMeasurement]
+        :return: A list of glucose measurements. These are FastGlucoseMeasurement objects if the client was created
+            with ``fast_models=True``.
+        :rtype: list[GlucoseMeasurement] | list[FastGlucoseMeasurement]
         """
-        patient_id = coerce_patient_id(patient_identifier)
-
-        response_json = self._get_graph_data_json(patient_id)
-
-        return GraphResponse.model_validate(response_json).history
+        patient_id = coerce_patient_id(patient_identifier, self.patient_directory)
+
+        if not self.fast_models:
+            return self._graph_response(patient_id).history
+        with self._trace("graph", patient_id) as event:
+            return self._get_patient_data(
+                "graph_history",
+                patient_id,
+                self._patient_urls(patient_id).graph,
+                event,
+                parse_graph_history,
+            )
 
     @authenticated
     def latest(
@@ -219,24 +696,121 @@ class PyLibreLinkUp:
         :return: The most recent glucose measurement.
         :rtype: GlucoseMeasurementWithTrend
         """
-        patient_id = coerce_patient_id(patient_identifier)
-
-        response_json = self._get_graph_data_json(patient_id)
-
-        return GraphResponse.model_validate(response_json).current
+        patient_id = coerce_patient_id(patient_identifier, self.patient_directory)
+        return self._graph_response(patient_id).current
 
     @authenticated
     def logbook(
         self, patient_identifier: PatientIdentifier
-    ) -> list[GlucoseMeasurement]:
+    ) -> list[GlucoseMeasurement] | list[FastGlucoseMeasurement]:
         """Requests and returns patient logbook data, containing the measurements associated with glucose events for approximately the last 14 days.
 
         :param patient_identifier: PatientIdentifier: The identifier of the patient.
-        :return: A list of glucose measurements.
-        :rtype: list[GlucoseMeasurement]
+        :return: A list of glucose measurements. These are FastGlucoseMeasurement objects if the client was created
+            with ``fast_models=True``.
+        :rtype: list[GlucoseMeasurement] | list[FastGlucoseMeasurement]
+        """
+        patient_id = coerce_patient_id(patient_identifier, self.patient_directory)
+
+        with self._trace("logbook", patient_id) as event:
+            url = self._patient_urls(patient_id).logbook
+            if self.fast_models:
+                return self._get_patient_data(
+                    "logbook", patient_id, url, event, parse_logbook
+                )
+            return self._get_patient_data(
+                "logbook", patient_id, url, event, LogbookResponse.model_validate
+            ).data
+
+    def _graph_measurements(
+        self, patient_id: UUID
+    ) -> list[GlucoseMeasurement] | list[FastGlucoseMeasurement]:
+        """Requests the graph history of a patient, followed by the current measurement."""
+        if not self.fast_models:
+            response = self._graph_response(patient_id)
+            return [*response.history, response.current]
+        with self._trace("graph", patient_id) as event:
+            return self._get_patient_data(
+                "graph_measurements",
+                patient_id,
+                self._patient_urls(patient_id).graph,
+                event,
+                parse_graph_measurements,
+            )
+
+    @authenticated
+    def history(
+        self,
+        patient_identifier: PatientIdentifier,
+        start: datetime,
+        end: datetime | None = None,
+        max_age: timedelta = DEFAULT_MAX_AGE,
+    ) -> list[GlucoseMeasurement] | list[FastGlucoseMeasurement]:
+        """Returns the glucose measurements of a patient in a time range, merged from the graph and logbook data.
+
+        Measurements are kept in :attr:`history_index`, and the graph or logbook endpoint is only requested if the
+        index does not already cover the part of the range it returns: the last 12 hours for the graph, and the last
+        14 days for the logbook. Measurements received from both endpoints are returned once.
+
+        :param patient_identifier: PatientIdentifier: The identifier of the patient.
+        :param start: The start of the range, compared with each measurement's factory timestamp, which is in UTC.
+            Naive datetimes are taken to be UTC.
+        :type start: datetime
+        :param end: The end of the range. Defaults to now.
+        :type end: datetime | None
+        :param max_age: How recently an endpoint must have been requested for the measurements it returned to be
+            used for the most recent part of the range.
+        :type max_age: timedelta
+        :return: The measurements with factory timestamps from ``start`` to ``end`` inclusive, oldest first. These are
+            FastGlucoseMeasurement objects if the client was created with ``fast_models=True``.
+        :rtype: list[GlucoseMeasurement] | list[FastGlucoseMeasurement]
+        """
+        patient_id = coerce_patient_id(patient_identifier, self.patient_directory)
+        now = datetime.now(UTC)
+        end = now if end is None else end
+
+        for source in self.history_index.missing(patient_id, start, end, now, max_age):
+            if source is HistorySource.GRAPH:
+                measurements = self._graph_measurements(patient_id)
+            else:
+                measurements = self.logbook(patient_id)
+            self.history_index.merge(patient_id, measurements, source, fetched_at=now)
+        return self.history_index.query(patient_id, start, end)
+
+    @property
+    def subscription_hub(self) -> SubscriptionHub:
+        """Returns the hub which polls patients for :meth:`subscribe`, creating it with default settings if needed.
+
+        Assign a :class:`~pylibrelinkup.subscriptions.SubscriptionHub` to change the poll interval.
         """
-        patient_id = coerce_patient_id(patient_identifier)
+        if self._subscription_hub is None:
+            from .subscriptions import SubscriptionHub
 
-        response_json = self._get_logbook_json(patient_id)
+            self._subscription_hub = SubscriptionHub(self)
+        return self._subscription_hub
 
-        return LogbookResponse.model_validate(response_json).data
+    @subscription_hub.setter
+    def subscription_hub(self, hub: SubscriptionHub) -> None:
+        self._subscription_hub = hub
+
+    def subscribe(
+        self,
+        patient_identifier: PatientIdentifier,
+        maxsize: int = 16,
+        backpressure: str = "drop_oldest",
+    ) -> Subscription:
+        """Subscribes to the new measurements of a patient. Must be called from a running event loop.
+
+        All subscriptions to the same patient share a single poll of :meth:`latest`, run in a worker thread.
+
+        :param patient_identifier: PatientIdentifier: The identifier of the patient.
+        :param maxsize: The maximum number of measurements queued for this subscriber.
+        :type maxsize: int
+        :param backpressure: ``"drop_oldest"`` to discard the oldest queued measurement when the queue is full, or
+            ``"block"`` to make the poll wait until the subscriber has room.
+        :type backpressure: str
+        :return: An asynchronous iterator of new measurements.
+        :rtype: Subscription
+        """
+        patient_id = coerce_patient_id(patient_identifier, self.patient_directory)
+        return self.subscription_hub.subscribe(patient_id, maxsize, backpressure)
@@ -0,0 +1,122 @@
+"""
+Client-side rate limiting for requests made to the LibreLinkUp API.
+
+Pass a :class:`TokenBucket` to ``PyLibreLinkUp(..., rate_limiter=...)`` and every request made by that client will wait
+for a token first. A bucket may be shared by several clients to give them a common budget.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable
+
+__all__ = ["TokenBucket"]
+
+
+class TokenBucket:
+    """A thread-safe token bucket which refills at a fixed rate up to a maximum burst size."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """
+        Constructor for the TokenBucket class.
+
+        :param rate: The number of tokens added per second.
+        :type rate: float
+        :param burst: The maximum number of tokens the bucket can hold. The bucket starts full.
+        :type burst: float
+        :param clock: The monotonic clock used to refill the bucket.
+        :type clock: Callable[[], float]
+        :param sleep: The function used to wait for tokens.
+        :type sleep: Callable[[float], None]
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = burst
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def available(self) -> float:
+        """Returns the number of tokens that could be acquired right now."""
+        with self._lock:
+            now = self._clock()
+            if now < self._paused_until:
+                return 0.0
+            self._refill(now)
+            return self._tokens
+
+    @property
+    def paused(self) -> bool:
+        """Returns True while the bucket is withholding tokens after :meth:`pause`."""
+        with self._lock:
+            return self._clock() < self._paused_until
+
+    def _wait_time(self, tokens: float, now: float) -> float:
+        """Returns how long to wait before the tokens are available. Must be called with the lock held."""
+        if now < self._paused_until:
+            return self._paused_until - now
+        self._refill(now)
+        if self._tokens >= tokens:
+            return 0.0
+        return (tokens - self._tokens) / self.rate
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Takes tokens from the bucket if they are available, without waiting.
+
+        :return: True if the tokens were taken.
+        """
+        with self._lock:
+            if self._wait_time(tokens, self._clock()) > 0:
+                return False
+            self._tokens -= tokens
+            return True
+
+    def acquire(self, tokens: float = 1.0, timeout: float | None = None) -> bool:
+        """Takes tokens from the bucket, waiting for them to become available.
+
+        :param tokens: The number of tokens to take.
+        :param timeout: The maximum number of seconds to wait, or None to wait indefinitely.
+        :return: True if the tokens were taken, False if the timeout expired first.
+        """
+        deadline = None if timeout is None else self._clock() + timeout
+        while True:
+            with self._lock:
+                now = self._clock()
+                wait = self._wait_time(tokens, now)
+                if wait <= 0:
+                    self._tokens -= tokens
+                    return True
+            if deadline is not None:
+                remaining = deadline - now
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            self._sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Withholds all tokens for a number of seconds, e.g. after the API has responded with a 429."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            # Tokens only start accumulating again once the pause is over.
+            self._updated = self._paused_until
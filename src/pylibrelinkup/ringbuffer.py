@@ -0,0 +1,263 @@
+"""
+Fixed-capacity buffers of each patient's recent readings.
+
+A :class:`ReadingRingBuffer` stores up to ``capacity`` readings in arrays allocated when it is created, so its memory
+use never grows: once it is full, each new reading overwrites the oldest. Appending is O(1), and because readings are
+stored in time order, a time window such as the last 30 minutes is found with a binary search in O(log n).
+
+:class:`PatientRingBuffers` keeps one buffer per patient and can be added to a client's hooks, so that every graph
+response the client parses, including those from :meth:`~pylibrelinkup.PyLibreLinkUp.latest`, is added to the
+patient's buffer. With ``max_patients`` set, the buffer of the patient updated least recently is dropped to make room
+for a new patient, which bounds the total memory use too.
+
+.. code-block:: python
+
+    buffers = PatientRingBuffers(capacity=1440)
+    client.hooks.append(buffers)
+    client.latest(patient_id)
+    recent = buffers[patient_id].last(timedelta(minutes=30))
+"""
+
+from __future__ import annotations
+
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import UTC, datetime, timedelta
+from typing import Any, Iterable, Iterator, NamedTuple
+from uuid import UUID
+
+from .data_types import Measurement
+from .instrumentation import RequestEvent, RequestHooks
+from .models.connection import GraphResponse
+from .models.data import Trend
+
+__all__ = ["BufferedReading", "PatientRingBuffers", "ReadingRingBuffer"]
+
+DEFAULT_CAPACITY = 1440
+"""The number of readings kept per patient by default: one day of readings at one per minute."""
+
+_TRENDS: dict[int, Trend] = {trend.value: trend for trend in Trend}
+
+
+class BufferedReading(NamedTuple):
+    """A reading stored in a ring buffer. ``trend`` is None for readings without one, e.g. graph history."""
+
+    factory_timestamp: datetime
+    value_in_mg_per_dl: float
+    trend: Trend | None
+
+
+class _Timestamps:
+    """The buffer's timestamps in time order, as a sequence for :mod:`bisect`."""
+
+    def __init__(self, buffer: ReadingRingBuffer) -> None:
+        self.buffer = buffer
+
+    def __len__(self) -> int:
+        return self.buffer._size
+
+    def __getitem__(self, index: int) -> float:
+        return self.buffer._timestamps[self.buffer._physical(index)]
+
+
+class ReadingRingBuffer:
+    """A thread-safe, fixed-capacity buffer of one patient's most recent readings, in time order."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        """
+        Constructor for the ReadingRingBuffer class.
+
+        :param capacity: The maximum number of readings kept.
+        :type capacity: int
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._timestamps = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        self._trends = array("b", bytes(capacity))
+        self._start = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _physical(self, index: int) -> int:
+        return (self._start + index) % self.capacity
+
+    def _reading(self, index: int) -> BufferedReading:
+        i = self._physical(index)
+        return BufferedReading(
+            datetime.fromtimestamp(self._timestamps[i], UTC),
+            self._values[i],
+            _TRENDS.get(self._trends[i]),
+        )
+
+    def append(
+        self,
+        factory_timestamp: datetime,
+        value_in_mg_per_dl: float,
+        trend: Trend | None = None,
+    ) -> bool:
+        """Adds a reading, overwriting the oldest if the buffer is full.
+
+        :param factory_timestamp: The time of the reading. Naive datetimes are taken to be UTC.
+        :param value_in_mg_per_dl: The glucose value.
+        :param trend: The trend at the time of the reading, if known.
+        :return: False, without adding it, if the reading is not newer than the newest reading in the buffer.
+        """
+        if factory_timestamp.tzinfo is None:
+            factory_timestamp = factory_timestamp.replace(tzinfo=UTC)
+        timestamp = factory_timestamp.timestamp()
+        with self._lock:
+            if (
+                self._size
+                and timestamp <= self._timestamps[self._physical(self._size - 1)]
+            ):
+                return False
+            if self._size < self.capacity:
+                i = self._physical(self._size)
+                self._size += 1
+            else:
+                i = self._start
+                self._start = (self._start + 1) % self.capacity
+            self._timestamps[i] = timestamp
+            self._values[i] = value_in_mg_per_dl
+            self._trends[i] = 0 if trend is None else int(trend)
+        return True
+
+    def add(self, measurement: Measurement) -> bool:
+        """Adds a measurement, with its trend if it has one. See :meth:`append`."""
+        return self.append(
+            measurement.factory_timestamp,
+            measurement.value_in_mg_per_dl,
+            getattr(measurement, "trend", None),
+        )
+
+    def extend(self, measurements: Iterable[Measurement]) -> int:
+        """Adds measurements in time order, and returns the number which were newer than the buffer's contents."""
+        ordered = sorted(measurements, key=lambda m: m.factory_timestamp)
+        return sum(self.add(measurement) for measurement in ordered)
+
+    def latest(self) -> BufferedReading | None:
+        """Returns the newest reading, or None if the buffer is empty."""
+        with self._lock:
+            return self._reading(self._size - 1) if self._size else None
+
+    def window(
+        self, start: datetime, end: datetime | None = None
+    ) -> list[BufferedReading]:
+        """Returns the readings from ``start`` up to and including ``end``, oldest first.
+
+        :param start: The start of the window. Naive datetimes are taken to be UTC.
+        :param end: The end of the window, or None for no end.
+        """
+        timestamps = _Timestamps(self)
+        with self._lock:
+            low = bisect_left(timestamps, _posix(start))
+            high = (
+                self._size
+                if end is None
+                else bisect_right(timestamps, _posix(end), lo=low)
+            )
+            return [self._reading(index) for index in range(low, high)]
+
+    def last(
+        self, duration: timedelta, now: datetime | None = None
+    ) -> list[BufferedReading]:
+        """Returns the readings in the period of ``duration`` up to ``now``, oldest first.
+
+        :param duration: The length of the window, e.g. ``timedelta(minutes=30)``.
+        :param now: The end of the window. Defaults to the current time.
+        """
+        now = now or datetime.now(UTC)
+        return self.window(now - duration, now)
+
+    def __iter__(self) -> Iterator[BufferedReading]:
+        with self._lock:
+            readings = [self._reading(index) for index in range(self._size)]
+        return iter(readings)
+
+    def clear(self) -> None:
+        """Removes every reading. The arrays are kept for reuse."""
+        with self._lock:
+            self._start = 0
+            self._size = 0
+
+
+def _posix(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return value.timestamp()
+
+
+class PatientRingBuffers(RequestHooks):
+    """A ring buffer of recent readings for each patient, which can be fed by a client's graph responses."""
+
+    def __init__(
+        self, capacity: int = DEFAULT_CAPACITY, max_patients: int | None = None
+    ) -> None:
+        """
+        Constructor for the PatientRingBuffers class.
+
+        :param capacity: The number of readings kept for each patient.
+        :type capacity: int
+        :param max_patients: The number of patients kept, dropping the patient updated least recently to make room
+            for a new one, or None for no limit.
+        :type max_patients: int | None
+        """
+        self.capacity = capacity
+        self.max_patients = max_patients
+        self._buffers: OrderedDict[UUID, ReadingRingBuffer] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+    def __contains__(self, patient_id: UUID) -> bool:
+        return patient_id in self._buffers
+
+    def __getitem__(self, patient_id: UUID) -> ReadingRingBuffer:
+        """Returns the buffer for a patient.
+
+        :raises KeyError: If there are no readings for the patient.
+        """
+        return self._buffers[patient_id]
+
+    def buffer(self, patient_id: UUID) -> ReadingRingBuffer:
+        """Returns the buffer for a patient, creating it if needed."""
+        with self._lock:
+            buffer = self._buffers.get(patient_id)
+            if buffer is None:
+                if (
+                    self.max_patients is not None
+                    and len(self._buffers) >= self.max_patients
+                ):
+                    self._buffers.popitem(last=False)
+                buffer = self._buffers[patient_id] = ReadingRingBuffer(self.capacity)
+            else:
+                self._buffers.move_to_end(patient_id)
+            return buffer
+
+    def add(self, patient_id: UUID, measurement: Measurement) -> bool:
+        """Adds a measurement to a patient's buffer. See :meth:`ReadingRingBuffer.append`."""
+        return self.buffer(patient_id).add(measurement)
+
+    def extend(self, patient_id: UUID, measurements: Iterable[Measurement]) -> int:
+        """Adds measurements to a patient's buffer. See :meth:`ReadingRingBuffer.extend`."""
+        return self.buffer(patient_id).extend(measurements)
+
+    def on_parsed(self, event: RequestEvent, result: Any) -> None:
+        """Adds the history and current measurement of every parsed graph response to the patient's buffer."""
+        if isinstance(result, GraphResponse):
+            # The current measurement goes first, so that it is kept, with its trend, if the history has a
+            # reading at the same time.
+            self.extend(
+                result.data.connection.patient_id, [result.current, *result.history]
+            )
+        elif event.endpoint == "graph" and event.patient_id is not None:
+            # The history alone, parsed with fast models.
+            self.extend(event.patient_id, result)
@@ -0,0 +1,218 @@
+"""
+Publishing new measurements to many asynchronous subscribers from one upstream poll per patient.
+
+Each patient with at least one subscriber is polled by a single task, no matter how many subscribers it has. A new
+measurement is put on the bounded queue of every subscriber; when a queue is full the subscriber's backpressure policy
+decides whether the oldest queued measurement is dropped or the publisher waits for the subscriber to catch up.
+
+.. code-block:: python
+
+    async def main():
+        client.subscription_hub = SubscriptionHub(client, poll_interval=30)
+        async with client.subscribe(patient) as subscription:
+            async for measurement in subscription:
+                print(measurement.value, measurement.trend.indicator)
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from datetime import datetime
+from enum import StrEnum
+from typing import Any, Callable
+from uuid import UUID
+
+from .models.data import GlucoseMeasurementWithTrend
+from .pylibrelinkup import PyLibreLinkUp
+
+__all__ = ["Backpressure", "Subscription", "SubscriptionHub"]
+
+DEFAULT_POLL_INTERVAL = 60.0
+"""Seconds between polls of the latest measurement for each subscribed patient."""
+
+
+class Backpressure(StrEnum):
+    DROP_OLDEST = "drop_oldest"
+    BLOCK = "block"
+
+
+class Subscription:
+    """An asynchronous iterator of the new measurements for one patient."""
+
+    def __init__(
+        self,
+        hub: SubscriptionHub,
+        patient_id: UUID,
+        maxsize: int,
+        backpressure: Backpressure,
+    ) -> None:
+        self.patient_id = patient_id
+        self.maxsize = maxsize
+        self.backpressure = Backpressure(backpressure)
+        self.dropped = 0
+        self._hub = hub
+        self._items: deque[GlucoseMeasurementWithTrend] = deque()
+        self._changed = asyncio.Event()
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def closed(self) -> bool:
+        """Returns True once the subscription has been closed."""
+        return self._closed
+
+    async def _wait(self) -> None:
+        self._changed.clear()
+        await self._changed.wait()
+
+    async def publish(self, measurement: GlucoseMeasurementWithTrend) -> None:
+        """Queues a measurement according to the backpressure policy."""
+        if self.backpressure is Backpressure.BLOCK:
+            while len(self._items) >= self.maxsize and not self._closed:
+                await self._wait()
+        elif len(self._items) >= self.maxsize:
+            self._items.popleft()
+            self.dropped += 1
+        if self._closed:
+            return
+        self._items.append(measurement)
+        self._changed.set()
+
+    async def get(self) -> GlucoseMeasurementWithTrend:
+        """Waits for the next measurement.
+
+        :raises StopAsyncIteration: If the subscription has been closed and every queued measurement has been read.
+        """
+        while not self._items:
+            if self._closed:
+                raise StopAsyncIteration
+            await self._wait()
+        measurement = self._items.popleft()
+        self._changed.set()
+        return measurement
+
+    def close(self) -> None:
+        """Stops the subscription. Measurements already queued can still be read."""
+        if self._closed:
+            return
+        self._closed = True
+        self._hub._unsubscribe(self)
+        self._changed.set()
+
+    def __aiter__(self) -> Subscription:
+        return self
+
+    async def __anext__(self) -> GlucoseMeasurementWithTrend:
+        return await self.get()
+
+    async def __aenter__(self) -> Subscription:
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class _PatientPoller:
+    """Polls the latest measurement for one patient and publishes new ones to its subscribers."""
+
+    def __init__(self, hub: SubscriptionHub, patient_id: UUID) -> None:
+        self.hub = hub
+        self.patient_id = patient_id
+        self.subscribers: list[Subscription] = []
+        self.last_timestamp: datetime | None = None
+        self.task: asyncio.Task | None = None
+
+    async def run(self) -> None:
+        while self.subscribers:
+            try:
+                measurement = await asyncio.to_thread(
+                    self.hub.client.latest, self.patient_id
+                )
+            except Exception as exc:
+                if self.hub.on_error is not None:
+                    self.hub.on_error(self.patient_id, exc)
+            else:
+                timestamp = measurement.factory_timestamp
+                if self.last_timestamp is None or timestamp > self.last_timestamp:
+                    self.last_timestamp = timestamp
+                    for subscriber in list(self.subscribers):
+                        await subscriber.publish(measurement)
+            await asyncio.sleep(self.hub.poll_interval)
+
+
+class SubscriptionHub:
+    """Shares one upstream poll per patient between all of its subscribers."""
+
+    def __init__(
+        self,
+        client: PyLibreLinkUp,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        on_error: Callable[[UUID, Exception], Any] | None = None,
+    ) -> None:
+        """
+        Constructor for the SubscriptionHub class.
+
+        :param client: An authenticated client. Its blocking requests are run in a worker thread.
+        :type client: PyLibreLinkUp
+        :param poll_interval: Seconds between polls of each subscribed patient.
+        :type poll_interval: float
+        :param on_error: Called with the patient id and exception when a poll fails. Polling continues regardless.
+        :type on_error: Callable[[UUID, Exception], Any] | None
+        """
+        self.client = client
+        self.poll_interval = poll_interval
+        self.on_error = on_error
+        self.pollers: dict[UUID, _PatientPoller] = {}
+
+    def subscribe(
+        self,
+        patient_id: UUID,
+        maxsize: int = 16,
+        backpressure: Backpressure | str = Backpressure.DROP_OLDEST,
+    ) -> Subscription:
+        """Subscribes to the new measurements of a patient, starting its poll if needed.
+
+        Must be called from a running event loop.
+
+        :param patient_id: The patient to subscribe to.
+        :type patient_id: UUID
+        :param maxsize: The maximum number of measurements queued for this subscriber.
+        :type maxsize: int
+        :param backpressure: What to do when the queue is full: drop the oldest measurement, or block the publisher
+            (which delays every subscriber of the patient) until there is room.
+        :type backpressure: Backpressure | str
+        :rtype: Subscription
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        subscription = Subscription(
+            self, patient_id, maxsize, Backpressure(backpressure)
+        )
+        poller = self.pollers.get(patient_id)
+        if poller is None:
+            poller = self.pollers[patient_id] = _PatientPoller(self, patient_id)
+        poller.subscribers.append(subscription)
+        if poller.task is None or poller.task.done():
+            poller.task = asyncio.get_running_loop().create_task(poller.run())
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        poller = self.pollers.get(subscription.patient_id)
+        if poller is None or subscription not in poller.subscribers:
+            return
+        poller.subscribers.remove(subscription)
+        if not poller.subscribers:
+            del self.pollers[subscription.patient_id]
+            if poller.task is not None:
+                poller.task.cancel()
+
+    async def close(self) -> None:
+        """Closes every subscription and stops all polling."""
+        tasks = [poller.task for poller in self.pollers.values() if poller.task]
+        for poller in list(self.pollers.values()):
+            for subscription in list(poller.subscribers):
+                subscription.close()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,401 @@
+"""
+Transports, which send the HTTP requests made by a PyLibreLinkUp client.
+
+A transport sends one request and returns a :class:`TransportResponse` holding the status, headers and body. The
+client uses :class:`RequestsTransport` unless another is passed to its constructor:
+
+.. code-block:: python
+
+    client = PyLibreLinkUp(email=email, password=password, transport=HttpxTransport(http2=True))
+
+==========================  ===========================================================================================
+Transport                   Notes
+==========================  ===========================================================================================
+:class:`RequestsTransport`  The default. Errors are raised as ``requests`` exceptions, as in previous versions.
+:class:`Urllib3Transport`   Keeps a pool of connections to each regional host. urllib3 is installed with ``requests``.
+:class:`HttpxTransport`     Requires the ``httpx`` extra. With ``http2=True``, concurrent requests from many threads
+                            share one connection to each host.
+:class:`InMemoryTransport`  Serves canned responses without a network, for tests and benchmarks.
+==========================  ===========================================================================================
+
+Transports other than :class:`RequestsTransport` raise :class:`~pylibrelinkup.exceptions.LLUAPIError` for error
+responses and :class:`~pylibrelinkup.exceptions.LLUAPIConnectionError` when the API cannot be reached. Every
+transport raises :class:`~pylibrelinkup.exceptions.LLUAPITimeoutError` when a request times out, including while reading
+the body, and when the body is only received after the deadline of the enclosing :func:`~pylibrelinkup.deadline.deadline`
+block has passed.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Callable, Mapping
+
+from . import deadline as deadlines
+from .exceptions import (
+    DeadlineExceededError,
+    LLUAPIConnectionError,
+    LLUAPIError,
+    LLUAPITimeoutError,
+)
+
+__all__ = [
+    "HttpxTransport",
+    "InMemoryTransport",
+    "RequestsTransport",
+    "Transport",
+    "TransportRequest",
+    "TransportResponse",
+    "Urllib3Transport",
+]
+
+Timeout = tuple[float | None, float | None]
+"""The connect and read timeouts of a request, in seconds. None waits indefinitely."""
+
+
+@dataclass
+class TransportResponse:
+    """TransportResponse class to store the status, headers and body of a response.
+
+    ``headers`` must look up names case-insensitively, or have lower case names. ``ttfb`` is the number of seconds
+    taken to receive the headers, and ``download`` the number taken to then read the body.
+    """
+
+    status_code: int
+    headers: Mapping[str, str]
+    content: bytes
+    url: str = ""
+    ttfb: float = 0.0
+    download: float = 0.0
+
+    def raise_for_status(self) -> None:
+        """Raises an error if the status is a client or server error.
+
+        :raises LLUAPIError: If the status is 400 or above.
+        """
+        if self.status_code >= 400:
+            raise LLUAPIError(self.status_code, f"{self.url} returned an error")
+
+    def close(self) -> None:
+        """Releases the connection the response was read from, if it is still held."""
+
+
+def _check_deadline(method: str, url: str) -> None:
+    """Raises if the deadline passed while the body was read.
+
+    The read timeout applies to each read from the socket, so a body which arrives slowly can take longer in total.
+    """
+    left = deadlines.remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceededError(f"{method} {url} exceeded the deadline")
+
+
+class Transport(ABC):
+    """Base class for transports. Subclasses must implement :meth:`request`."""
+
+    @abstractmethod
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        json_body: dict | None,
+        timeout: Timeout,
+    ) -> TransportResponse:
+        """Sends a request and reads the whole response.
+
+        :param method: The request method.
+        :param url: The request URL.
+        :param headers: The request headers.
+        :param json_body: Data sent as a JSON body, or None.
+        :param timeout: The connect and read timeouts.
+        :raises LLUAPITimeoutError: If the request times out.
+        """
+
+    def close(self) -> None:
+        """Closes any connections held by the transport."""
+
+
+@dataclass
+class _RequestsResponse(TransportResponse):
+    raw: Any = None
+
+    def raise_for_status(self) -> None:
+        """Raises ``requests.HTTPError`` if the status is a client or server error."""
+        self.raw.raise_for_status()
+
+    def close(self) -> None:
+        self.raw.close()
+
+
+class RequestsTransport(Transport):
+    """Sends requests with ``requests``."""
+
+    def __init__(self, session: Any | None = None) -> None:
+        """
+        Constructor for the RequestsTransport class.
+
+        :param session: A ``requests.Session`` to send requests with, reusing its connections. By default each request
+            is sent with a new connection.
+        :type session: requests.Session | None
+        """
+        self.session = session
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        json_body: dict | None,
+        timeout: Timeout,
+    ) -> TransportResponse:
+        import requests
+        from urllib3.exceptions import ReadTimeoutError
+
+        send = self.session.request if self.session is not None else requests.request
+        started = time.perf_counter()
+        try:
+            r = send(
+                method,
+                url=url,
+                headers=headers,
+                json=json_body,
+                stream=True,
+                timeout=timeout,
+            )
+            headers_received = time.perf_counter()
+            content = r.content
+        except requests.Timeout as exc:
+            raise LLUAPITimeoutError(f"{method} {url} timed out") from exc
+        except requests.ConnectionError as exc:
+            # requests raises a read timeout while streaming the body as a ConnectionError.
+            if any(isinstance(arg, ReadTimeoutError) for arg in exc.args):
+                raise LLUAPITimeoutError(f"{method} {url} timed out") from exc
+            raise
+        _check_deadline(method, url)
+        return _RequestsResponse(
+            status_code=r.status_code,
+            headers=r.headers,
+            content=content,
+            url=url,
+            ttfb=headers_received - started,
+            download=time.perf_counter() - headers_received,
+            raw=r,
+        )
+
+    def close(self) -> None:
+        if self.session is not None:
+            self.session.close()
+
+
+class Urllib3Transport(Transport):
+    """Sends requests with a ``urllib3.PoolManager``, keeping connections to each host open between requests."""
+
+    def __init__(self, pool_manager: Any | None = None, maxsize: int = 10) -> None:
+        """
+        Constructor for the Urllib3Transport class.
+
+        :param pool_manager: The ``urllib3.PoolManager`` to send requests with. One is created if not provided.
+        :type pool_manager: urllib3.PoolManager | None
+        :param maxsize: The number of connections kept open to each host, when creating the pool manager.
+        :type maxsize: int
+        """
+        import urllib3
+
+        self.pool_manager = pool_manager or urllib3.PoolManager(maxsize=maxsize)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        json_body: dict | None,
+        timeout: Timeout,
+    ) -> TransportResponse:
+        import urllib3
+
+        connect, read = timeout
+        started = time.perf_counter()
+        try:
+            r = self.pool_manager.request(
+                method,
+                url,
+                headers=dict(headers),
+                body=None if json_body is None else json.dumps(json_body),
+                timeout=urllib3.Timeout(connect=connect, read=read),
+                preload_content=False,
+                retries=False,
+            )
+            headers_received = time.perf_counter()
+            try:
+                content = r.read()
+            finally:
+                r.release_conn()
+        except urllib3.exceptions.NewConnectionError as exc:
+            # Checked first, as urllib3 makes it a subclass of ConnectTimeoutError.
+            raise LLUAPIConnectionError(f"{method} {url} failed: {exc}") from exc
+        except urllib3.exceptions.TimeoutError as exc:
+            raise LLUAPITimeoutError(f"{method} {url} timed out") from exc
+        except urllib3.exceptions.HTTPError as exc:
+            raise LLUAPIConnectionError(f"{method} {url} failed: {exc}") from exc
+        _check_deadline(method, url)
+        return TransportResponse(
+            status_code=r.status,
+            headers=r.headers,
+            content=content,
+            url=url,
+            ttfb=headers_received - started,
+            download=time.perf_counter() - headers_received,
+        )
+
+    def close(self) -> None:
+        self.pool_manager.clear()
+
+
+class HttpxTransport(Transport):
+    """Sends requests with an ``httpx.Client``. Requires the ``httpx`` extra, and ``httpx[http2]`` for HTTP/2."""
+
+    def __init__(self, client: Any | None = None, http2: bool = False) -> None:
+        """
+        Constructor for the HttpxTransport class.
+
+        :param client: The ``httpx.Client`` to send requests with. One is created if not provided.
+        :type client: httpx.Client | None
+        :param http2: Whether a created client should use HTTP/2, so that concurrent requests to a host share one
+            connection.
+        :type http2: bool
+        :raises ImportError: If httpx is not installed.
+        """
+        try:
+            import httpx
+        except ImportError as exc:
+            raise ImportError(
+                "HttpxTransport requires httpx: pip install pylibrelinkup[httpx]"
+            ) from exc
+
+        self.client = client or httpx.Client(http2=http2)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        json_body: dict | None,
+        timeout: Timeout,
+    ) -> TransportResponse:
+        import httpx
+
+        connect, read = timeout
+        started = time.perf_counter()
+        try:
+            request = self.client.build_request(
+                method,
+                url,
+                headers=dict(headers),
+                json=json_body,
+                timeout=httpx.Timeout(None, connect=connect, read=read),
+            )
+            r = self.client.send(request, stream=True)
+            headers_received = time.perf_counter()
+            try:
+                content = r.read()
+            finally:
+                r.close()
+        except httpx.TimeoutException as exc:
+            raise LLUAPITimeoutError(f"{method} {url} timed out") from exc
+        except httpx.TransportError as exc:
+            raise LLUAPIConnectionError(f"{method} {url} failed: {exc}") from exc
+        _check_deadline(method, url)
+        return TransportResponse(
+            status_code=r.status_code,
+            headers=r.headers,
+            content=content,
+            url=url,
+            ttfb=headers_received - started,
+            download=time.perf_counter() - headers_received,
+        )
+
+    def close(self) -> None:
+        self.client.close()
+
+
+@dataclass(frozen=True)
+class TransportRequest:
+    """TransportRequest class to store a request received by an :class:`InMemoryTransport`."""
+
+    method: str
+    url: str
+    headers: Mapping[str, str]
+    json_body: dict | None
+
+
+Handler = Callable[[TransportRequest], TransportResponse]
+
+
+@dataclass
+class InMemoryTransport(Transport):
+    """Serves responses registered with :meth:`add` without making network requests.
+
+    Every request is recorded in :attr:`requests`. A request with no registered response raises
+    :class:`~pylibrelinkup.exceptions.LLUAPIConnectionError`.
+    """
+
+    routes: dict[tuple[str, str], Handler] = field(default_factory=dict)
+    requests: list[TransportRequest] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(
+        self,
+        method: str,
+        url: str,
+        json: Any = None,
+        body: bytes = b"",
+        status: int = 200,
+        headers: Mapping[str, str] | None = None,
+        callback: Handler | None = None,
+    ) -> None:
+        """Registers the response to requests with a method and URL.
+
+        :param method: The request method.
+        :param url: The full request URL.
+        :param json: Data returned as a JSON body.
+        :param body: The body returned if ``json`` is None.
+        :param status: The response status.
+        :param headers: The response headers.
+        :param callback: Called with each request to build the response, instead of the other parameters.
+        """
+        if callback is None:
+            content = body if json is None else _dumps(json)
+            response_headers = {
+                name.lower(): value for name, value in (headers or {}).items()
+            }
+
+            def callback(request: TransportRequest) -> TransportResponse:
+                return TransportResponse(
+                    status, response_headers, content, url=request.url
+                )
+
+        self.routes[(method.upper(), url)] = callback
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        json_body: dict | None,
+        timeout: Timeout,
+    ) -> TransportResponse:
+        request = TransportRequest(method.upper(), url, dict(headers), json_body)
+        with self._lock:
+            self.requests.append(request)
+            handler = self.routes.get((request.method, url))
+        if handler is None:
+            raise LLUAPIConnectionError(f"No response registered for {method} {url}")
+        return handler(request)
+
+
+def _dumps(data: Any) -> bytes:
+    return json.dumps(data).encode()
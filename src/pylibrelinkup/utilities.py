@@ -1,10 +1,29 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING
 from uuid import UUID
 
 from .data_types import PatientIdentifier
 from .models.data import Patient
 
+if TYPE_CHECKING:
+    from .directory import PatientDirectory
+
+
+def as_utc(value: datetime) -> datetime:
+    """Returns a datetime, taking a naive datetime to be UTC as factory timestamps are."""
+    return value.replace(tzinfo=UTC) if value.tzinfo is None else value
+
+
+def coerce_patient_id(
+    patient_identifier: PatientIdentifier, directory: PatientDirectory | None = None
+) -> UUID:
+    """Returns the patient id for a patient identifier.
 
-def coerce_patient_id(patient_identifier: PatientIdentifier) -> UUID:
+    Without a directory, only UUIDs, UUID strings and Patient objects are accepted. With a directory, connection ids
+    are also mapped to patient ids, and strings which are not UUIDs are looked up as patient names.
+    """
     invalid_patient_identifier = "Invalid patient_identifier"
     patient_id: UUID | None = None
     if isinstance(patient_identifier, UUID):
@@ -13,9 +32,13 @@ def coerce_patient_id(patient_identifier: PatientIdentifier) -> UUID:
         try:
             patient_id = UUID(patient_identifier)
         except ValueError as exc:
-            raise ValueError(invalid_patient_identifier) from exc
+            if directory is None:
+                raise ValueError(invalid_patient_identifier) from exc
+            return directory.find_by_name(patient_identifier).patient_id
     elif isinstance(patient_identifier, Patient):
-        patient_id = patient_identifier.patient_id
+        return patient_identifier.patient_id
     else:
         raise ValueError(invalid_patient_identifier)
+    if directory is not None:
+        patient_id = directory.resolve_uuid(patient_id)
     return patient_id
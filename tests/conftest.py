@@ -43,6 +43,11 @@ def graph_response_no_u_json(get_response_json):
     return get_response_json("graph_response_no_u.json")
 
 
+@pytest.fixture
+def logbook_response_json(get_response_json):
+    return get_response_json("logbook_response.json")
+
+
 @dataclass
 class PyLibreLinkUpClientFixture:
     client: PyLibreLinkUp
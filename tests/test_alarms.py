@@ -0,0 +1,195 @@
+from datetime import UTC, datetime, timedelta
+
+import pytest
+import responses
+
+from pylibrelinkup import PyLibreLinkUp
+from pylibrelinkup.alarms import (
+    AlarmEngine,
+    AlarmState,
+    AlarmType,
+    CompiledAlarmRules,
+)
+from pylibrelinkup.models.connection import GraphResponse
+from pylibrelinkup.models.fast import FastGlucoseMeasurement
+
+START = datetime(2024, 11, 10, tzinfo=UTC)
+
+
+def reading(minutes: float, value: float) -> FastGlucoseMeasurement:
+    timestamp = START + timedelta(minutes=minutes)
+    return FastGlucoseMeasurement(
+        factory_timestamp=timestamp,
+        timestamp=timestamp.replace(tzinfo=None),
+        value_in_mg_per_dl=value,
+        value=value,
+    )
+
+
+@pytest.fixture
+def connection(graph_response_json):
+    return GraphResponse.model_validate(graph_response_json).data.connection
+
+
+@pytest.fixture
+def engine(connection):
+    engine = AlarmEngine()
+    engine.register_connection(connection)
+    return engine
+
+
+def states(events):
+    return [(event.type, event.state) for event in events]
+
+
+def test_rules_are_compiled_from_connection(connection):
+    """Test that thresholds, hysteresis and repeat intervals come from the alarm rules."""
+    rules = CompiledAlarmRules.from_connection(connection)
+
+    assert rules.high.threshold == 130
+    assert rules.high.clear == pytest.approx(117)
+    assert rules.low.threshold == 70
+    assert rules.low.clear == 80
+    assert rules.low.repeat == timedelta(days=1)
+    assert rules.fixed_low.threshold == 55
+    assert rules.fixed_low.repeat == timedelta(minutes=30)
+    assert rules.no_data == timedelta(minutes=20)
+
+
+def test_rules_fall_back_to_device_limits(connection):
+    """Test that the patient device limits are used when a rule has no threshold."""
+    connection.alarm_rules.h.th = 0
+    connection.alarm_rules.f.th = 0
+
+    rules = CompiledAlarmRules.from_connection(connection)
+
+    assert rules.high.threshold == connection.patient_device.hl
+    assert rules.fixed_low.threshold == 60
+
+
+@pytest.mark.parametrize("rule", ["h", "l"])
+def test_rules_switched_off_are_disabled(connection, rule):
+    """Test that a high or low alarm the patient has switched off has no threshold."""
+    getattr(connection.alarm_rules, rule).on = False
+
+    rules = CompiledAlarmRules.from_connection(connection)
+
+    assert (rules.high is None) == (rule == "h")
+    assert (rules.low is None) == (rule == "l")
+    assert rules.fixed_low is not None
+
+
+def test_recorded_connection_raises_high_alarm(connection, engine):
+    """Test that the recorded response, whose device alarms are off, still raises the follower's high alarm."""
+    assert connection.patient_device.alarms is False
+
+    assert states(engine.evaluate(connection.patient_id, reading(0, 300))) == [
+        (AlarmType.HIGH, AlarmState.RAISED)
+    ]
+
+
+def test_device_alarms_opt_in_disables_high_and_low(connection):
+    """Test that opting in to the device setting leaves only the fixed low and signal loss alarms."""
+    engine = AlarmEngine(device_alarms=True)
+    rules = CompiledAlarmRules.from_connection(connection, device_alarms=True)
+
+    assert rules.high is None
+    assert rules.low is None
+    assert rules.fixed_low.threshold == 55
+    assert rules.no_data == timedelta(minutes=20)
+
+    engine.register_connection(connection)
+    assert engine.evaluate(connection.patient_id, reading(0, 300)) == []
+
+    connection.patient_device.alarms = True
+    assert CompiledAlarmRules.from_connection(connection, device_alarms=True).high
+
+
+def test_on_flags_are_parsed(graph_response_json):
+    """Test that the on flags of the high and low rules are read from the response."""
+    rules = graph_response_json["data"]["connection"]["alarmRules"]
+    rules["h"]["on"] = False
+
+    parsed = GraphResponse.model_validate(graph_response_json).data.connection
+
+    assert parsed.alarm_rules.h.on is False
+    assert parsed.alarm_rules.l.on is True
+
+
+def test_high_alarm_uses_hysteresis(engine, connection):
+    """Test that a high alarm is raised once and only cleared below the hysteresis level."""
+    patient_id = connection.patient_id
+
+    assert states(engine.evaluate(patient_id, reading(0, 140))) == [
+        (AlarmType.HIGH, AlarmState.RAISED)
+    ]
+    assert engine.evaluate(patient_id, reading(5, 125)) == []
+    assert engine.evaluate(patient_id, reading(10, 135)) == []
+    assert states(engine.evaluate(patient_id, reading(15, 110))) == [
+        (AlarmType.HIGH, AlarmState.CLEARED)
+    ]
+
+
+def test_fixed_low_alarm_repeats_after_interval(engine, connection):
+    """Test that a persisting alarm is repeated only once its repeat interval has passed."""
+    patient_id = connection.patient_id
+
+    raised = engine.evaluate(patient_id, reading(0, 50))
+    assert set(states(raised)) == {
+        (AlarmType.LOW, AlarmState.RAISED),
+        (AlarmType.FIXED_LOW, AlarmState.RAISED),
+    }
+    assert engine.evaluate(patient_id, reading(15, 50)) == []
+    assert states(engine.evaluate(patient_id, reading(30, 50))) == [
+        (AlarmType.FIXED_LOW, AlarmState.REPEATED)
+    ]
+
+
+def test_duplicate_measurements_are_ignored(engine, connection):
+    """Test that polling the same measurement twice does not produce events."""
+    patient_id = connection.patient_id
+    engine.evaluate(patient_id, reading(0, 140))
+
+    assert engine.evaluate(patient_id, reading(0, 100)) == []
+    assert engine.patients[patient_id].active() == {AlarmType.HIGH}
+
+
+def test_signal_loss_is_raised_repeated_and_cleared(engine, connection):
+    """Test the signal loss alarm over a period without data."""
+    patient_id = connection.patient_id
+    engine.evaluate(patient_id, reading(0, 100))
+
+    assert engine.check_signal(START + timedelta(minutes=10)) == []
+    assert states(engine.check_signal(START + timedelta(minutes=20))) == [
+        (AlarmType.SIGNAL_LOSS, AlarmState.RAISED)
+    ]
+    assert engine.check_signal(START + timedelta(minutes=22)) == []
+    assert states(engine.check_signal(START + timedelta(minutes=25))) == [
+        (AlarmType.SIGNAL_LOSS, AlarmState.REPEATED)
+    ]
+    assert states(engine.evaluate(patient_id, reading(26, 100))) == [
+        (AlarmType.SIGNAL_LOSS, AlarmState.CLEARED)
+    ]
+
+
+def test_engine_evaluates_measurements_parsed_by_client(
+    mocked_responses, graph_response_json, connection
+):
+    """Test that attaching the engine as a hook evaluates each current measurement."""
+    received = []
+    engine = AlarmEngine(listeners=[received.append])
+    client = PyLibreLinkUp(email="parp", password="parp", hooks=[engine])
+    client.token = "not_a_token"
+    graph_response_json["data"]["connection"]["glucoseMeasurement"][
+        "ValueInMgPerDl"
+    ] = 200
+    mocked_responses.add(
+        responses.GET,
+        f"{client.api_url}/llu/connections/{connection.patient_id}/graph",
+        json=graph_response_json,
+    )
+
+    client.latest(connection.patient_id)
+
+    assert states(received) == [(AlarmType.HIGH, AlarmState.RAISED)]
+    assert received[0].value == 200
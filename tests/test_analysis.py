@@ -0,0 +1,130 @@
+import math
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from pylibrelinkup.analysis import (
+    HAS_NUMPY,
+    UNKNOWN,
+    analyse,
+    classify,
+    rate_of_change,
+    smoothed_rate_of_change,
+)
+from pylibrelinkup.models.data import Trend
+from pylibrelinkup.models.fast import FastGlucoseMeasurement, parse_graph_history
+
+START = datetime(2024, 11, 10, tzinfo=UTC)
+
+backends = pytest.mark.parametrize(
+    "use_numpy",
+    [
+        False,
+        pytest.param(
+            True, marks=pytest.mark.skipif(not HAS_NUMPY, reason="numpy not installed")
+        ),
+    ],
+    ids=["python", "numpy"],
+)
+
+
+def reading(minutes: float, value: float) -> FastGlucoseMeasurement:
+    timestamp = START + timedelta(minutes=minutes)
+    return FastGlucoseMeasurement(
+        factory_timestamp=timestamp,
+        timestamp=timestamp.replace(tzinfo=None),
+        value_in_mg_per_dl=value,
+        value=value,
+    )
+
+
+def as_list(values):
+    return [None if math.isnan(value) else pytest.approx(value) for value in values]
+
+
+@backends
+def test_rate_of_change_skips_first_point_and_gaps(use_numpy):
+    """Test that rates are per minute and are not computed across long gaps."""
+    rates = rate_of_change([0, 5, 10, 60], [100, 110, 105, 200], use_numpy=use_numpy)
+
+    assert as_list(rates) == [None, 2.0, -1.0, None]
+
+
+@backends
+def test_smoothed_rate_fits_a_line_through_the_window(use_numpy):
+    """Test that the smoothed rate is the least-squares slope of the trailing window."""
+    minutes = [0, 5, 10, 15, 20]
+    values = [100, 104, 111, 115, 121]
+
+    rates = smoothed_rate_of_change(minutes, values, window=3, use_numpy=use_numpy)
+
+    assert as_list(rates) == [None, None, 1.1, 1.1, 1.0]
+
+
+@backends
+def test_smoothed_rate_ignores_windows_spanning_a_gap(use_numpy):
+    """Test that windows containing a long interval have no smoothed rate."""
+    rates = smoothed_rate_of_change(
+        [0, 5, 10, 60, 65, 70], [100] * 6, window=3, use_numpy=use_numpy
+    )
+
+    assert as_list(rates) == [None, None, 0.0, None, None, 0.0]
+
+
+@backends
+def test_classify_maps_rates_to_trends(use_numpy):
+    """Test the thresholds between each trend category."""
+    codes = classify([math.nan, -3, -1.5, 0, 1.5, 2], use_numpy=use_numpy)
+
+    assert [int(code) for code in codes] == [
+        UNKNOWN,
+        Trend.DOWN_FAST,
+        Trend.DOWN_SLOW,
+        Trend.STABLE,
+        Trend.UP_SLOW,
+        Trend.UP_FAST,
+    ]
+
+
+@backends
+def test_analyse_sorts_measurements_and_classifies_smoothed_rates(use_numpy):
+    """Test that a whole series is analysed in timestamp order."""
+    measurements = [reading(minutes, 100 + minutes * 3) for minutes in range(0, 60, 5)]
+
+    analysis = analyse(reversed(measurements), use_numpy=use_numpy)
+
+    assert analysis.timestamps == [m.factory_timestamp for m in measurements]
+    assert analysis.trends[:2] == [None, None]
+    assert set(analysis.trends[2:]) == {Trend.UP_FAST}
+    assert as_list(analysis.rates)[1:] == [pytest.approx(3.0)] * 11
+
+
+def test_backends_agree_on_graph_data(graph_response_json):
+    """Test that the NumPy and pure Python backends give the same results on real data."""
+    pytest.importorskip("numpy")
+    history = parse_graph_history(graph_response_json)
+
+    python = analyse(history, use_numpy=False)
+    vectorised = analyse(history, use_numpy=True)
+
+    assert as_list(python.smoothed) == as_list(vectorised.smoothed)
+    assert python.trends == vectorised.trends
+
+
+def test_backends_agree_on_long_series():
+    """Test that the backends agree, and are exact for a straight line, over a year of one-minute readings."""
+    np = pytest.importorskip("numpy")
+    minutes = np.arange(365 * 24 * 60, dtype=float) + 28_000_000
+    values = 100 + 40 * np.sin(minutes / 90)
+
+    python = smoothed_rate_of_change(list(minutes), list(values), use_numpy=False)
+    vectorised = smoothed_rate_of_change(minutes, values, use_numpy=True)
+
+    assert np.allclose(vectorised, python, atol=1e-9, equal_nan=True)
+    line = smoothed_rate_of_change(minutes, 2.5 * minutes, use_numpy=True)
+    assert np.allclose(line[2:], 2.5, atol=1e-9)
+
+
+def test_empty_series():
+    """Test that an empty series gives an empty analysis."""
+    assert len(analyse([])) == 0
@@ -0,0 +1,168 @@
+from datetime import UTC, datetime, timedelta
+
+from pylibrelinkup.backfill import (
+    LOGBOOK_WINDOW,
+    Gap,
+    backfill,
+    find_gaps,
+    merge_measurements,
+)
+from pylibrelinkup.models.fast import FastGlucoseMeasurement
+
+NOW = datetime(2024, 11, 10, 12, 0, tzinfo=UTC)
+
+
+def reading(minutes_ago: float, value: float = 100) -> FastGlucoseMeasurement:
+    timestamp = NOW - timedelta(minutes=minutes_ago)
+    return FastGlucoseMeasurement(
+        factory_timestamp=timestamp,
+        timestamp=timestamp.replace(tzinfo=None),
+        value_in_mg_per_dl=value,
+        value=value,
+    )
+
+
+class FakeClient:
+    def __init__(self, graph=(), logbook=()):
+        self._graph = list(graph)
+        self._logbook = list(logbook)
+        self.calls = []
+
+    def graph(self, patient):
+        self.calls.append("graph")
+        return self._graph
+
+    def logbook(self, patient):
+        self.calls.append("logbook")
+        return self._logbook
+
+
+def test_find_gaps_reports_intervals_longer_than_cadence():
+    """Test that only intervals beyond cadence * tolerance count as gaps."""
+    series = [reading(0), reading(15), reading(30), reading(90)]
+
+    gaps = find_gaps(series, cadence=timedelta(minutes=15))
+
+    assert gaps == [Gap(reading(90).factory_timestamp, reading(30).factory_timestamp)]
+    assert gaps[0].duration == timedelta(minutes=60)
+
+
+def test_find_gaps_includes_leading_and_trailing_gaps():
+    """Test that explicit start and end bounds are treated as the edges of the series."""
+    series = [reading(60), reading(45)]
+
+    gaps = find_gaps(series, start=NOW - timedelta(hours=3), end=NOW)
+
+    assert [gap.duration for gap in gaps] == [timedelta(hours=2), timedelta(minutes=45)]
+
+
+def test_merge_measurements_sorts_and_deduplicates():
+    """Test that merging keeps one measurement per factory timestamp, preferring earlier series."""
+    original = reading(10, value=100)
+    duplicate = reading(10, value=200)
+
+    merged = merge_measurements([reading(0), original], [duplicate, reading(20)])
+
+    assert [m.factory_timestamp for m in merged] == sorted(
+        m.factory_timestamp for m in merged
+    )
+    assert len(merged) == 3
+    assert merged[1] is original
+
+
+def test_backfill_does_not_request_logbook_without_gaps():
+    """Test that a complete series does not touch the logbook endpoint."""
+    client = FakeClient(graph=[reading(0), reading(15), reading(30)])
+
+    result = backfill(client, "patient", now=NOW)
+
+    assert client.calls == ["graph"]
+    assert result.gaps == []
+    assert result.filled == []
+
+
+def test_backfill_fills_gaps_from_logbook():
+    """Test that logbook entries inside a gap are merged and the remainder is reported."""
+    stored = [reading(600), reading(0)]
+    in_gap = reading(300)
+    outside = reading(700)
+    client = FakeClient(logbook=[in_gap, outside, reading(0)])
+
+    result = backfill(client, "patient", measurements=stored, now=NOW)
+
+    assert client.calls == ["logbook"]
+    assert result.filled == [in_gap]
+    assert result.measurements == [stored[0], in_gap, stored[1]]
+    assert [gap.duration for gap in result.unfilled] == [timedelta(minutes=300)] * 2
+
+
+def test_backfill_skips_gaps_older_than_logbook_window():
+    """Test that gaps entirely outside the 14 day window are reported without a request."""
+    stored = [reading(60 * 24 * 20), reading(60 * 24 * 15)]
+    client = FakeClient()
+
+    result = backfill(
+        client,
+        "patient",
+        measurements=stored,
+        end=stored[1].factory_timestamp,
+        now=NOW,
+    )
+
+    assert client.calls == []
+    assert result.unfilled == result.gaps
+    assert len(result.gaps) == 1
+
+
+def test_backfill_fills_trailing_outage():
+    """Test that the gap from the last stored reading until now, e.g. while a poller was down, is filled."""
+    stored = [reading(615), reading(600)]
+    during_outage = [reading(400), reading(200)]
+    client = FakeClient(logbook=[reading(700), *during_outage])
+
+    result = backfill(client, "patient", measurements=stored, now=NOW)
+
+    assert client.calls == ["logbook"]
+    assert result.gaps == [Gap(stored[1].factory_timestamp, NOW)]
+    assert result.filled == during_outage
+    assert [gap.duration for gap in result.unfilled] == [timedelta(minutes=200)] * 3
+
+
+def test_backfill_reports_trailing_gap_it_cannot_fill():
+    """Test that the gap from the newest reading until now is reported even when the logbook has nothing for it."""
+    stored = [reading(75), reading(60)]
+    client = FakeClient()
+
+    result = backfill(client, "patient", measurements=stored, now=NOW)
+
+    assert client.calls == ["logbook"]
+    assert result.gaps == result.unfilled == [Gap(stored[1].factory_timestamp, NOW)]
+
+
+def test_backfill_fills_empty_history_from_logbook():
+    """Test that with no stored measurements the whole logbook window is a gap and the logbook is used."""
+    logbook = [reading(600), reading(300)]
+    client = FakeClient(logbook=logbook)
+
+    result = backfill(client, "patient", measurements=[], now=NOW)
+
+    assert client.calls == ["logbook"]
+    assert result.gaps == [Gap(NOW - LOGBOOK_WINDOW, NOW)]
+    assert result.filled == result.measurements == logbook
+
+
+def test_backfill_treats_naive_times_as_utc():
+    """Test that a naive now and end are compared with the aware factory timestamps as UTC."""
+    stored = [reading(615), reading(600)]
+    client = FakeClient(logbook=[reading(400)])
+
+    result = backfill(
+        client,
+        "patient",
+        measurements=stored,
+        end=NOW.replace(tzinfo=None),
+        now=NOW.replace(tzinfo=None),
+    )
+
+    assert result.gaps == [Gap(stored[1].factory_timestamp, NOW)]
+    assert result.filled == [reading(400)]
@@ -0,0 +1,112 @@
+import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from pylibrelinkup import PatientNotFoundError
+from pylibrelinkup.bulk import MeasurementColumns, parse_bulk, parse_payload
+from pylibrelinkup.models.connection import GraphResponse, LogbookResponse
+from pylibrelinkup.models.fast import parse_graph_history, parse_logbook
+
+
+@pytest.fixture
+def graph_payload(graph_response_json):
+    return json.dumps(graph_response_json).encode()
+
+
+@pytest.fixture
+def logbook_payload(logbook_response_json):
+    return json.dumps(logbook_response_json)
+
+
+def test_parse_payload_outputs(graph_payload, graph_response_json):
+    """Test that each output form holds the same graph history."""
+    fast = parse_payload(graph_payload, "graph", "fast")
+    columns = parse_payload(graph_payload, "graph", "columns")
+    model = parse_payload(graph_payload, "graph", "models")
+
+    assert fast == parse_graph_history(graph_response_json)
+    assert isinstance(model, GraphResponse)
+    assert len(columns) == len(fast)
+    assert list(columns.values_in_mg_per_dl) == [m.value_in_mg_per_dl for m in fast]
+    assert columns.measurements() == fast
+
+
+def test_columns_round_trip_logbook(logbook_payload, logbook_response_json):
+    """Test that logbook columns convert back to the same fast models."""
+    columns = parse_payload(logbook_payload, "logbook")
+
+    assert isinstance(columns, MeasurementColumns)
+    assert columns.measurements() == parse_logbook(logbook_response_json)
+
+
+def test_parse_payload_raises_for_unknown_patient(get_response_json):
+    """Test that a couldNotLoadPatient response raises PatientNotFoundError for every output."""
+    payload = json.dumps(get_response_json("patient_not_found.json"))
+
+    for output in ("columns", "fast"):
+        with pytest.raises(PatientNotFoundError):
+            parse_payload(payload, "graph", output)
+
+
+def test_parse_bulk_in_processes_keeps_order(graph_payload, graph_response_json):
+    """Test that payloads parsed across worker processes are returned in input order."""
+    payloads = []
+    for n in range(12):
+        data = json.loads(graph_payload)
+        data["data"]["graphData"] = data["data"]["graphData"][: n % 9]
+        payloads.append(json.dumps(data))
+
+    results = list(parse_bulk(payloads, max_workers=2, chunksize=3))
+
+    assert [len(columns) for columns in results] == [n % 9 for n in range(12)]
+
+
+def test_parse_bulk_return_exceptions(graph_payload, get_response_json):
+    """Test that errors cross the process boundary and are yielded in place when return_exceptions is set."""
+    not_found = json.dumps(get_response_json("patient_not_found.json"))
+    payloads = [graph_payload, not_found, b"not json", graph_payload]
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        results = list(
+            parse_bulk(
+                payloads, output="fast", executor=executor, return_exceptions=True
+            )
+        )
+        with pytest.raises(PatientNotFoundError):
+            list(parse_bulk(payloads, executor=executor))
+
+    assert isinstance(results[0], list)
+    assert isinstance(results[1], PatientNotFoundError)
+    assert isinstance(results[2], ValueError)
+    assert results[3] == results[0]
+
+
+def test_parse_bulk_models_with_thread_executor(logbook_payload):
+    """Test that any executor can be used, and that models can be returned."""
+    with ThreadPoolExecutor() as executor:
+        [result] = parse_bulk(
+            [logbook_payload], kind="logbook", output="models", executor=executor
+        )
+
+    assert isinstance(result, LogbookResponse)
+
+
+def test_parse_bulk_reads_payloads_lazily(logbook_payload):
+    """Test that payloads are read as results are consumed, not all before the first result."""
+    consumed = 0
+
+    def payloads():
+        nonlocal consumed
+        for _ in range(2000):
+            consumed += 1
+            yield logbook_payload
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = parse_bulk(
+            payloads(), kind="logbook", executor=executor, max_workers=2, chunksize=4
+        )
+        next(results)
+        assert consumed <= 2 * 2 * 4 + 4
+        assert sum(1 for _ in results) == 1999
+    assert consumed == 2000
@@ -0,0 +1,160 @@
+import gzip
+import json
+import time
+
+import pytest
+
+from pylibrelinkup import (
+    APIUrl,
+    LLUAPIConnectionError,
+    LLUAPIRateLimitError,
+    PyLibreLinkUp,
+)
+from pylibrelinkup.cassette import (
+    REDACTED,
+    Exchange,
+    RecordingTransport,
+    ReplayTransport,
+    load_cassette,
+    redact,
+)
+from pylibrelinkup.transport import InMemoryTransport
+
+URL = APIUrl.US.value
+
+
+@pytest.fixture
+def recorded(tmp_path, get_response_json, graph_response_json):
+    """Records a login, a graph request and a rate limited request to a cassette file."""
+    patient_id = graph_response_json["data"]["connection"]["patientId"]
+    upstream = InMemoryTransport()
+    upstream.add(
+        "POST", f"{URL}/llu/auth/login", json=get_response_json("login_response.json")
+    )
+    upstream.add(
+        "GET", f"{URL}/llu/connections/{patient_id}/graph", json=graph_response_json
+    )
+    upstream.add(
+        "GET", f"{URL}/llu/connections", status=429, headers={"Retry-After": "30"}
+    )
+    recorder = RecordingTransport(upstream)
+    client = PyLibreLinkUp(
+        email="me@example.com", password="hunter2", transport=recorder
+    )
+
+    client.authenticate()
+    client.graph(patient_id)
+    with pytest.raises(LLUAPIRateLimitError):
+        client.get_patients()
+
+    path = tmp_path / "cassette.ndjson.gz"
+    recorder.save(path)
+    return path, patient_id
+
+
+def test_redact_replaces_values_at_any_depth():
+    """Test that redaction replaces the values of sensitive keys in nested data."""
+    data = {
+        "data": {"authTicket": {"token": "abc"}, "users": [{"email": "a@b.c", "id": 1}]}
+    }
+
+    assert redact(data) == {
+        "data": {
+            "authTicket": {"token": REDACTED},
+            "users": [{"email": REDACTED, "id": 1}],
+        }
+    }
+    assert data["data"]["authTicket"]["token"] == "abc"
+
+
+def test_cassette_is_compressed_and_redacted(recorded):
+    """Test that the cassette is gzip compressed and contains no credentials."""
+    path, _ = recorded
+    text = gzip.open(path, "rt").read()
+
+    assert "hunter2" not in text
+    assert "me@example.com" not in text
+    assert "Bearer" not in text
+    exchanges = load_cassette(path)
+    assert [exchange.method for exchange in exchanges] == ["POST", "GET", "GET"]
+    assert exchanges[0].request_json == {"email": REDACTED, "password": REDACTED}
+    assert exchanges[0].json["data"]["authTicket"]["token"] == REDACTED
+    assert exchanges[2].headers == {"retry-after": "30"}
+
+
+def test_replay_serves_recorded_responses(recorded, graph_response_json):
+    """Test that a client using the replay transport gets the recorded responses."""
+    path, patient_id = recorded
+    client = PyLibreLinkUp(
+        email="", password="", transport=ReplayTransport.from_file(path)
+    )
+
+    client.authenticate()
+    graph = client.graph(patient_id)
+    with pytest.raises(LLUAPIRateLimitError) as exc_info:
+        client.get_patients()
+
+    assert client.token == REDACTED
+    assert len(graph) == len(graph_response_json["data"]["graphData"])
+    assert exc_info.value.retry_after == 30
+
+
+def test_replay_repeats_or_runs_out():
+    """Test that responses for a URL are served in order, and repeated only if repeat is set."""
+    exchanges = [
+        Exchange("GET", f"{URL}/a", 200, json={"n": 1}),
+        Exchange("GET", f"{URL}/a", 200, json={"n": 2}),
+    ]
+
+    def bodies(transport, count):
+        return [
+            transport.request("GET", f"{URL}/a", {}, None, (None, None)).content
+            for _ in range(count)
+        ]
+
+    assert bodies(ReplayTransport(exchanges), 3) == [
+        b'{"n": 1}',
+        b'{"n": 2}',
+        b'{"n": 1}',
+    ]
+    once = ReplayTransport(exchanges, repeat=False)
+    bodies(once, 2)
+    with pytest.raises(LLUAPIConnectionError):
+        bodies(once, 1)
+
+
+def test_replay_with_original_timing():
+    """Test that the headers and body are delayed by their recorded times divided by the speed."""
+    exchanges = [Exchange("GET", f"{URL}/a", 200, ttfb=0.1, download=0.2, json={})]
+
+    started = time.perf_counter()
+    r = ReplayTransport(exchanges, speed=2).request(
+        "GET", f"{URL}/a", {}, None, (None, None)
+    )
+
+    assert time.perf_counter() - started >= 0.15
+    assert 0.05 <= r.ttfb < 0.15
+    assert r.download >= 0.1
+
+
+def test_load_cassette_ignores_unknown_keys(tmp_path):
+    """Test that cassettes with keys this version does not use, e.g. from earlier versions, still load."""
+    path = tmp_path / "old.ndjson"
+    path.write_text(
+        json.dumps(
+            {
+                "method": "GET",
+                "url": f"{URL}/a",
+                "status_code": 200,
+                "offset": 1.5,
+                "duration": 0.2,
+                "json": {"n": 1},
+            }
+        )
+        + "\n"
+    )
+
+    [exchange] = load_cassette(path)
+
+    assert exchange.json == {"n": 1}
+    assert exchange.ttfb == exchange.download == 0.0
@@ -0,0 +1,242 @@
+import pytest
+import requests
+import responses
+
+from pylibrelinkup import (
+    APIUrl,
+    CircuitOpenError,
+    DeadlineExceededError,
+    LLUAPITimeoutError,
+    PyLibreLinkUp,
+)
+from pylibrelinkup.circuit import CircuitBreaker, CircuitBreakers, CircuitState
+from pylibrelinkup.pool import ClientPool
+from pylibrelinkup.transport import Transport
+from tests.factories import PatientFactory
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    """Test that the breaker opens after failure_threshold failures in a row and fails fast."""
+    breaker = CircuitBreaker("eu", failure_threshold=3, reset_timeout=10, clock=clock)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    breaker.before_call()
+    breaker.record_success()
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+
+    assert breaker.state is CircuitState.OPEN
+    clock.now = 4
+    with pytest.raises(CircuitOpenError) as exc_info:
+        breaker.before_call()
+    assert exc_info.value.state == "open"
+    assert exc_info.value.retry_after == 6
+
+
+def test_breaker_counts_slow_calls_as_failures(clock):
+    """Test that successes slower than slow_call_duration open the breaker."""
+    breaker = CircuitBreaker(
+        "eu", failure_threshold=2, slow_call_duration=1, clock=clock
+    )
+    breaker.record_success(0.5)
+    breaker.record_success(1.5)
+    assert breaker.state is CircuitState.CLOSED
+    breaker.record_success(2)
+
+    assert breaker.state is CircuitState.OPEN
+
+
+def test_breaker_half_open_limits_probes_and_closes(clock):
+    """Test that only half_open_probes requests are let through, and that their success closes the breaker."""
+    breaker = CircuitBreaker(
+        "eu", failure_threshold=1, reset_timeout=10, half_open_probes=2, clock=clock
+    )
+    breaker.record_failure()
+    clock.now = 10
+
+    assert breaker.state is CircuitState.HALF_OPEN
+    breaker.before_call()
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError) as exc_info:
+        breaker.before_call()
+    assert exc_info.value.state == "half_open"
+
+    breaker.record_success()
+    breaker.record_success()
+    assert breaker.state is CircuitState.CLOSED
+
+
+def test_breaker_half_open_failure_reopens(clock):
+    """Test that a failed probe re-opens the breaker for another reset_timeout."""
+    breaker = CircuitBreaker("eu", failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 10
+    breaker.before_call()
+    breaker.record_failure()
+
+    assert breaker.state is CircuitState.OPEN
+    clock.now = 19
+    assert breaker.state is CircuitState.OPEN
+    clock.now = 20
+    assert breaker.state is CircuitState.HALF_OPEN
+
+
+def test_breaker_release_frees_probe(clock):
+    """Test that a released probe lets another request through."""
+    breaker = CircuitBreaker("eu", failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 10
+    breaker.before_call()
+    breaker.release()
+    breaker.before_call()
+
+    assert breaker.state is CircuitState.HALF_OPEN
+
+
+def test_breakers_are_per_api_url():
+    """Test that the registry keeps a separate breaker for each API URL."""
+    breakers = CircuitBreakers(failure_threshold=1)
+    breakers.get(APIUrl.EU).record_failure()
+
+    assert breakers.get(APIUrl.EU) is breakers.get(APIUrl.EU)
+    assert breakers.states() == {APIUrl.EU: CircuitState.OPEN}
+    assert breakers.get(APIUrl.US).state is CircuitState.CLOSED
+
+
+def make_client(breakers, api_url=APIUrl.US):
+    client = PyLibreLinkUp(
+        email="parp", password="parp", api_url=api_url, circuit_breakers=breakers
+    )
+    client.token = "not_a_token"
+    return client
+
+
+def test_client_fails_fast_after_server_errors(mocked_responses, clock):
+    """Test that 5xx responses open the breaker and later requests are not sent."""
+    breakers = CircuitBreakers(failure_threshold=2, reset_timeout=30, clock=clock)
+    client = make_client(breakers)
+    mocked_responses.get(f"{client.api_url}/llu/connections", status=503)
+
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            client.get_patients()
+    with pytest.raises(CircuitOpenError) as exc_info:
+        client.get_patients()
+
+    assert exc_info.value.api_url == client.api_url
+    assert exc_info.value.retry_after == 30
+    assert len(mocked_responses.calls) == 2
+
+
+def test_client_counts_connection_errors(mocked_responses, clock):
+    """Test that connection errors are recorded as failures."""
+    breakers = CircuitBreakers(failure_threshold=1, clock=clock)
+    client = make_client(breakers)
+    mocked_responses.get(
+        f"{client.api_url}/llu/connections", body=requests.ConnectionError("down")
+    )
+
+    with pytest.raises(requests.ConnectionError):
+        client.get_patients()
+
+    assert breakers.get(client.api_url).state is CircuitState.OPEN
+
+
+class TimingOutTransport(Transport):
+    def request(self, method, url, headers, json_body, timeout):
+        raise LLUAPITimeoutError(f"{method} {url} timed out")
+
+
+@pytest.mark.parametrize("seconds", [None, 0.05])
+def test_client_counts_only_upstream_timeouts(clock, seconds):
+    """Test that a timeout opens the breaker unless it was shortened to fit the caller's deadline."""
+    breakers = CircuitBreakers(failure_threshold=1, clock=clock)
+    client = PyLibreLinkUp(
+        email="parp",
+        password="parp",
+        circuit_breakers=breakers,
+        transport=TimingOutTransport(),
+    )
+    client.token = "not_a_token"
+
+    if seconds is None:
+        with pytest.raises(LLUAPITimeoutError) as exc_info:
+            client.get_patients()
+        assert not isinstance(exc_info.value, DeadlineExceededError)
+        assert breakers.get(client.api_url).state is CircuitState.OPEN
+    else:
+        with client.deadline(seconds), pytest.raises(DeadlineExceededError):
+            client.get_patients()
+        assert breakers.get(client.api_url).state is CircuitState.CLOSED
+
+
+def test_client_ignores_client_errors(mocked_responses, clock):
+    """Test that 4xx responses, including 429, do not open the breaker."""
+    breakers = CircuitBreakers(failure_threshold=1, clock=clock)
+    client = make_client(breakers)
+    mocked_responses.get(f"{client.api_url}/llu/connections", status=429)
+
+    with pytest.raises(Exception):
+        client.get_patients()
+
+    assert breakers.get(client.api_url).state is CircuitState.CLOSED
+
+
+def test_client_half_open_probe_closes_breaker(
+    mocked_responses, clock, graph_response_json
+):
+    """Test that a successful probe after the reset timeout closes the breaker."""
+    breakers = CircuitBreakers(failure_threshold=1, reset_timeout=30, clock=clock)
+    client = make_client(breakers)
+    patient_id = graph_response_json["data"]["connection"]["patientId"]
+    breakers.get(client.api_url).record_failure()
+    mocked_responses.get(
+        f"{client.api_url}/llu/connections/{patient_id}/graph",
+        json=graph_response_json,
+    )
+
+    clock.now = 30
+    client.latest(patient_id)
+
+    assert breakers.get(client.api_url).state is CircuitState.CLOSED
+
+
+def test_pool_fails_over_when_region_circuit_is_open(
+    mocked_responses, graph_response_json
+):
+    """Test that the pool routes around an account whose region's breaker is open."""
+    patient = PatientFactory.build()
+    breakers = CircuitBreakers(failure_threshold=1)
+    eu, us = make_client(breakers, APIUrl.EU), make_client(breakers, APIUrl.US)
+    for client in (eu, us):
+        mocked_responses.get(
+            f"{client.api_url}/llu/connections",
+            json={
+                "status": 0,
+                "data": [patient.model_dump(mode="json", by_alias=True)],
+            },
+        )
+    pool = ClientPool([eu, us], rate=1, burst=5)
+    pool.refresh_index()
+    breakers.get(APIUrl.EU).record_failure()
+    mocked_responses.get(
+        f"{us.api_url}/llu/connections/{patient.patient_id}/graph",
+        json=graph_response_json,
+    )
+
+    assert len(pool.graph(patient)) == len(graph_response_json["data"]["graphData"])
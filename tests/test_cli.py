@@ -0,0 +1,147 @@
+import io
+import json
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+import responses
+
+from pylibrelinkup import APIUrl
+from pylibrelinkup.cli import dump, main, watch
+from pylibrelinkup.models.data import Trend
+from pylibrelinkup.models.fast import (
+    FastGlucoseMeasurement,
+    FastGlucoseMeasurementWithTrend,
+)
+from tests.factories import PatientFactory
+
+START = datetime(2024, 11, 10, tzinfo=UTC)
+
+
+def measurement(minutes: int, cls=FastGlucoseMeasurementWithTrend, **kwargs):
+    timestamp = START + timedelta(minutes=minutes)
+    return cls(
+        factory_timestamp=timestamp,
+        timestamp=timestamp.replace(tzinfo=None),
+        value_in_mg_per_dl=100 + minutes,
+        value=100 + minutes,
+        **kwargs,
+    )
+
+
+class FakeClient:
+    def __init__(self, patients, latest=(), graph=()):
+        self.patients = patients
+        self.patient_directory = None
+        self._latest = list(latest)
+        self._graph = list(graph)
+
+    def get_patients(self):
+        return self.patients
+
+    def latest(self, patient_id):
+        result = self._latest.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def graph(self, patient_id):
+        return self._graph
+
+
+def lines(out):
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_watch_writes_only_new_readings():
+    """Test that repeated readings are skipped and failures are reported on stderr."""
+    patient = PatientFactory.build()
+    client = FakeClient(
+        [patient],
+        latest=[
+            measurement(0, trend=Trend.UP_SLOW),
+            measurement(0),
+            RuntimeError("boom"),
+            measurement(1),
+        ],
+    )
+    out, err = io.StringIO(), io.StringIO()
+    sleeps = []
+
+    watch(client, out=out, err=err, iterations=4, interval=5, sleep=sleeps.append)
+
+    records = lines(out)
+    assert [record["value"] for record in records] == [100, 101]
+    assert records[0] == {
+        "patient_id": str(patient.patient_id),
+        "factory_timestamp": "2024-11-10T00:00:00+00:00",
+        "timestamp": "2024-11-10T00:00:00",
+        "value": 100,
+        "value_in_mg_per_dl": 100,
+        "trend": "UP_SLOW",
+    }
+    assert "boom" in err.getvalue()
+    assert sleeps == [5, 5, 5]
+
+
+def test_dump_writes_every_measurement_for_selected_patients():
+    """Test that dump writes one line per measurement and resolves patient ids."""
+    patient_id = uuid4()
+    client = FakeClient(
+        [],
+        graph=[measurement(minutes, FastGlucoseMeasurement) for minutes in range(3)],
+    )
+    out = io.StringIO()
+
+    count = dump(client, "graph", [str(patient_id)], out=out)
+
+    records = lines(out)
+    assert count == 3
+    assert {record["patient_id"] for record in records} == {str(patient_id)}
+    assert "trend" not in records[0]
+
+
+def test_main_requires_credentials(monkeypatch):
+    """Test that the CLI exits with a usage error when credentials are missing."""
+    monkeypatch.delenv("LIBRELINKUP_EMAIL", raising=False)
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(["watch"])
+
+    assert exc_info.value.code == 2
+
+
+def test_main_dumps_logbook(
+    monkeypatch, capsys, mocked_responses, get_response_json, logbook_response_json
+):
+    """Test the dump command end to end against the mocked API."""
+    monkeypatch.setenv("LIBRELINKUP_EMAIL", "parp")
+    monkeypatch.setenv("LIBRELINKUP_PASSWORD", "parp")
+    patient = PatientFactory.build()
+    mocked_responses.add(
+        responses.POST,
+        f"{APIUrl.EU.value}/llu/auth/login",
+        json=get_response_json("login_response.json"),
+    )
+    # The patient id is checked against the followed patients before it is used.
+    mocked_responses.add(
+        responses.GET,
+        f"{APIUrl.EU.value}/llu/connections",
+        json={
+            "status": 0,
+            "data": [patient.model_dump(mode="json", by_alias=True)],
+        },
+    )
+    mocked_responses.add(
+        responses.GET,
+        f"{APIUrl.EU.value}/llu/connections/{patient.patient_id}/logbook",
+        json=logbook_response_json,
+    )
+
+    status = main(
+        ["--region", "EU", "dump", "logbook", "--patient", str(patient.patient_id)]
+    )
+
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert status == 0
+    assert len(records) == len(logbook_response_json["data"])
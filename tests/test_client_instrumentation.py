@@ -0,0 +1,199 @@
+from uuid import UUID
+
+import pytest
+import responses
+
+from pylibrelinkup import (
+    APIUrl,
+    LLUAPIRateLimitError,
+    PatientNotFoundError,
+    PyLibreLinkUp,
+    RedirectError,
+    RequestHooks,
+)
+from pylibrelinkup.models.connection import GraphResponse
+
+
+class RecordingHooks(RequestHooks):
+    def __init__(self):
+        self.calls = []
+
+    def on_request_start(self, event):
+        self.calls.append(("start", event))
+
+    def on_response(self, event):
+        self.calls.append(("response", event))
+
+    def on_parsed(self, event, result):
+        self.calls.append(("parsed", event, result))
+
+    def on_error(self, event, error):
+        self.calls.append(("error", event, error))
+
+
+@pytest.fixture
+def recording_hooks(pylibrelinkup_client):
+    hooks = RecordingHooks()
+    pylibrelinkup_client.client.hooks.append(hooks)
+    return hooks
+
+
+def test_client_accepts_hooks_in_constructor():
+    """Test that hooks passed to the constructor are registered on the client."""
+    hooks = RecordingHooks()
+    client = PyLibreLinkUp(email="parp", password="parp", hooks=[hooks])
+    assert client.hooks == [hooks]
+
+
+def test_graph_emits_events_with_phase_timings(
+    mocked_responses, graph_response_json, pylibrelinkup_client, recording_hooks
+):
+    """Test that graph emits start, response and parsed events describing the request."""
+    patient_id = UUID("12345678-1234-5678-1234-567812345678")
+    url = f"{pylibrelinkup_client.api_url.value}/llu/connections/{patient_id}/graph"
+    mocked_responses.add(responses.GET, url, json=graph_response_json, status=200)
+    pylibrelinkup_client.client.token = "not_a_token"
+
+    pylibrelinkup_client.client.graph(patient_id)
+
+    assert [call[0] for call in recording_hooks.calls] == [
+        "start",
+        "response",
+        "parsed",
+    ]
+    event = recording_hooks.calls[-1][1]
+    assert event.endpoint == "graph"
+    assert event.url == url
+    assert event.patient_id == patient_id
+    assert event.region == pylibrelinkup_client.api_url.name
+    assert event.status_code == 200
+    assert event.bytes_received > 0
+    assert event.retry_count == 0
+    for phase in ("ttfb", "download", "decode", "validate"):
+        assert getattr(event.timings, phase) >= 0
+    assert isinstance(recording_hooks.calls[-1][2], GraphResponse)
+
+
+def test_rate_limited_request_emits_response_and_error(
+    mocked_responses, pylibrelinkup_client, recording_hooks
+):
+    """Test that a 429 response is reported to on_response before on_error."""
+    patient_id = UUID("12345678-1234-5678-1234-567812345678")
+    mocked_responses.add(
+        responses.GET,
+        f"{pylibrelinkup_client.api_url.value}/llu/connections/{patient_id}/logbook",
+        status=429,
+    )
+    pylibrelinkup_client.client.token = "not_a_token"
+
+    with pytest.raises(LLUAPIRateLimitError):
+        pylibrelinkup_client.client.logbook(patient_id)
+
+    assert [call[0] for call in recording_hooks.calls] == [
+        "start",
+        "response",
+        "error",
+    ]
+    assert recording_hooks.calls[1][1].status_code == 429
+    assert isinstance(recording_hooks.calls[-1][2], LLUAPIRateLimitError)
+
+
+def test_validation_failure_emits_error(
+    mocked_responses, pylibrelinkup_client, recording_hooks, get_response_json
+):
+    """Test that errors raised during validation are reported to on_error."""
+    patient_id = UUID("12345678-1234-5678-1234-567812345678")
+    mocked_responses.add(
+        responses.GET,
+        f"{pylibrelinkup_client.api_url.value}/llu/connections/{patient_id}/graph",
+        json=get_response_json("patient_not_found.json"),
+        status=200,
+    )
+    pylibrelinkup_client.client.token = "not_a_token"
+
+    with pytest.raises(PatientNotFoundError):
+        pylibrelinkup_client.client.latest(patient_id)
+
+    event = recording_hooks.calls[-1][1]
+    assert recording_hooks.calls[-1][0] == "error"
+    assert isinstance(event.error, PatientNotFoundError)
+    assert event.timings.validate is None
+
+
+def test_authenticate_emits_login_events(
+    mocked_responses, pylibrelinkup_client, recording_hooks, get_response_json
+):
+    """Test that authenticate reports a POST to the login endpoint."""
+    mocked_responses.add(
+        responses.POST,
+        f"{pylibrelinkup_client.api_url.value}/llu/auth/login",
+        json=get_response_json("login_response.json"),
+        status=200,
+    )
+
+    pylibrelinkup_client.client.authenticate()
+
+    event = recording_hooks.calls[-1][1]
+    assert recording_hooks.calls[-1][0] == "parsed"
+    assert event.endpoint == "login"
+    assert event.method == "POST"
+
+
+def test_login_after_redirect_counts_as_retry(mocked_responses, get_response_json):
+    """Test that the login repeated at the regional URL with the redirect count has a retry count of 1."""
+    hooks = RecordingHooks()
+    client = PyLibreLinkUp(email="parp", password="parp", hooks=[hooks])
+    redirect = get_response_json("redirect_response.json")
+    mocked_responses.add(
+        responses.POST, f"{client.api_url}/llu/auth/login", json=redirect
+    )
+    region = APIUrl.from_string(redirect["data"]["region"].upper())
+    mocked_responses.add(
+        responses.POST,
+        f"{region.value}/llu/auth/login",
+        json=get_response_json("login_response.json"),
+    )
+
+    with pytest.raises(RedirectError) as exc_info:
+        client.authenticate()
+    client.api_url = region.value
+    client.authenticate(retry_count=exc_info.value.redirects)
+    client.authenticate()
+
+    starts = [call[1] for call in hooks.calls if call[0] == "start"]
+    assert [event.retry_count for event in starts] == [0, 1, 0]
+
+
+def test_redirect_does_not_change_retry_count_of_other_logins(
+    mocked_responses, get_response_json
+):
+    """Test that a redirect seen by one caller is not reported as a retry by a login another caller makes next."""
+    hooks = RecordingHooks()
+    client = PyLibreLinkUp(email="parp", password="parp", hooks=[hooks])
+    mocked_responses.add(
+        responses.POST,
+        f"{client.api_url}/llu/auth/login",
+        json=get_response_json("redirect_response.json"),
+    )
+
+    for _ in range(2):
+        with pytest.raises(RedirectError):
+            client.authenticate()
+
+    starts = [call[1] for call in hooks.calls if call[0] == "start"]
+    assert [event.retry_count for event in starts] == [0, 0]
+
+
+def test_endpoint_labels_do_not_depend_on_the_caller(
+    mocked_responses, pylibrelinkup_client, recording_hooks
+):
+    """Test that a request made without an event is labelled like the same request made with one."""
+    url = f"{pylibrelinkup_client.api_url.value}/llu/connections"
+    mocked_responses.add(responses.GET, url, json={"status": 0, "data": []})
+    pylibrelinkup_client.client.token = "not_a_token"
+
+    pylibrelinkup_client.client.get_patients()
+    pylibrelinkup_client.client._call_api(url)
+
+    starts = [call[1] for call in recording_hooks.calls if call[0] == "start"]
+    assert [event.endpoint for event in starts] == ["connections", "connections"]
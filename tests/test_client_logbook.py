@@ -111,11 +111,6 @@ def test_logbook_raises_value_error_for_invalid_patient_id_type(pylibrelinkup_cl
         pylibrelinkup_client.client.logbook(123456)  # type: ignore
 
 
-@pytest.fixture
-def logbook_response_json(get_response_json):
-    return get_response_json("logbook_response.json")
-
-
 def test_patient_id_not_found_raises_patient_not_found_error(
     mocked_responses, pylibrelinkup_client, get_response_json
 ):
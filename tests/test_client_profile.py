@@ -0,0 +1,123 @@
+import cProfile
+import tracemalloc
+from uuid import UUID
+
+import pytest
+import responses
+
+from pylibrelinkup import PatientNotFoundError, RequestEvent, profiling
+from pylibrelinkup.profiling import ClientProfiler, ProfileReport
+
+
+@pytest.fixture
+def graph_url(pylibrelinkup_client):
+    patient_id = UUID("12345678-1234-5678-1234-567812345678")
+    return (
+        patient_id,
+        f"{pylibrelinkup_client.api_url.value}/llu/connections/{patient_id}/graph",
+    )
+
+
+def test_profile_reports_phases_per_endpoint(
+    mocked_responses, graph_response_json, pylibrelinkup_client, graph_url
+):
+    """Test that profile collects function, phase and allocation stats per endpoint."""
+    patient_id, url = graph_url
+    mocked_responses.add(responses.GET, url, json=graph_response_json, status=200)
+    pylibrelinkup_client.client.token = "not_a_token"
+
+    with pylibrelinkup_client.client.profile(top=5) as profiler:
+        pylibrelinkup_client.client.graph(patient_id)
+        pylibrelinkup_client.client.graph(patient_id)
+
+    report = profiler.report()
+
+    assert isinstance(report, ProfileReport)
+    graph = report.endpoints["graph"]
+    assert graph.calls == 2
+    assert graph.phases["validate"] > 0
+    assert graph.phases["model_validate"] > 0
+    assert graph.phases["parse_timestamp"] > 0
+    assert len(graph.top_functions) == 5
+    assert graph.top_allocations
+    assert "== graph (2 calls)" in str(report)
+
+
+def test_profile_removes_hooks_and_stops_tracemalloc(
+    mocked_responses, graph_response_json, pylibrelinkup_client, graph_url
+):
+    """Test that profiling is switched off when the block exits."""
+    patient_id, url = graph_url
+    mocked_responses.add(responses.GET, url, json=graph_response_json, status=200)
+    pylibrelinkup_client.client.token = "not_a_token"
+
+    with pylibrelinkup_client.client.profile() as profiler:
+        assert profiler in pylibrelinkup_client.client.hooks
+        assert tracemalloc.is_tracing()
+
+    assert profiler not in pylibrelinkup_client.client.hooks
+    assert not tracemalloc.is_tracing()
+
+    pylibrelinkup_client.client.graph(patient_id)
+    assert profiler.report().endpoints == {}
+
+
+def test_profile_includes_failed_requests(
+    mocked_responses, pylibrelinkup_client, graph_url, get_response_json
+):
+    """Test that requests which fail are still profiled."""
+    patient_id, url = graph_url
+    mocked_responses.add(
+        responses.GET,
+        url,
+        json=get_response_json("patient_not_found.json"),
+        status=200,
+    )
+    pylibrelinkup_client.client.token = "not_a_token"
+
+    with pylibrelinkup_client.client.profile(trace_allocations=False) as profiler:
+        with pytest.raises(PatientNotFoundError):
+            pylibrelinkup_client.client.latest(patient_id)
+
+    graph = profiler.report().endpoints["graph"]
+    assert graph.calls == 1
+    assert graph.top_allocations == []
+
+
+def test_profiler_skips_overlapping_requests():
+    """Test that a request starting while another is profiled is skipped rather than nested."""
+    profiler = ClientProfiler(trace_allocations=False)
+    first = RequestEvent(endpoint="graph", region="EU")
+    second = RequestEvent(endpoint="graph", region="EU")
+
+    profiler.on_request_start(first)
+    profiler.on_request_start(second)
+    profiler.on_parsed(second, None)
+    profiler.on_parsed(first, None)
+
+    report = profiler.report()
+    assert report.skipped == 1
+    assert report.endpoints["graph"].calls == 1
+
+
+def test_profile_skips_requests_when_another_profiler_is_active(
+    mocked_responses, graph_response_json, pylibrelinkup_client, graph_url, monkeypatch
+):
+    """Test that a request still succeeds, and is counted as skipped, if cProfile refuses to start."""
+
+    class ActiveProfilerElsewhere(cProfile.Profile):
+        def enable(self, *args, **kwargs):
+            # What Python 3.12 and later raise when another profiler is active.
+            raise ValueError("Another profiling tool is already active")
+
+    monkeypatch.setattr(profiling.cProfile, "Profile", ActiveProfilerElsewhere)
+    patient_id, url = graph_url
+    mocked_responses.add(responses.GET, url, json=graph_response_json, status=200)
+    pylibrelinkup_client.client.token = "not_a_token"
+
+    with pylibrelinkup_client.client.profile() as profiler:
+        assert pylibrelinkup_client.client.graph(patient_id)
+
+    report = profiler.report()
+    assert report.skipped == 1
+    assert report.endpoints == {}
@@ -0,0 +1,102 @@
+import copy
+import hashlib
+import itertools
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import responses
+
+from pylibrelinkup import APIUrl, PyLibreLinkUp
+
+
+def test_headers_are_read_only_snapshot():
+    """Test that the request headers cannot be modified and are replaced on login."""
+    client = PyLibreLinkUp(email="parp", password="parp")
+    before = client._get_headers()
+
+    with pytest.raises(TypeError):
+        before["authorization"] = "Bearer nope"
+
+    client._set_credentials("parp", "xx")
+    after = client._get_headers()
+    assert "authorization" not in before
+    assert after["authorization"] == "Bearer parp"
+    assert after["account-id"] == hashlib.sha256(b"xx").hexdigest()
+    assert client._get_headers() is after
+
+
+def test_patient_urls_are_cached_per_api_url(graph_response_json):
+    """Test that patient URLs are built once, and rebuilt when the API URL changes."""
+    patient_id = graph_response_json["data"]["connection"]["patientId"]
+    client = PyLibreLinkUp(email="parp", password="parp", api_url=APIUrl.US)
+
+    urls = client._patient_urls(patient_id)
+    assert client._patient_urls(patient_id) is urls
+    assert urls.graph == f"{APIUrl.US.value}/llu/connections/{patient_id}/graph"
+
+    client.api_url = APIUrl.EU.value
+    assert client._patient_urls(patient_id).logbook == (
+        f"{APIUrl.EU.value}/llu/connections/{patient_id}/logbook"
+    )
+
+
+def test_concurrent_graph_and_authenticate(
+    mocked_responses, graph_response_json, get_response_json
+):
+    """Test that one client can be shared by threads calling graph while others log in again.
+
+    Every login returns a new token and account id, and each graph request must carry a matching pair.
+    """
+    client = PyLibreLinkUp(email="parp", password="parp", api_url=APIUrl.EU)
+    patient_id = graph_response_json["data"]["connection"]["patientId"]
+    login_template = get_response_json("login_response.json")
+    logins = itertools.count()
+    expected_hashes: dict[str, str] = {}
+    mismatches = []
+    lock = threading.Lock()
+
+    def login(request):
+        login_json = copy.deepcopy(login_template)
+        with lock:
+            n = next(logins)
+            token = f"token-{n}"
+            account_id = f"account-{n}"
+            expected_hashes[f"Bearer {token}"] = hashlib.sha256(
+                account_id.encode()
+            ).hexdigest()
+        login_json["data"]["authTicket"]["token"] = token
+        login_json["data"]["user"]["id"] = account_id
+        return 200, {}, json.dumps(login_json)
+
+    def graph(request):
+        authorization = request.headers["authorization"]
+        with lock:
+            if expected_hashes[authorization] != request.headers["account-id"]:
+                mismatches.append(authorization)
+        return 200, {}, json.dumps(graph_response_json)
+
+    mocked_responses.add_callback(
+        responses.POST, f"{client.api_url}/llu/auth/login", callback=login
+    )
+    mocked_responses.add_callback(
+        responses.GET,
+        f"{client.api_url}/llu/connections/{patient_id}/graph",
+        callback=graph,
+    )
+    client.authenticate()
+
+    def work(i):
+        if i % 5 == 0:
+            client.authenticate()
+            return None
+        return len(client.graph(patient_id))
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(work, range(200)))
+
+    assert not mismatches
+    assert next(logins) == 41
+    expected = len(graph_response_json["data"]["graphData"])
+    assert all(result in (None, expected) for result in results)
@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+import pytest
+import requests
+import responses
+
+from pylibrelinkup import LLUAPITimeoutError, PyLibreLinkUp
+from pylibrelinkup.deadline import deadline, remaining
+from pylibrelinkup.pool import authenticate_all
+from pylibrelinkup.ratelimit import TokenBucket
+
+
+@pytest.fixture
+def client():
+    client = PyLibreLinkUp(
+        email="parp", password="parp", connect_timeout=3, read_timeout=20
+    )
+    client.token = "not_a_token"
+    return client
+
+
+def add_connections(mocked_responses, client, **kwargs):
+    kwargs.setdefault("json", {"status": 0, "data": []})
+    mocked_responses.add(responses.GET, f"{client.api_url}/llu/connections", **kwargs)
+
+
+def test_requests_use_configured_timeouts(mocked_responses, client):
+    """Test that the connect and read timeouts are passed to every request."""
+    add_connections(mocked_responses, client)
+
+    client.get_patients()
+
+    assert mocked_responses.calls[0].request.req_kwargs["timeout"] == (3, 20)
+
+
+def test_deadline_shortens_timeouts(mocked_responses, client):
+    """Test that timeouts are capped by the time left before the deadline."""
+    add_connections(mocked_responses, client)
+
+    with client.deadline(1):
+        client.get_patients()
+
+    connect, read = mocked_responses.calls[0].request.req_kwargs["timeout"]
+    assert 0 < connect <= 1
+    assert 0 < read <= 1
+
+
+def test_expired_deadline_raises_before_sending(client):
+    """Test that no request is sent once the deadline has passed."""
+    with pytest.raises(LLUAPITimeoutError):
+        with client.deadline(0):
+            client.get_patients()
+
+
+def test_transport_timeout_is_translated(mocked_responses, client):
+    """Test that a requests timeout is raised as LLUAPITimeoutError."""
+    mocked_responses.add(
+        responses.GET,
+        f"{client.api_url}/llu/connections",
+        body=requests.ReadTimeout(),
+    )
+
+    with pytest.raises(LLUAPITimeoutError) as exc_info:
+        client.get_patients()
+
+    assert isinstance(exc_info.value, TimeoutError)
+    assert isinstance(exc_info.value.__cause__, requests.Timeout)
+
+
+def test_rate_limiter_wait_counts_against_deadline(client):
+    """Test that waiting for the rate limiter stops at the deadline."""
+    client.rate_limiter = TokenBucket(rate=0.01)
+    client.rate_limiter.pause(60)
+    started = time.monotonic()
+
+    with pytest.raises(LLUAPITimeoutError):
+        with client.deadline(0.05):
+            client.get_patients()
+
+    assert time.monotonic() - started < 5
+
+
+def test_nested_deadlines_keep_the_earliest():
+    """Test that an inner deadline cannot extend an outer one."""
+    assert remaining() is None
+    with deadline(1) as outer:
+        with deadline(10) as inner:
+            assert inner == outer
+        with deadline(0.5) as inner:
+            assert inner < outer
+    assert remaining() is None
+
+
+def test_deadline_follows_threads_and_tasks():
+    """Test that the deadline applies in authenticate_all workers and asyncio.to_thread."""
+    seen = []
+
+    class Client:
+        api_url = "https://example.com"
+
+        def authenticate(self, retry_count=0):
+            seen.append(remaining())
+
+    async def in_thread():
+        return await asyncio.to_thread(remaining)
+
+    with deadline(30):
+        authenticate_all([Client(), Client()])
+        seen.append(asyncio.run(in_thread()))
+
+    assert len(seen) == 3
+    assert all(left is not None and 0 < left <= 30 for left in seen)
@@ -0,0 +1,128 @@
+import dataclasses
+from datetime import UTC, datetime
+from uuid import UUID
+
+import pytest
+import responses
+
+from pylibrelinkup import PatientNotFoundError
+from pylibrelinkup.models.connection import GraphResponse, LogbookResponse
+from pylibrelinkup.models.data import GlucoseMeasurementWithTrend, Trend
+from pylibrelinkup.models.fast import (
+    FastGlucoseMeasurement,
+    FastGlucoseMeasurementWithTrend,
+    parse_graph_history,
+    parse_logbook,
+    parse_timestamp,
+)
+
+FIELDS = [
+    "factory_timestamp",
+    "timestamp",
+    "type",
+    "value_in_mg_per_dl",
+    "measurement_color",
+    "glucose_units",
+    "value",
+    "is_high",
+    "is_low",
+]
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "5/21/2022 1:38:50 PM",
+        "11/10/2024 12:05:01 AM",
+        "1/1/2024 12:00:00 PM",
+        "12/31/2023 11:59:59 PM",
+    ],
+)
+def test_parse_timestamp_matches_strptime(value):
+    """Test that the fast timestamp parser agrees with strptime."""
+    assert parse_timestamp(value) == datetime.strptime(value, "%m/%d/%Y %I:%M:%S %p")
+
+
+@pytest.mark.parametrize("value", ["", "5/21/2022 13:38:50 PM", "5/21/2022 1:38 PM"])
+def test_parse_timestamp_rejects_invalid_values(value):
+    """Test that malformed timestamps raise ValueError."""
+    with pytest.raises(ValueError, match="Invalid timestamp"):
+        parse_timestamp(value)
+
+
+def test_parse_graph_history_matches_pydantic_models(graph_response_json):
+    """Test that fast graph history has the same attribute values as the pydantic models."""
+    expected = GraphResponse.model_validate(graph_response_json).history
+    result = parse_graph_history(graph_response_json)
+
+    assert len(result) == len(expected)
+    for fast, model in zip(result, expected):
+        for field in FIELDS:
+            assert getattr(fast, field) == getattr(model, field)
+    assert result[0].factory_timestamp.tzinfo is UTC
+
+
+def test_parse_logbook_matches_pydantic_models(logbook_response_json):
+    """Test that fast logbook entries have the same attribute values as the pydantic models."""
+    expected = LogbookResponse.model_validate(logbook_response_json).data
+    result = parse_logbook(logbook_response_json)
+
+    assert [[getattr(m, f) for f in FIELDS] for m in result] == [
+        [getattr(m, f) for f in FIELDS] for m in expected
+    ]
+
+
+def test_fast_measurement_with_trend_matches_pydantic_model(graph_response_json):
+    """Test that the trend variant parses TrendArrow into the shared Trend members."""
+    data = graph_response_json["data"]["connection"]["glucoseMeasurement"]
+    expected = GlucoseMeasurementWithTrend.model_validate(data)
+
+    result = FastGlucoseMeasurementWithTrend.from_dict(data)
+
+    assert result.trend is Trend.DOWN_FAST
+    assert isinstance(result, FastGlucoseMeasurement)
+    for field in FIELDS + ["trend"]:
+        assert getattr(result, field) == getattr(expected, field)
+
+
+def test_fast_measurements_are_frozen_and_slotted(graph_response_json):
+    """Test that fast measurements have no instance dict and cannot be modified."""
+    measurement = parse_graph_history(graph_response_json)[0]
+
+    assert not hasattr(measurement, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        measurement.value = 1  # type: ignore[misc]
+
+
+def test_parse_graph_history_raises_patient_not_found(get_response_json):
+    """Test that the couldNotLoadPatient status maps to PatientNotFoundError."""
+    with pytest.raises(PatientNotFoundError):
+        parse_graph_history(get_response_json("patient_not_found.json"))
+
+
+def test_parse_logbook_raises_value_error_for_unexpected_response():
+    """Test that unexpected responses raise ValueError."""
+    with pytest.raises(ValueError, match="Unexpected response"):
+        parse_logbook({"status": 0})
+
+
+def test_client_returns_fast_models_when_enabled(
+    mocked_responses, graph_response_json, logbook_response_json, pylibrelinkup_client
+):
+    """Test that graph and logbook return fast models when the client is in fast mode."""
+    patient_id = UUID("12345678-1234-5678-1234-567812345678")
+    base_url = f"{pylibrelinkup_client.api_url.value}/llu/connections/{patient_id}"
+    mocked_responses.add(responses.GET, f"{base_url}/graph", json=graph_response_json)
+    mocked_responses.add(
+        responses.GET, f"{base_url}/logbook", json=logbook_response_json
+    )
+    client = pylibrelinkup_client.client
+    client.token = "not_a_token"
+    client.fast_models = True
+
+    graph = client.graph(patient_id)
+    logbook = client.logbook(patient_id)
+
+    assert all(isinstance(m, FastGlucoseMeasurement) for m in graph + logbook)
+    assert len(graph) == len(graph_response_json["data"]["graphData"])
+    assert len(logbook) == len(logbook_response_json["data"])
@@ -0,0 +1,115 @@
+import statistics
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+
+from pylibrelinkup.glycemic import (
+    DAY,
+    GlycemicStatsEngine,
+    PatientGlycemicStats,
+    RollingGlycemicStats,
+    glucose_management_indicator,
+)
+from pylibrelinkup.models.connection import GraphResponse
+from pylibrelinkup.models.fast import FastGlucoseMeasurement
+
+START = datetime(2024, 11, 10, tzinfo=UTC)
+
+
+def reading(minutes: float, value: float) -> FastGlucoseMeasurement:
+    timestamp = START + timedelta(minutes=minutes)
+    return FastGlucoseMeasurement(
+        factory_timestamp=timestamp,
+        timestamp=timestamp.replace(tzinfo=None),
+        value_in_mg_per_dl=value,
+        value=value,
+    )
+
+
+def test_summary_matches_full_recomputation():
+    """Test that the incremental mean and SD match a recomputation over the window."""
+    values = [60 + (i * 37) % 200 for i in range(300)]
+    stats = RollingGlycemicStats(timedelta(hours=24), 70, 180)
+    for index, value in enumerate(values):
+        stats.add(reading(index * 15, value))
+
+    # 24 hours at a 15 minute cadence keeps the last 96 readings.
+    window = values[-96:]
+    summary = stats.summary()
+
+    assert summary.count == 96
+    assert summary.mean == pytest.approx(statistics.mean(window))
+    assert summary.sd == pytest.approx(statistics.stdev(window))
+    assert summary.cv == pytest.approx(summary.sd / summary.mean)
+    assert summary.gmi == pytest.approx(glucose_management_indicator(summary.mean))
+
+
+def test_time_in_range_is_weighted_by_interval():
+    """Test that each reading counts for the time since the previous one, capped at the maximum interval."""
+    stats = RollingGlycemicStats(DAY, 70, 180, max_interval=timedelta(minutes=15))
+    stats.add(reading(0, 100))
+    stats.add(reading(10, 60))
+    stats.add(reading(20, 200))
+    stats.add(reading(80, 120))
+
+    summary = stats.summary()
+
+    assert summary.minutes_below == 10
+    assert summary.minutes_above == 10
+    assert summary.minutes_in_range == 15
+    assert summary.time_in_range == pytest.approx(15 / 35)
+
+
+def test_old_and_duplicate_readings_are_ignored():
+    """Test that readings not newer than the latest are not counted twice."""
+    stats = RollingGlycemicStats(DAY, 70, 180)
+
+    assert stats.add(reading(5, 100))
+    assert not stats.add(reading(5, 100))
+    assert not stats.add(reading(0, 100))
+    assert len(stats) == 1
+
+
+def test_window_empties_after_long_gap():
+    """Test that readings leave the window and the interval before a gap is capped."""
+    stats = RollingGlycemicStats(timedelta(hours=1), 70, 180)
+    stats.add(reading(0, 100))
+    stats.add(reading(5, 300))
+    stats.add(reading(600, 90))
+
+    summary = stats.summary()
+
+    assert summary.count == 1
+    assert summary.mean == 90
+    assert summary.sd is None
+    assert summary.minutes_in_range == 15
+
+
+def test_patient_stats_track_every_window():
+    """Test that the default windows all receive readings and keep their own history."""
+    stats = PatientGlycemicStats(70, 180)
+    stats.extend(reading(minutes, 100) for minutes in range(0, 3 * 24 * 60, 15))
+
+    summaries = stats.summaries()
+
+    assert summaries[DAY].count == 96
+    assert summaries[timedelta(days=7)].count == 3 * 96
+    assert summaries[timedelta(days=14)].count == 3 * 96
+
+
+def test_engine_uses_connection_target_range(graph_response_json):
+    """Test that patients registered from a connection use its target range."""
+    connection = GraphResponse.model_validate(graph_response_json).data.connection
+    engine = GlycemicStatsEngine()
+    stats = engine.register_connection(connection)
+
+    assert stats.windows[DAY].target_low == connection.target_low
+    assert stats.windows[DAY].target_high == connection.target_high
+    assert engine.add(connection.patient_id, reading(0, 100))
+
+
+def test_engine_requires_registration():
+    """Test that adding a reading for an unknown patient raises KeyError."""
+    with pytest.raises(KeyError):
+        GlycemicStatsEngine().add(uuid4(), reading(0, 100))
@@ -0,0 +1,219 @@
+import json
+import threading
+import time
+
+import pytest
+import responses
+
+from pylibrelinkup import PyLibreLinkUp, RequestHooks
+from pylibrelinkup.hedging import HedgingPolicy
+from pylibrelinkup.ratelimit import TokenBucket
+
+URL = "https://api.libreview.io"
+
+
+def test_delay_uses_initial_delay_until_enough_samples():
+    """Test that the percentile is only used once min_samples latencies are known."""
+    policy = HedgingPolicy(percentile=0.9, min_samples=10, initial_delay=2.0)
+    for latency in range(1, 10):
+        policy.record(URL, latency / 10)
+
+    assert policy.delay(URL) == 2.0
+
+    policy.record(URL, 1.0)
+
+    assert policy.delay(URL) == 1.0
+    assert policy.delay("https://api-eu.libreview.io") == 2.0
+
+
+def test_delay_is_clamped():
+    """Test that the delay stays between min_delay and max_delay."""
+    policy = HedgingPolicy(min_samples=1, min_delay=0.1, max_delay=0.5)
+    policy.record(URL, 0.01)
+    assert policy.delay(URL) == 0.1
+
+    policy.record(URL, 5.0)
+    policy.record(URL, 5.0)
+    assert policy.delay(URL) == 0.5
+
+
+def test_run_returns_faster_hedge_and_discards_the_slow_result():
+    """Test that a slow call is hedged and the first successful result is used."""
+    policy = HedgingPolicy(initial_delay=0.02)
+    calls = []
+    discarded = threading.Event()
+    lock = threading.Lock()
+
+    def call():
+        with lock:
+            calls.append(None)
+            attempt = len(calls)
+        if attempt == 1:
+            time.sleep(0.3)
+        return attempt
+
+    result = policy.run(URL, call, discard=lambda result: discarded.set())
+
+    assert result == 2
+    assert policy.hedges_sent == policy.hedges_won == 1
+    assert discarded.wait(2)
+
+
+def test_run_discards_loser_finishing_in_the_same_round():
+    """Test that the slower result is discarded even when both calls have finished by the time they are checked."""
+    policy = HedgingPolicy(initial_delay=0.01)
+    go = threading.Event()
+    finished = threading.Semaphore(0)
+    discarded = []
+
+    def call():
+        go.wait()
+        finished.release()
+        return object()
+
+    def on_hedge():
+        # Let both calls finish before run waits for them.
+        go.set()
+        for _ in range(2):
+            assert finished.acquire(timeout=2)
+        time.sleep(0.01)
+
+    result = policy.run(URL, call, discard=discarded.append, on_hedge=on_hedge)
+
+    assert len(discarded) == 1
+    assert discarded[0] is not result
+
+
+def test_run_does_not_hedge_when_refused():
+    """Test that may_hedge can prevent the second call."""
+    policy = HedgingPolicy(initial_delay=0.01)
+    calls = []
+
+    def call():
+        calls.append(None)
+        time.sleep(0.05)
+        return "done"
+
+    assert policy.run(URL, call, may_hedge=lambda: False) == "done"
+    assert len(calls) == 1
+    assert policy.hedges_sent == 0
+
+
+def test_run_raises_first_error_when_both_calls_fail():
+    """Test that the primary's error is raised if neither call succeeds."""
+    policy = HedgingPolicy(initial_delay=0.01)
+    errors = iter([KeyError("primary"), ValueError("hedge")])
+
+    def call():
+        error = next(errors)
+        time.sleep(0.05)
+        raise error
+
+    with pytest.raises(KeyError):
+        policy.run(URL, call)
+
+
+def test_run_does_not_queue_behind_busy_workers():
+    """Test that callers beyond the worker count run at once, without queueing delay or unneeded hedges."""
+    policy = HedgingPolicy(initial_delay=0.5, max_workers=2)
+    calls = []
+    lock = threading.Lock()
+
+    def call():
+        with lock:
+            calls.append(None)
+        time.sleep(0.3)
+        return "done"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(policy.run(URL, call)))
+        for _ in range(8)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert time.monotonic() - started < 0.45
+    assert results == ["done"] * 8
+    assert len(calls) == 8
+    assert policy.hedges_sent == 0
+    assert policy.hedges_skipped == 6
+
+
+def test_run_skips_hedge_when_workers_are_busy():
+    """Test that a hedge is not sent, rather than queued, when no worker is free."""
+    policy = HedgingPolicy(initial_delay=0.02, max_workers=1)
+    calls = []
+
+    def call():
+        calls.append(None)
+        time.sleep(0.1)
+        return "done"
+
+    assert policy.run(URL, call) == "done"
+    assert len(calls) == 1
+    assert policy.hedges_sent == 0
+    assert policy.hedges_skipped == 1
+
+
+@pytest.fixture
+def slow_first_graph(mocked_responses, graph_response_json):
+    patient_id = graph_response_json["data"]["connection"]["patientId"]
+    calls = []
+
+    def callback(request):
+        calls.append(request)
+        if len(calls) == 1:
+            time.sleep(0.3)
+        return 200, {}, json.dumps(graph_response_json)
+
+    mocked_responses.add_callback(
+        responses.GET, f"{URL}/llu/connections/{patient_id}/graph", callback=callback
+    )
+    return patient_id, calls
+
+
+def test_client_hedges_slow_get(slow_first_graph):
+    """Test that a slow graph request is hedged and latencies are recorded per API URL."""
+    patient_id, calls = slow_first_graph
+    policy = HedgingPolicy(initial_delay=0.05)
+    events = []
+
+    class Hooks(RequestHooks):
+        def on_response(self, event):
+            events.append(event)
+
+    client = PyLibreLinkUp(
+        email="parp", password="parp", hedging=policy, hooks=[Hooks()]
+    )
+    client.token = "not_a_token"
+
+    started = time.perf_counter()
+    client.latest(patient_id)
+
+    assert time.perf_counter() - started < 0.3
+    assert len(calls) == 2
+    assert [event.retry_count for event in events] == [1]
+    assert policy.hedges_won == 1
+    assert policy._latencies[URL]
+
+
+def test_client_does_not_hedge_without_spare_rate(slow_first_graph):
+    """Test that no hedge is sent if the rate limiter has no token available."""
+    patient_id, calls = slow_first_graph
+    policy = HedgingPolicy(initial_delay=0.05)
+    client = PyLibreLinkUp(
+        email="parp",
+        password="parp",
+        hedging=policy,
+        rate_limiter=TokenBucket(rate=0.001, burst=1),
+    )
+    client.token = "not_a_token"
+
+    client.latest(patient_id)
+
+    assert len(calls) == 1
+    assert policy.hedges_sent == 0
@@ -0,0 +1,208 @@
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+import responses
+
+from pylibrelinkup import PyLibreLinkUp
+from pylibrelinkup.history import HistoryIndex, HistorySource
+from pylibrelinkup.models.data import Trend
+from pylibrelinkup.models.fast import (
+    FastGlucoseMeasurement,
+    FastGlucoseMeasurementWithTrend,
+)
+
+NOW = datetime(2024, 1, 15, 12, tzinfo=UTC)
+
+
+def reading(minutes_ago, value=100.0, trend=False):
+    factory_timestamp = NOW - timedelta(minutes=minutes_ago)
+    fields = dict(
+        factory_timestamp=factory_timestamp,
+        timestamp=factory_timestamp.replace(tzinfo=None),
+        type=0,
+        value_in_mg_per_dl=value,
+        measurement_color=1,
+        glucose_units=1,
+        value=value,
+        is_high=False,
+        is_low=False,
+    )
+    if trend:
+        return FastGlucoseMeasurementWithTrend(**fields, trend=Trend.UP_SLOW)
+    return FastGlucoseMeasurement(**fields)
+
+
+def test_merge_sorts_and_deduplicates():
+    """Test that measurements merged in any order are stored once, sorted by factory timestamp."""
+    index = HistoryIndex()
+    patient_id = uuid4()
+
+    assert index.merge(patient_id, [reading(15), reading(45), reading(30)]) == 3
+    assert index.merge(patient_id, [reading(30), reading(60), reading(0)]) == 2
+
+    result = index.query(patient_id, NOW - timedelta(days=1), NOW)
+    assert [m.factory_timestamp for m in result] == [
+        NOW - timedelta(minutes=minutes) for minutes in (60, 45, 30, 15, 0)
+    ]
+
+
+def test_merge_prefers_measurement_with_trend():
+    """Test that the current reading replaces the same reading from the history, but not the other way round."""
+    index = HistoryIndex()
+    patient_id = uuid4()
+    current = reading(0, trend=True)
+
+    index.merge(patient_id, [reading(0)])
+    index.merge(patient_id, [current])
+    index.merge(patient_id, [reading(0)])
+
+    assert index.query(patient_id, NOW, NOW) == [current]
+
+
+def test_query_bounds_are_inclusive():
+    """Test that a query returns the measurements at both ends of the range and nothing outside it."""
+    index = HistoryIndex()
+    patient_id = uuid4()
+    index.merge(patient_id, [reading(minutes) for minutes in range(0, 100, 5)])
+
+    result = index.query(
+        patient_id, NOW - timedelta(minutes=20), NOW - timedelta(minutes=10)
+    )
+
+    assert [m.factory_timestamp for m in result] == [
+        NOW - timedelta(minutes=minutes) for minutes in (20, 15, 10)
+    ]
+    assert index.query(uuid4(), NOW - timedelta(days=1), NOW) == []
+
+
+def test_retention_drops_old_measurements():
+    """Test that measurements older than the retention period before the newest are dropped."""
+    index = HistoryIndex(retention=timedelta(minutes=30))
+    patient_id = uuid4()
+    index.merge(patient_id, [reading(minutes) for minutes in range(0, 60, 10)])
+
+    result = index.query(patient_id, NOW - timedelta(days=1), NOW)
+    assert [m.factory_timestamp for m in result] == [
+        NOW - timedelta(minutes=minutes) for minutes in (30, 20, 10, 0)
+    ]
+
+
+def test_retention_drops_coverage_of_pruned_range():
+    """Test that a range whose measurements were dropped by retention is reported as missing again."""
+    index = HistoryIndex(retention=timedelta(minutes=30))
+    patient_id = uuid4()
+    index.merge(
+        patient_id,
+        [reading(minutes) for minutes in range(0, 60, 10)],
+        HistorySource.GRAPH,
+        fetched_at=NOW,
+    )
+
+    assert index.missing(patient_id, NOW - timedelta(minutes=30), NOW, NOW) == []
+    assert index.missing(
+        patient_id, NOW - timedelta(minutes=50), NOW - timedelta(minutes=40), NOW
+    ) == [HistorySource.GRAPH]
+
+
+def test_naive_datetimes_are_utc():
+    """Test that naive range bounds are taken to be UTC, like factory timestamps."""
+    index = HistoryIndex()
+    patient_id = uuid4()
+    index.merge(patient_id, [reading(minutes) for minutes in range(0, 30, 10)])
+    naive_now = NOW.replace(tzinfo=None)
+
+    result = index.query(patient_id, naive_now - timedelta(minutes=10), naive_now)
+
+    assert [m.factory_timestamp for m in result] == [
+        NOW - timedelta(minutes=10),
+        NOW,
+    ]
+    assert index.missing(
+        patient_id, naive_now - timedelta(hours=1), naive_now, NOW
+    ) == [HistorySource.GRAPH]
+
+
+@pytest.mark.parametrize(
+    "start, expected",
+    [
+        (timedelta(hours=1), [HistorySource.GRAPH]),
+        (timedelta(days=2), [HistorySource.GRAPH, HistorySource.LOGBOOK]),
+        (timedelta(days=30), [HistorySource.GRAPH, HistorySource.LOGBOOK]),
+    ],
+)
+def test_missing_for_empty_index(start, expected):
+    """Test that the endpoints needed depend on how far back the range reaches."""
+    assert HistoryIndex().missing(uuid4(), NOW - start, NOW, NOW) == expected
+
+
+def test_missing_after_fetch():
+    """Test that a fetched endpoint covers its window, and the time since only while it is newer than max_age."""
+    index = HistoryIndex()
+    patient_id = uuid4()
+    index.merge(patient_id, [], HistorySource.GRAPH, fetched_at=NOW)
+    index.merge(patient_id, [], HistorySource.LOGBOOK, fetched_at=NOW)
+    start = NOW - timedelta(days=2)
+
+    assert index.missing(patient_id, start, NOW, NOW + timedelta(seconds=30)) == []
+    assert index.missing(patient_id, start, NOW, NOW + timedelta(minutes=5)) == []
+    assert index.missing(
+        patient_id, start, NOW + timedelta(minutes=5), NOW + timedelta(minutes=5)
+    ) == [HistorySource.GRAPH]
+    # A range ending before the fetch stays covered, however old the fetch is.
+    assert (
+        index.missing(
+            patient_id,
+            start,
+            NOW - timedelta(hours=1),
+            NOW + timedelta(minutes=5),
+            max_age=timedelta(0),
+        )
+        == []
+    )
+
+
+def test_merge_with_source_requires_fetched_at():
+    """Test that the coverage of a source cannot be recorded without the time of the request."""
+    with pytest.raises(ValueError):
+        HistoryIndex().merge(uuid4(), [], HistorySource.GRAPH)
+
+
+@pytest.mark.parametrize("fast_models", [False, True])
+def test_client_history_only_requests_uncovered_ranges(
+    mocked_responses, graph_response_json, logbook_response_json, fast_models
+):
+    """Test that history merges the graph, logbook and current reading, and answers repeated queries from the index."""
+    patient_id = graph_response_json["data"]["connection"]["patientId"]
+    base_url = f"https://api.libreview.io/llu/connections/{patient_id}"
+    mocked_responses.add(responses.GET, f"{base_url}/graph", json=graph_response_json)
+    mocked_responses.add(
+        responses.GET, f"{base_url}/logbook", json=logbook_response_json
+    )
+    client = PyLibreLinkUp(email="parp", password="parp", fast_models=fast_models)
+    client.token = "not_a_token"
+    # The graph and logbook fixtures are years apart.
+    client.history_index = HistoryIndex(retention=None)
+    start = datetime(2000, 1, 1, tzinfo=UTC)
+
+    result = client.history(patient_id, start)
+    assert len(mocked_responses.calls) == 2
+
+    timestamps = [m.factory_timestamp for m in result]
+    assert timestamps == sorted(set(timestamps))
+    graph = client.graph(patient_id)
+    logbook = client.logbook(patient_id)
+    latest = client.latest(patient_id)
+    assert set(timestamps) == {m.factory_timestamp for m in [*graph, *logbook, latest]}
+    [current] = [m for m in result if m.factory_timestamp == latest.factory_timestamp]
+    assert current.trend == latest.trend
+    calls = len(mocked_responses.calls)
+
+    assert client.history(patient_id, start, latest.factory_timestamp) == [
+        m for m in result if m.factory_timestamp <= latest.factory_timestamp
+    ]
+    assert len(mocked_responses.calls) == calls
+
+    naive_start = start.replace(tzinfo=None)
+    assert client.history(patient_id, naive_start) == client.history(patient_id, start)
+    assert len(mocked_responses.calls) == calls
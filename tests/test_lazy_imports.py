@@ -0,0 +1,51 @@
+import subprocess
+import sys
+
+import pytest
+
+import pylibrelinkup
+
+
+def modules_loaded_after(statement: str) -> set[str]:
+    """Runs a statement in a fresh interpreter and returns the modules it loaded."""
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            "-c",
+            f"import sys; {statement}; print(' '.join(sys.modules))",
+        ],
+        text=True,
+    )
+    return set(output.split())
+
+
+def test_importing_package_does_not_import_requests_or_pydantic():
+    """Test that importing the package only loads the lightweight modules."""
+    modules = modules_loaded_after("import pylibrelinkup")
+
+    assert "requests" not in modules
+    assert "pydantic" not in modules
+    assert "pylibrelinkup.pylibrelinkup" not in modules
+
+
+def test_constructing_client_does_not_import_requests_or_login_models():
+    """Test that the HTTP stack and login models are only imported when first needed."""
+    modules = modules_loaded_after(
+        "from pylibrelinkup import PyLibreLinkUp; PyLibreLinkUp('parp', 'parp')"
+    )
+
+    assert "requests" not in modules
+    assert "pylibrelinkup.models.login" not in modules
+    assert "pylibrelinkup.profiling" not in modules
+
+
+@pytest.mark.parametrize("name", pylibrelinkup.__all__)
+def test_all_public_names_are_importable(name):
+    """Test that every name in __all__ resolves, whether it is loaded eagerly or lazily."""
+    assert getattr(pylibrelinkup, name) is not None
+
+
+def test_unknown_attribute_raises_attribute_error():
+    """Test that the lazy loader does not swallow misspelt attribute names."""
+    with pytest.raises(AttributeError, match="no attribute 'PyLibreLinkDown'"):
+        pylibrelinkup.PyLibreLinkDown
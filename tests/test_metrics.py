@@ -0,0 +1,132 @@
+import urllib.request
+from uuid import UUID
+
+import pytest
+import responses
+
+from pylibrelinkup import LLUAPIRateLimitError
+from pylibrelinkup.metrics import Counter, Histogram, MetricsRegistry
+
+
+@pytest.fixture
+def metrics(pylibrelinkup_client):
+    registry = MetricsRegistry()
+    pylibrelinkup_client.client.hooks.append(registry)
+    return registry
+
+
+def test_counter_renders_labels():
+    """Test that counters render one sample per label set with escaped values."""
+    counter = Counter("things_total", "Things.", ("name",))
+    counter.inc('a"b')
+    counter.inc('a"b', amount=2)
+
+    assert counter.collect() == ['things_total{name="a\\"b"} 3']
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Test that histogram buckets are cumulative and include +Inf, _sum and _count."""
+    histogram = Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5.0)
+
+    assert histogram.collect() == [
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        "latency_seconds_sum 5.55",
+        "latency_seconds_count 3",
+    ]
+
+
+def test_registry_records_successful_requests(
+    mocked_responses, graph_response_json, pylibrelinkup_client, metrics
+):
+    """Test that successful requests are counted and timed per endpoint, status and region."""
+    patient_id = UUID("12345678-1234-5678-1234-567812345678")
+    mocked_responses.add(
+        responses.GET,
+        f"{pylibrelinkup_client.api_url.value}/llu/connections/{patient_id}/graph",
+        json=graph_response_json,
+        status=200,
+    )
+    pylibrelinkup_client.client.token = "not_a_token"
+
+    pylibrelinkup_client.client.graph(patient_id)
+    pylibrelinkup_client.client.latest(patient_id)
+
+    region = pylibrelinkup_client.api_url.name
+    assert metrics.requests.value("graph", "200", region) == 2
+    assert metrics.latency.count("graph", region) == 2
+    assert metrics.payload_size.count("graph", region) == 2
+    assert metrics.validation_time.count("graph") == 2
+    assert (
+        f'pylibrelinkup_requests_total{{endpoint="graph",status="200",region="{region}"}} 2'
+        in metrics.render()
+    )
+
+
+def test_registry_counts_rate_limited_requests(
+    mocked_responses, pylibrelinkup_client, metrics
+):
+    """Test that 429 responses are counted separately."""
+    patient_id = UUID("12345678-1234-5678-1234-567812345678")
+    mocked_responses.add(
+        responses.GET,
+        f"{pylibrelinkup_client.api_url.value}/llu/connections/{patient_id}/graph",
+        status=429,
+    )
+    pylibrelinkup_client.client.token = "not_a_token"
+
+    with pytest.raises(LLUAPIRateLimitError):
+        pylibrelinkup_client.client.graph(patient_id)
+
+    region = pylibrelinkup_client.api_url.name
+    assert metrics.rate_limited.value("graph", region) == 1
+    assert metrics.requests.value("graph", "429", region) == 1
+
+
+def test_registry_counts_token_refreshes(
+    mocked_responses, pylibrelinkup_client, metrics, get_response_json
+):
+    """Test that successful logins are counted as token refreshes."""
+    mocked_responses.add(
+        responses.POST,
+        f"{pylibrelinkup_client.api_url.value}/llu/auth/login",
+        json=get_response_json("login_response.json"),
+        status=200,
+    )
+
+    pylibrelinkup_client.client.authenticate()
+
+    assert metrics.token_refreshes.value(pylibrelinkup_client.api_url.name) == 1
+
+
+def test_registry_counts_cache_lookups():
+    """Test that cache hits and misses are counted per cache."""
+    metrics = MetricsRegistry()
+    metrics.on_cache_lookup("patients", True)
+    metrics.on_cache_lookup("patients", False)
+    metrics.on_cache_lookup("patients", True)
+
+    assert metrics.cache_lookups.value("patients", "hit") == 2
+    assert metrics.cache_lookups.value("patients", "miss") == 1
+
+
+def test_registry_serves_metrics_over_http():
+    """Test that the optional HTTP endpoint serves the text exposition."""
+    metrics = MetricsRegistry()
+    metrics.on_cache_lookup("patients", True)
+    server = metrics.serve(port=0, addr="127.0.0.1")
+    try:
+        with urllib.request.urlopen(
+            f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        ) as response:
+            body = response.read().decode()
+            content_type = response.headers["Content-Type"]
+    finally:
+        server.shutdown()
+
+    assert content_type.startswith("text/plain; version=0.0.4")
+    assert body == metrics.render()
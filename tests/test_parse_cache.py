@@ -0,0 +1,176 @@
+import copy
+
+import pytest
+import responses
+
+from pylibrelinkup import APIUrl, PyLibreLinkUp
+from pylibrelinkup.instrumentation import RequestHooks
+from pylibrelinkup.metrics import MetricsRegistry
+from pylibrelinkup.parse_cache import ParseCache
+
+URL = APIUrl.US.value
+
+
+class Recorder(RequestHooks):
+    def __init__(self):
+        self.lookups = []
+        self.parsed = []
+
+    def on_cache_lookup(self, cache, hit):
+        self.lookups.append((cache, hit))
+
+    def on_parsed(self, event, result):
+        self.parsed.append(result)
+
+
+@pytest.fixture
+def hooks():
+    return Recorder()
+
+
+def make_client(hooks, **kwargs):
+    client = PyLibreLinkUp(
+        email="parp", password="parp", hooks=[hooks], parse_cache=True, **kwargs
+    )
+    client.token = "not_a_token"
+    return client
+
+
+def add_graph(mocked_responses, graph_response_json):
+    patient_id = graph_response_json["data"]["connection"]["patientId"]
+    mocked_responses.add(
+        responses.GET,
+        f"{URL}/llu/connections/{patient_id}/graph",
+        json=graph_response_json,
+    )
+    return patient_id
+
+
+def test_parse_cache_skips_decoding_unchanged_body():
+    """Test that an unchanged body returns the previous result without decoding it."""
+    cache = ParseCache()
+    decoded = []
+
+    def decode():
+        decoded.append(True)
+        return {"a": 1}
+
+    first, first_hit = cache.parse(("graph", 1), b"body", decode, dict)
+    second, second_hit = cache.parse(("graph", 1), b"body", decode, dict)
+    third, third_hit = cache.parse(("graph", 2), b"body", decode, dict)
+
+    assert (first_hit, second_hit, third_hit) == (False, True, False)
+    assert second is first
+    assert third is not first
+    assert len(decoded) == 2
+    assert len(cache) == 2
+
+
+def test_client_reuses_unchanged_graph_response(
+    mocked_responses, graph_response_json, hooks
+):
+    """Test that an identical graph body returns the same parsed response and reports a cache hit."""
+    patient_id = add_graph(mocked_responses, graph_response_json)
+    add_graph(mocked_responses, graph_response_json)
+    client = make_client(hooks)
+
+    first = client._graph_response(patient_id)
+    second = client._graph_response(patient_id)
+
+    assert second is first
+    assert hooks.lookups == [("graph", False), ("graph", True)]
+    assert hooks.parsed == [first, first]
+
+
+def test_client_reuses_unchanged_parts_when_graph_data_changes(
+    mocked_responses, graph_response_json, hooks
+):
+    """Test that sensors, alarm rules and device are reused when only graphData has changed."""
+    patient_id = add_graph(mocked_responses, graph_response_json)
+    changed = copy.deepcopy(graph_response_json)
+    changed["data"]["graphData"] = changed["data"]["graphData"][1:]
+    changed["data"]["connection"]["patientDevice"]["hl"] += 1
+    add_graph(mocked_responses, changed)
+    client = make_client(hooks)
+
+    first = client._graph_response(patient_id)
+    second = client._graph_response(patient_id)
+
+    assert second is not first
+    assert len(second.history) == len(first.history) - 1
+    assert second.data.active_sensors[0] is first.data.active_sensors[0]
+    assert second.data.connection.alarm_rules is first.data.connection.alarm_rules
+    assert second.data.connection.sensor is first.data.connection.sensor
+    assert (
+        second.data.connection.patient_device
+        is not first.data.connection.patient_device
+    )
+    assert (
+        second.data.connection.patient_device.hl
+        == first.data.connection.patient_device.hl + 1
+    )
+
+
+def test_client_caches_fast_graph_and_logbook_separately(
+    mocked_responses, graph_response_json, logbook_response_json, hooks
+):
+    """Test that fast model results and the full response are cached under different names."""
+    patient_id = add_graph(mocked_responses, graph_response_json)
+    add_graph(mocked_responses, graph_response_json)
+    for _ in range(2):
+        mocked_responses.add(
+            responses.GET,
+            f"{URL}/llu/connections/{patient_id}/logbook",
+            json=logbook_response_json,
+        )
+    client = make_client(hooks, fast_models=True)
+
+    history = client.graph(patient_id)
+    client.latest(patient_id)
+    logbook = client.logbook(patient_id)
+
+    assert client.logbook(patient_id) is logbook
+    assert isinstance(history, list)
+    assert hooks.lookups == [
+        ("graph_history", False),
+        ("graph", False),
+        ("logbook", False),
+        ("logbook", True),
+    ]
+
+
+def test_client_without_parse_cache_parses_every_response(
+    mocked_responses, graph_response_json
+):
+    """Test that the parse cache is off by default."""
+    patient_id = add_graph(mocked_responses, graph_response_json)
+    add_graph(mocked_responses, graph_response_json)
+    client = PyLibreLinkUp(email="parp", password="parp")
+    client.token = "not_a_token"
+
+    assert client.parse_cache is None
+    assert client._graph_response(patient_id) is not client._graph_response(patient_id)
+
+
+def test_cache_hits_are_not_observed_as_parse_times(
+    mocked_responses, graph_response_json, hooks
+):
+    """Test that a cache hit is flagged on the event and not recorded as a validation time of zero."""
+    patient_id = add_graph(mocked_responses, graph_response_json)
+    add_graph(mocked_responses, graph_response_json)
+    metrics = MetricsRegistry()
+    events = []
+
+    class Events(RequestHooks):
+        def on_parsed(self, event, result):
+            events.append(event)
+
+    client = make_client(hooks)
+    client.hooks += [metrics, Events()]
+
+    client._graph_response(patient_id)
+    client._graph_response(patient_id)
+
+    assert [event.cache_hit for event in events] == [False, True]
+    assert metrics.validation_time.count("graph") == 1
+    assert metrics.cache_lookups.value("graph", "hit") == 1
@@ -0,0 +1,177 @@
+from uuid import UUID
+
+import pytest
+import responses
+
+from pylibrelinkup import PatientNotFoundError, PyLibreLinkUp, RequestHooks
+from pylibrelinkup.directory import PatientDirectory, normalise_name
+from pylibrelinkup.utilities import coerce_patient_id
+from tests.factories import PatientFactory
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def patients():
+    return [
+        PatientFactory.build(first_name="Jane", last_name="Doe"),
+        PatientFactory.build(first_name="John", last_name="Smith"),
+    ]
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def fetches(patients):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return patients
+
+    fetch.calls = calls
+    return fetch
+
+
+@pytest.fixture
+def directory(fetches, clock):
+    return PatientDirectory(fetches, ttl=60, clock=clock)
+
+
+def test_normalise_name_ignores_case_and_whitespace():
+    """Test that names are matched regardless of case and spacing."""
+    assert normalise_name("  JANE   doe ") == normalise_name("Jane Doe")
+
+
+def test_find_by_name_fetches_once_within_ttl(directory, fetches, patients, clock):
+    """Test that repeated lookups within the TTL are answered from the cache."""
+    assert directory.find_by_name("jane doe") is patients[0]
+    clock.now = 59
+    assert directory.find_by_name("John Smith") is patients[1]
+
+    assert len(fetches.calls) == 1
+
+
+def test_find_by_name_refreshes_after_ttl(directory, fetches, clock):
+    """Test that the directory refetches once the TTL has expired."""
+    directory.find_by_name("Jane Doe")
+    clock.now = 60
+    directory.find_by_name("Jane Doe")
+
+    assert len(fetches.calls) == 2
+
+
+def test_find_by_name_raises_for_unknown_and_ambiguous_names(clock):
+    """Test that unknown names raise PatientNotFoundError and duplicate names raise ValueError."""
+    twins = PatientFactory.batch(2, first_name="Sam", last_name="Lee")
+    directory = PatientDirectory(lambda: twins, clock=clock)
+
+    with pytest.raises(PatientNotFoundError):
+        directory.find_by_name("Nobody Here")
+    with pytest.raises(ValueError, match="More than one patient"):
+        directory.find_by_name("Sam Lee")
+
+
+def test_get_accepts_patient_and_connection_ids(directory, patients):
+    """Test that patients can be looked up by either of their ids."""
+    assert directory.get(patients[0].patient_id) is patients[0]
+    assert directory.get(patients[0].id) is patients[0]
+    with pytest.raises(PatientNotFoundError):
+        directory.get(UUID("12345678-1234-5678-1234-567812345678"))
+
+
+def test_resolve_uuid_refreshes_cold_directory_on_miss(
+    directory, fetches, patients, clock
+):
+    """Test that a connection id is mapped on a cold or expired directory, and known patient ids never fetch."""
+    assert directory.resolve_uuid(patients[1].id) == patients[1].patient_id
+    assert len(fetches.calls) == 1
+
+    unknown = UUID("12345678-1234-5678-1234-567812345678")
+    assert directory.resolve_uuid(unknown) == unknown
+    assert len(fetches.calls) == 1
+
+    clock.now = 60
+    assert directory.resolve_uuid(patients[1].patient_id) == patients[1].patient_id
+    assert len(fetches.calls) == 1
+    assert directory.resolve_uuid(patients[0].id) == patients[0].patient_id
+    assert len(fetches.calls) == 2
+
+
+def test_coerce_patient_id_resolves_names_through_directory(directory, patients):
+    """Test that non-UUID strings are treated as names only when a directory is available."""
+    assert coerce_patient_id("Jane Doe", directory) == patients[0].patient_id
+    assert coerce_patient_id(str(patients[0].id), directory) == patients[0].patient_id
+    with pytest.raises(ValueError, match="Invalid patient_identifier"):
+        coerce_patient_id("Jane Doe")
+
+
+def test_client_resolves_patient_names_with_one_connections_fetch(
+    mocked_responses, graph_response_json, patients
+):
+    """Test that the client fetches connections once and reports cache lookups to hooks."""
+
+    class CacheHooks(RequestHooks):
+        def __init__(self):
+            self.lookups = []
+
+        def on_cache_lookup(self, cache, hit):
+            self.lookups.append((cache, hit))
+
+    hooks = CacheHooks()
+    client = PyLibreLinkUp(
+        email="parp", password="parp", hooks=[hooks], patient_directory_ttl=300
+    )
+    client.token = "not_a_token"
+    connections = mocked_responses.add(
+        responses.GET,
+        f"{client.api_url}/llu/connections",
+        json={
+            "status": 0,
+            "data": [
+                patient.model_dump(mode="json", by_alias=True) for patient in patients
+            ],
+        },
+    )
+    mocked_responses.add(
+        responses.GET,
+        f"{client.api_url}/llu/connections/{patients[0].patient_id}/graph",
+        json=graph_response_json,
+    )
+
+    client.graph("Jane Doe")
+    client.graph("jane  DOE")
+
+    assert connections.call_count == 1
+    assert hooks.lookups == [("patients", False), ("patients", True)]
+
+
+def test_get_patients_populates_directory(mocked_responses, patients):
+    """Test that an explicit get_patients call refreshes the directory."""
+    client = PyLibreLinkUp(email="parp", password="parp", patient_directory_ttl=300)
+    client.token = "not_a_token"
+    mocked_responses.add(
+        responses.GET,
+        f"{client.api_url}/llu/connections",
+        json={
+            "status": 0,
+            "data": [
+                patient.model_dump(mode="json", by_alias=True) for patient in patients
+            ],
+        },
+    )
+
+    client.get_patients()
+
+    assert client.patient_directory is not None
+    assert not client.patient_directory.is_stale
+    assert len(client.patient_directory) == 2
@@ -0,0 +1,254 @@
+import threading
+import time
+
+import pytest
+import responses
+
+from pylibrelinkup import (
+    APIUrl,
+    PatientNotFoundError,
+    PyLibreLinkUp,
+    RedirectError,
+    TermsOfUseError,
+)
+from pylibrelinkup.instrumentation import RequestHooks
+from pylibrelinkup.pool import ClientPool, authenticate_all
+from pylibrelinkup.ratelimit import TokenBucket
+from tests.factories import PatientFactory
+
+
+def connections_json(patients):
+    return {
+        "status": 0,
+        "data": [
+            patient.model_dump(mode="json", by_alias=True) for patient in patients
+        ],
+    }
+
+
+def make_client(email, api_url):
+    client = PyLibreLinkUp(email=email, password="parp", api_url=api_url)
+    client.token = "not_a_token"
+    return client
+
+
+@pytest.fixture
+def patients():
+    return PatientFactory.batch(3)
+
+
+@pytest.fixture
+def pool(mocked_responses, patients):
+    """A pool of two accounts which both follow patients[0]; patients[1] and [2] have one owner each."""
+    eu = make_client("eu@example.com", APIUrl.EU)
+    us = make_client("us@example.com", APIUrl.US)
+    mocked_responses.add(
+        responses.GET,
+        f"{eu.api_url}/llu/connections",
+        json=connections_json([patients[0], patients[1]]),
+    )
+    mocked_responses.add(
+        responses.GET,
+        f"{us.api_url}/llu/connections",
+        json=connections_json([patients[0], patients[2]]),
+    )
+    return ClientPool([eu, us], rate=1, burst=5)
+
+
+def test_add_gives_each_client_its_own_rate_limiter():
+    """Test that clients added without a rate limiter get one from the pool defaults."""
+    shared = TokenBucket(rate=2)
+    first = make_client("a@example.com", APIUrl.EU)
+    second = make_client("b@example.com", APIUrl.EU)
+    second.rate_limiter = shared
+
+    pool = ClientPool([first, second], rate=0.5, burst=3)
+
+    assert first.rate_limiter is pool.accounts[0].limiter
+    assert first.rate_limiter.rate == 0.5
+    assert pool.accounts[1].limiter is shared
+
+
+def test_client_for_routes_to_owning_account(pool, patients):
+    """Test that patients followed by a single account are routed to it."""
+    assert pool.client_for(patients[1]).email == "eu@example.com"
+    assert pool.client_for(str(patients[2].patient_id)).email == "us@example.com"
+    assert (
+        pool.client_for(f"{patients[2].first_name} {patients[2].last_name}").email
+        == "us@example.com"
+    )
+
+
+def test_client_for_raises_for_unknown_patient(pool):
+    """Test that a patient no account follows raises PatientNotFoundError."""
+    with pytest.raises(PatientNotFoundError):
+        pool.client_for(PatientFactory.build())
+
+
+def test_client_for_prefers_account_with_most_budget(pool, patients):
+    """Test that shared patients are routed to the account with the most tokens left."""
+    pool.refresh_index()
+    pool.accounts[0].limiter.pause(30)
+
+    assert pool.client_for(patients[0]).email == "us@example.com"
+
+
+def test_client_for_prefers_drained_account_to_paused_one(pool, patients):
+    """Test that an account paused after a 429 is tried after one which has only used up its budget."""
+    pool.refresh_index()
+    for account in pool.accounts:
+        account.limiter = account.client.rate_limiter = TokenBucket(
+            rate=1, burst=1, clock=lambda: 0.0
+        )
+    eu, us = pool.accounts
+    eu.limiter.pause(30)
+    assert us.limiter.try_acquire()
+
+    assert eu.limiter.available == us.limiter.available == 0
+    assert pool.client_for(patients[0]).email == "us@example.com"
+
+
+def test_graph_fails_over_when_account_is_rate_limited(
+    pool, mocked_responses, patients, graph_response_json
+):
+    """Test that a 429 pauses the account and retries through another owner."""
+    eu, us = (account.client for account in pool.accounts)
+    patient_id = patients[0].patient_id
+    mocked_responses.add(
+        responses.GET,
+        f"{eu.api_url}/llu/connections/{patient_id}/graph",
+        status=429,
+        headers={"Retry-After": "120"},
+    )
+    mocked_responses.add(
+        responses.GET,
+        f"{us.api_url}/llu/connections/{patient_id}/graph",
+        json=graph_response_json,
+    )
+
+    result = pool.graph(patients[0])
+
+    assert len(result) == len(graph_response_json["data"]["graphData"])
+    assert pool.accounts[0].limiter.available == 0
+
+
+def test_assignments_balance_shared_patients(pool, patients):
+    """Test that every patient is assigned once and shared patients go to the less loaded account."""
+    pool.accounts[0].client.rate_limiter.rate = 10
+
+    assignments = pool.assignments()
+
+    assert set(assignments) == {patient.patient_id for patient in patients}
+    assert assignments[patients[0].patient_id] is pool.accounts[0]
+
+
+def test_poll_order_interleaves_regions(pool, patients):
+    """Test that consecutive polls alternate between regions."""
+    order = pool.poll_order()
+
+    assert len(order) == 3
+    assert order[0][0].region != order[1][0].region
+
+
+class FakeLoginClient:
+    """Stands in for PyLibreLinkUp in bulk login tests, recording how many logins overlap."""
+
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.api_url = APIUrl.US.value
+        self.region = "US"
+        self.rate_limiter = None
+
+    def authenticate(self, retry_count=0):
+        with FakeLoginClient.lock:
+            FakeLoginClient.active += 1
+            FakeLoginClient.peak = max(FakeLoginClient.peak, FakeLoginClient.active)
+        time.sleep(0.01)
+        with FakeLoginClient.lock:
+            FakeLoginClient.active -= 1
+        if self.errors:
+            raise self.errors.pop(0)
+
+
+def test_authenticate_all_follows_redirects(mocked_responses, get_response_json):
+    """Test that a redirect switches the client to the new region and logs in again, counted as a retry."""
+    started = []
+    hooks = RequestHooks()
+    hooks.on_request_start = started.append
+    client = PyLibreLinkUp(
+        email="parp", password="parp", api_url=APIUrl.US, hooks=[hooks]
+    )
+    mocked_responses.add(
+        responses.POST,
+        f"{APIUrl.US.value}/llu/auth/login",
+        json=get_response_json("redirect_response.json"),
+    )
+    mocked_responses.add(
+        responses.POST,
+        f"{APIUrl.EU2.value}/llu/auth/login",
+        json=get_response_json("login_response.json"),
+    )
+
+    [result] = authenticate_all([client])
+
+    assert result.ok
+    assert result.redirects == 1
+    assert result.region == "EU2"
+    assert client.token == "parp"
+    assert [event.retry_count for event in started] == [0, 1]
+
+
+def test_authenticate_all_reports_errors_per_client():
+    """Test that failures are captured per client and results keep the input order."""
+    clients = [FakeLoginClient(), FakeLoginClient([TermsOfUseError()])]
+
+    results = authenticate_all(clients)
+
+    assert [result.client for result in results] == clients
+    assert results[0].ok
+    assert isinstance(results[1].error, TermsOfUseError)
+
+
+def test_authenticate_all_stops_after_max_redirects():
+    """Test that redirect loops are reported rather than followed forever."""
+    client = FakeLoginClient([RedirectError(APIUrl.EU)] * 3)
+
+    [result] = authenticate_all([client], max_redirects=2)
+
+    assert isinstance(result.error, RedirectError)
+    assert result.redirects == 2
+
+
+def test_pool_authenticate_all_passes_max_redirects():
+    """Test that the pool forwards max_redirects to each login."""
+    pool = ClientPool([FakeLoginClient([RedirectError(APIUrl.EU)] * 3)])
+
+    [result] = pool.authenticate_all(max_redirects=1)
+
+    assert isinstance(result.error, RedirectError)
+    assert result.redirects == 1
+
+
+def test_authenticate_all_limits_concurrency():
+    """Test that no more than max_concurrency logins run at once."""
+    FakeLoginClient.peak = 0
+    clients = [FakeLoginClient() for _ in range(12)]
+
+    results = authenticate_all(clients, max_concurrency=3)
+
+    assert all(result.ok for result in results)
+    assert FakeLoginClient.peak <= 3
+
+
+def test_authenticate_all_waits_for_shared_rate_limiter():
+    """Test that every login attempt takes a token from the shared limiter."""
+    limiter = TokenBucket(rate=0.01, burst=5)
+    clients = [FakeLoginClient() for _ in range(5)]
+
+    authenticate_all(clients, rate_limiter=limiter)
+
+    assert limiter.available < 1
@@ -0,0 +1,250 @@
+import asyncio
+import json
+import threading
+import time
+from uuid import UUID, uuid4
+
+import pytest
+import responses
+
+from pylibrelinkup import PyLibreLinkUp
+from pylibrelinkup.models.connection import GraphResponse
+from pylibrelinkup.proxy import LibreLinkUpProxy
+from tests.factories import PatientFactory
+
+
+@pytest.fixture
+def patient_id(graph_response_json):
+    return UUID(graph_response_json["data"]["connection"]["patientId"])
+
+
+@pytest.fixture
+def proxy(mocked_responses, graph_response_json, logbook_response_json, patient_id):
+    client = PyLibreLinkUp(email="parp", password="parp")
+    client.token = "not_a_token"
+    patient = PatientFactory.build(patient_id=patient_id)
+    mocked_responses.add(
+        responses.GET,
+        f"{client.api_url}/llu/connections",
+        json={
+            "status": 0,
+            "data": [patient.model_dump(mode="json", by_alias=True)],
+        },
+    )
+    mocked_responses.add(
+        responses.GET,
+        f"{client.api_url}/llu/connections/{patient_id}/graph",
+        json=graph_response_json,
+    )
+    mocked_responses.add(
+        responses.GET,
+        f"{client.api_url}/llu/connections/{patient_id}/logbook",
+        json=logbook_response_json,
+    )
+    return LibreLinkUpProxy(client, refresh_interval=30)
+
+
+def test_refresh_fills_cache_from_one_graph_request(
+    proxy, mocked_responses, patient_id, graph_response_json
+):
+    """Test that latest and graph are both served from a single upstream graph request."""
+    asyncio.run(proxy.refresh())
+
+    graph_calls = [
+        call for call in mocked_responses.calls if call.request.url.endswith("/graph")
+    ]
+    assert len(graph_calls) == 1
+    status, _, body = proxy.respond("GET", f"/patients/{patient_id}/latest", {})
+    assert status == 200
+    assert json.loads(body)["ValueInMgPerDl"] == 91
+    status, _, body = proxy.respond("GET", f"/patients/{patient_id}/graph", {})
+    assert len(json.loads(body)) == len(graph_response_json["data"]["graphData"])
+
+
+def test_logbook_is_refreshed_less_often(proxy, mocked_responses, patient_id):
+    """Test that the logbook is only requested again once its interval has passed."""
+    asyncio.run(proxy.refresh())
+    asyncio.run(proxy.refresh())
+
+    logbook_calls = [
+        call for call in mocked_responses.calls if call.request.url.endswith("/logbook")
+    ]
+    assert len(logbook_calls) == 1
+    assert proxy.respond("GET", f"/patients/{patient_id}/logbook", {})[0] == 200
+
+
+def test_failing_patient_does_not_refetch_the_others(
+    mocked_responses, graph_response_json, logbook_response_json, patient_id, caplog
+):
+    """Test that one failing patient is logged and retried without refetching the patient list or other logbooks."""
+    client = PyLibreLinkUp(email="parp", password="parp")
+    client.token = "not_a_token"
+    bad_id = uuid4()
+    mocked_responses.add(
+        responses.GET,
+        f"{client.api_url}/llu/connections",
+        json={
+            "status": 0,
+            "data": [
+                PatientFactory.build(patient_id=pid).model_dump(
+                    mode="json", by_alias=True
+                )
+                for pid in (patient_id, bad_id)
+            ],
+        },
+    )
+    mocked_responses.add(
+        responses.GET,
+        f"{client.api_url}/llu/connections/{patient_id}/graph",
+        json=graph_response_json,
+    )
+    mocked_responses.add(
+        responses.GET,
+        f"{client.api_url}/llu/connections/{patient_id}/logbook",
+        json=logbook_response_json,
+    )
+    mocked_responses.add(
+        responses.GET,
+        f"{client.api_url}/llu/connections/{bad_id}/graph",
+        status=500,
+    )
+    proxy = LibreLinkUpProxy(client, refresh_interval=30)
+
+    for _ in range(5):
+        asyncio.run(proxy.refresh())
+
+    urls = [call.request.url for call in mocked_responses.calls]
+    assert urls.count(f"{client.api_url}/llu/connections") == 1
+    assert urls.count(f"{client.api_url}/llu/connections/{patient_id}/logbook") == 1
+    assert urls.count(f"{client.api_url}/llu/connections/{bad_id}/graph") == 5
+    assert sum(str(bad_id) in record.getMessage() for record in caplog.records) == 5
+    status, headers, _ = proxy.respond("GET", f"/patients/{patient_id}/graph", {})
+    assert status == 200
+    assert headers["Age"] == "0"
+
+
+class SlowClient:
+    """Stands in for PyLibreLinkUp, recording how many graph requests overlap."""
+
+    def __init__(self, patients, response):
+        self.patients = patients
+        self.response = response
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def get_patients(self):
+        return self.patients
+
+    def graph_response(self, patient_id):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.01)
+        with self.lock:
+            self.active -= 1
+        return self.response
+
+    def logbook(self, patient_id):
+        return []
+
+
+def test_refresh_limits_concurrent_patients(graph_response_json):
+    """Test that no more than max_concurrency patients are refreshed at once."""
+    client = SlowClient(
+        PatientFactory.batch(12), GraphResponse.model_validate(graph_response_json)
+    )
+    proxy = LibreLinkUpProxy(client, max_concurrency=3)
+
+    asyncio.run(proxy.refresh())
+
+    assert len(proxy.cache) == 1 + 12 * 3
+    assert 1 < client.peak <= 3
+
+
+def test_etag_gives_not_modified(proxy, patient_id):
+    """Test that a matching If-None-Match returns 304 without a body."""
+    asyncio.run(proxy.refresh())
+    path = f"/patients/{str(patient_id).upper()}/latest"
+    _, headers, _ = proxy.respond("GET", path, {})
+
+    status, _, body = proxy.respond(
+        "GET", path, {"if-none-match": f'"other", {headers["ETag"]}'}
+    )
+
+    assert status == 304
+    assert body == b""
+
+
+@pytest.mark.parametrize(
+    "method,path,status",
+    [
+        ("GET", "/unknown", 404),
+        ("GET", f"/patients/{uuid4()}/latest", 404),
+        ("GET", "/patients/not-a-uuid/graph", 404),
+        ("POST", "/patients", 405),
+    ],
+)
+def test_errors(proxy, method, path, status):
+    """Test the responses to requests the proxy cannot serve."""
+    asyncio.run(proxy.refresh())
+
+    assert proxy.respond(method, path, {})[0] == status
+
+
+def test_not_yet_cached_is_unavailable():
+    """Test that a known path without data yet returns 503."""
+    proxy = LibreLinkUpProxy(PyLibreLinkUp(email="parp", password="parp"))
+
+    assert proxy.respond("GET", "/patients", {})[0] == 503
+
+
+def test_serves_http(proxy):
+    """Test a keep-alive HTTP exchange over a socket."""
+
+    async def main():
+        await proxy.refresh()
+        server = await asyncio.start_server(proxy.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /patients HTTP/1.1\r\nHost: proxy\r\n\r\n")
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = int(
+                next(
+                    line.split(b":")[1]
+                    for line in head.split(b"\r\n")
+                    if line.lower().startswith(b"content-length")
+                )
+            )
+            body = await reader.readexactly(length)
+            writer.write(b"GET /patients HTTP/1.1\r\nConnection: close\r\n\r\n")
+            second = await reader.read()
+            writer.close()
+            return head, body, second
+
+    head, body, second = asyncio.run(main())
+
+    assert head.startswith(b"HTTP/1.1 200 OK")
+    assert len(json.loads(body)) == 1
+    assert second.startswith(b"HTTP/1.1 200 OK")
+
+
+def test_malformed_request_gets_bad_request():
+    """Test that a request line which cannot be parsed is answered with 400 and the connection is closed."""
+    proxy = LibreLinkUpProxy(PyLibreLinkUp(email="parp", password="parp"))
+
+    async def main():
+        server = await asyncio.start_server(proxy.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"NONSENSE\r\n\r\n")
+            response = await reader.read()
+            writer.close()
+            return response
+
+    response = asyncio.run(main())
+
+    assert response.startswith(b"HTTP/1.1 400 Bad Request\r\n")
+    assert b"Connection: close\r\n" in response
@@ -0,0 +1,71 @@
+import pytest
+
+from pylibrelinkup.ratelimit import TokenBucket
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def fake_time():
+    return FakeTime()
+
+
+@pytest.fixture
+def bucket(fake_time):
+    return TokenBucket(rate=2, burst=2, clock=fake_time.clock, sleep=fake_time.sleep)
+
+
+def test_try_acquire_allows_burst_then_refuses(bucket, fake_time):
+    """Test that a full bucket allows a burst and then refills at the configured rate."""
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+    fake_time.now = 0.5
+    assert bucket.try_acquire()
+
+
+def test_acquire_waits_for_tokens(bucket, fake_time):
+    """Test that acquire sleeps until a token is available."""
+    bucket.try_acquire(2)
+
+    assert bucket.acquire()
+    assert fake_time.sleeps == [0.5]
+
+
+def test_acquire_gives_up_after_timeout(bucket, fake_time):
+    """Test that acquire returns False if no token arrives before the timeout."""
+    bucket.try_acquire(2)
+
+    assert not bucket.acquire(timeout=0.2)
+    assert fake_time.now == pytest.approx(0.2)
+
+
+def test_pause_withholds_tokens_until_it_expires(bucket, fake_time):
+    """Test that a paused bucket refills only from the end of the pause."""
+    bucket.pause(10)
+
+    assert bucket.available == 0
+    assert bucket.paused
+    fake_time.now = 10.25
+    assert bucket.available == pytest.approx(0.5)
+    assert not bucket.paused
+
+
+def test_invalid_configuration_raises_value_error():
+    """Test that non-positive rates and bursts below one are rejected."""
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+    with pytest.raises(ValueError):
+        TokenBucket(rate=1, burst=0.5)
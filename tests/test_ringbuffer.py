@@ -0,0 +1,110 @@
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+import responses
+
+from pylibrelinkup import PyLibreLinkUp
+from pylibrelinkup.models.data import Trend
+from pylibrelinkup.ringbuffer import PatientRingBuffers, ReadingRingBuffer
+
+START = datetime(2024, 1, 1, tzinfo=UTC)
+
+
+def fill(buffer, count, start=0):
+    for minute in range(start, start + count):
+        buffer.append(START + timedelta(minutes=minute), 100 + minute, Trend.STABLE)
+
+
+def test_append_overwrites_oldest_when_full():
+    """Test that the buffer keeps only the newest readings once it is full."""
+    buffer = ReadingRingBuffer(capacity=5)
+    fill(buffer, 8)
+
+    assert len(buffer) == 5
+    assert [reading.value_in_mg_per_dl for reading in buffer] == [
+        103,
+        104,
+        105,
+        106,
+        107,
+    ]
+    assert buffer.latest().factory_timestamp == START + timedelta(minutes=7)
+    assert buffer.latest().trend is Trend.STABLE
+
+
+def test_append_ignores_readings_not_newer():
+    """Test that readings older than, or as old as, the newest reading are ignored."""
+    buffer = ReadingRingBuffer(capacity=5)
+    fill(buffer, 3)
+
+    assert not buffer.append(START + timedelta(minutes=2), 1)
+    assert not buffer.append(START, 1)
+    assert buffer.append((START + timedelta(minutes=3)).replace(tzinfo=None), 1)
+    assert len(buffer) == 4
+
+
+@pytest.mark.parametrize("count", [3, 5, 12])
+def test_window_after_wrapping(count):
+    """Test that window queries find the right readings whether or not the buffer has wrapped."""
+    buffer = ReadingRingBuffer(capacity=5)
+    fill(buffer, count)
+    first = max(0, count - 5)
+
+    assert [r.value_in_mg_per_dl for r in buffer.window(START)] == [
+        100 + minute for minute in range(first, count)
+    ]
+    window = buffer.window(
+        START + timedelta(minutes=count - 3), START + timedelta(minutes=count - 2)
+    )
+    assert [r.value_in_mg_per_dl for r in window] == [100 + count - 3, 100 + count - 2]
+    assert buffer.window(START + timedelta(minutes=count)) == []
+
+
+def test_last_is_relative_to_now():
+    """Test that last returns the readings within a duration of now."""
+    buffer = ReadingRingBuffer(capacity=100)
+    fill(buffer, 60)
+
+    recent = buffer.last(timedelta(minutes=10), now=START + timedelta(minutes=59))
+
+    assert len(recent) == 11
+    assert recent[0].factory_timestamp == START + timedelta(minutes=49)
+
+
+def test_max_patients_drops_least_recently_updated():
+    """Test that the number of patient buffers is bounded."""
+    buffers = PatientRingBuffers(capacity=10, max_patients=2)
+    first, second, third = uuid4(), uuid4(), uuid4()
+    buffers.buffer(first)
+    buffers.buffer(second)
+    buffers.buffer(first)
+    buffers.buffer(third)
+
+    assert first in buffers
+    assert second not in buffers
+    assert len(buffers) == 2
+
+
+def test_buffers_are_fed_by_client_polls(mocked_responses, graph_response_json):
+    """Test that graph responses parsed by the client are added to the patient's buffer."""
+    patient_id = graph_response_json["data"]["connection"]["patientId"]
+    for _ in range(2):
+        mocked_responses.add(
+            responses.GET,
+            f"https://api.libreview.io/llu/connections/{patient_id}/graph",
+            json=graph_response_json,
+        )
+    buffers = PatientRingBuffers(capacity=4)
+    client = PyLibreLinkUp(email="parp", password="parp", hooks=[buffers])
+    client.token = "not_a_token"
+
+    current = client.latest(patient_id)
+    client.latest(patient_id)
+
+    [buffer] = buffers._buffers.values()
+    assert len(buffer) == 4
+    latest = buffer.latest()
+    assert latest.factory_timestamp == current.factory_timestamp
+    assert latest.value_in_mg_per_dl == current.value_in_mg_per_dl
+    assert latest.trend is current.trend
@@ -0,0 +1,135 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import responses
+
+from pylibrelinkup import PyLibreLinkUp
+from pylibrelinkup.models.fast import FastGlucoseMeasurementWithTrend
+from pylibrelinkup.subscriptions import Backpressure, Subscription, SubscriptionHub
+
+START = datetime(2024, 11, 10, tzinfo=UTC)
+
+
+def measurement(minutes: int) -> FastGlucoseMeasurementWithTrend:
+    timestamp = START + timedelta(minutes=minutes)
+    return FastGlucoseMeasurementWithTrend(
+        factory_timestamp=timestamp,
+        timestamp=timestamp.replace(tzinfo=None),
+        value_in_mg_per_dl=100 + minutes,
+        value=100 + minutes,
+    )
+
+
+class FakeClient:
+    """Returns each measurement in turn from latest(), repeating the last one."""
+
+    def __init__(self, measurements):
+        self.measurements = list(measurements)
+        self.calls = 0
+
+    def latest(self, patient_id):
+        self.calls += 1
+        return self.measurements[min(self.calls, len(self.measurements)) - 1]
+
+
+def test_subscribers_share_one_poll():
+    """Test that every subscriber receives each new measurement, and repeated ones are not republished."""
+    readings = [measurement(0), measurement(0), measurement(1)]
+    client = FakeClient(readings)
+    hub = SubscriptionHub(client, poll_interval=0)
+    patient_id = uuid4()
+
+    async def main():
+        first = hub.subscribe(patient_id)
+        second = hub.subscribe(patient_id)
+        assert len(hub.pollers) == 1
+        received = [
+            [await first.get(), await first.get()],
+            [await second.get(), await second.get()],
+        ]
+        await hub.close()
+        return received
+
+    received = asyncio.run(main())
+
+    assert received == [[readings[0], readings[2]], [readings[0], readings[2]]]
+    assert hub.pollers == {}
+
+
+def test_drop_oldest_discards_when_full():
+    """Test that a full drop-oldest queue keeps the newest measurements."""
+    readings = [measurement(minutes) for minutes in range(3)]
+    subscription = Subscription(
+        SubscriptionHub(FakeClient([])), uuid4(), 2, Backpressure.DROP_OLDEST
+    )
+
+    async def main():
+        for reading in readings:
+            await subscription.publish(reading)
+        return [await subscription.get(), await subscription.get()]
+
+    assert asyncio.run(main()) == readings[1:]
+    assert subscription.dropped == 1
+
+
+def test_block_waits_for_room():
+    """Test that a blocking subscriber holds up the publisher until it has read a measurement."""
+    readings = [measurement(minutes) for minutes in range(2)]
+    subscription = Subscription(
+        SubscriptionHub(FakeClient([])), uuid4(), 1, Backpressure.BLOCK
+    )
+
+    async def main():
+        await subscription.publish(readings[0])
+        publish = asyncio.create_task(subscription.publish(readings[1]))
+        await asyncio.sleep(0.01)
+        blocked = not publish.done()
+        first = await subscription.get()
+        await publish
+        return blocked, [first, await subscription.get()]
+
+    blocked, received = asyncio.run(main())
+
+    assert blocked
+    assert received == readings
+    assert subscription.dropped == 0
+
+
+def test_close_ends_iteration_and_releases_blocked_publisher():
+    """Test that closing a subscription stops iteration after queued items and unblocks publishing."""
+    readings = [measurement(minutes) for minutes in range(2)]
+    subscription = Subscription(
+        SubscriptionHub(FakeClient([])), uuid4(), 1, Backpressure.BLOCK
+    )
+
+    async def main():
+        await subscription.publish(readings[0])
+        publish = asyncio.create_task(subscription.publish(readings[1]))
+        await asyncio.sleep(0)
+        subscription.close()
+        await publish
+        return [reading async for reading in subscription]
+
+    assert asyncio.run(main()) == readings[:1]
+
+
+def test_client_subscribe_polls_latest(mocked_responses, graph_response_json):
+    """Test that client.subscribe delivers the current measurement from the graph endpoint."""
+    client = PyLibreLinkUp(email="parp", password="parp")
+    client.token = "not_a_token"
+    patient_id = graph_response_json["data"]["connection"]["patientId"]
+    mocked_responses.add(
+        responses.GET,
+        f"{client.api_url}/llu/connections/{patient_id}/graph",
+        json=graph_response_json,
+    )
+
+    async def main():
+        async with client.subscribe(patient_id) as subscription:
+            return await asyncio.wait_for(subscription.get(), timeout=5)
+
+    received = asyncio.run(main())
+
+    assert received.value_in_mg_per_dl == 91
+    assert client.subscription_hub.pollers == {}
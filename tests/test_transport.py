@@ -0,0 +1,279 @@
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from pylibrelinkup import (
+    APIUrl,
+    LLUAPIConnectionError,
+    LLUAPIError,
+    LLUAPIRateLimitError,
+    LLUAPITimeoutError,
+    PyLibreLinkUp,
+)
+from pylibrelinkup.circuit import CircuitBreakers, CircuitState
+from pylibrelinkup.deadline import deadline
+from pylibrelinkup.transport import (
+    InMemoryTransport,
+    RequestsTransport,
+    Transport,
+    TransportResponse,
+    Urllib3Transport,
+)
+
+URL = APIUrl.US.value
+
+
+@pytest.fixture
+def transport():
+    return InMemoryTransport()
+
+
+@pytest.fixture
+def client(transport):
+    client = PyLibreLinkUp(email="parp", password="parp", transport=transport)
+    client.token = "not_a_token"
+    return client
+
+
+def test_default_transport_is_requests():
+    """Test that clients use the requests transport unless another is given."""
+    client = PyLibreLinkUp(email="parp", password="parp")
+
+    assert isinstance(client.transport, RequestsTransport)
+    assert client.transport is client.transport
+
+
+def test_transport_without_request_cannot_be_created():
+    """Test that a transport which does not implement request fails when it is created, not when it is used."""
+
+    class IncompleteTransport(Transport):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteTransport()
+
+
+def test_in_memory_transport_serves_graph(client, transport, graph_response_json):
+    """Test that the client sends requests through the transport it was given."""
+    patient_id = graph_response_json["data"]["connection"]["patientId"]
+    transport.add(
+        "GET", f"{URL}/llu/connections/{patient_id}/graph", json=graph_response_json
+    )
+
+    graph = client.graph(patient_id)
+
+    assert len(graph) == len(graph_response_json["data"]["graphData"])
+    [request] = transport.requests
+    assert request.method == "GET"
+    assert request.headers["authorization"] == "Bearer not_a_token"
+
+
+def test_in_memory_transport_login(transport, get_response_json):
+    """Test that the login request body is passed to the transport."""
+    client = PyLibreLinkUp(email="parp", password="parp", transport=transport)
+    transport.add(
+        "POST", f"{URL}/llu/auth/login", json=get_response_json("login_response.json")
+    )
+
+    client.authenticate()
+
+    assert client.token == "parp"
+    assert transport.requests[0].json_body == {"email": "parp", "password": "parp"}
+
+
+def test_in_memory_transport_rate_limit(client, transport):
+    """Test that a 429 from any transport raises LLUAPIRateLimitError with the Retry-After header."""
+    transport.add(
+        "GET", f"{URL}/llu/connections", status=429, headers={"Retry-After": "30"}
+    )
+
+    with pytest.raises(LLUAPIRateLimitError) as exc_info:
+        client.get_patients()
+
+    assert exc_info.value.retry_after == 30
+
+
+def test_in_memory_transport_error_status(client, transport):
+    """Test that error responses from transports other than requests raise LLUAPIError."""
+    transport.add("GET", f"{URL}/llu/connections", status=500)
+
+    with pytest.raises(LLUAPIError) as exc_info:
+        client.get_patients()
+
+    assert exc_info.value.response_code == 500
+
+
+def test_in_memory_transport_unregistered_url_trips_circuit(transport):
+    """Test that connection errors from a transport are recorded by the circuit breaker."""
+    breakers = CircuitBreakers(failure_threshold=1)
+    client = PyLibreLinkUp(
+        email="parp", password="parp", transport=transport, circuit_breakers=breakers
+    )
+    client.token = "not_a_token"
+
+    with pytest.raises(LLUAPIConnectionError):
+        client.get_patients()
+
+    assert breakers.get(client.api_url).state is CircuitState.OPEN
+
+
+def test_in_memory_transport_callback(client, transport):
+    """Test that a callback can build the response from the request."""
+    transport.add(
+        "GET",
+        f"{URL}/llu/connections",
+        callback=lambda request: TransportResponse(
+            200, {}, json.dumps({"status": 0, "data": []}).encode(), url=request.url
+        ),
+    )
+
+    assert client.get_patients() == []
+
+
+def test_requests_transport_keeps_http_error(mocked_responses):
+    """Test that the requests transport still raises requests.HTTPError for error responses."""
+    mocked_responses.get(f"{URL}/llu/connections", status=401)
+    client = PyLibreLinkUp(
+        email="parp", password="parp", transport=RequestsTransport(requests.Session())
+    )
+    client.token = "not_a_token"
+
+    with pytest.raises(requests.HTTPError):
+        client.get_patients()
+
+
+@pytest.fixture
+def server():
+    """A local HTTP server which echoes the request back as JSON."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def _respond(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.dumps(
+                {
+                    "method": self.command,
+                    "path": self.path,
+                    "authorization": self.headers.get("authorization"),
+                    "body": json.loads(self.rfile.read(length)) if length else None,
+                }
+            ).encode()
+            self.send_response(418 if self.path == "/teapot" else 200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = do_POST = _respond
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def slow_body_server():
+    """A local HTTP server which sends the headers at once, then stalls (/stall) or trickles (/trickle) the body."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "10")
+            self.end_headers()
+            self.wfile.write(b"x")
+            self.wfile.flush()
+            if self.path == "/stall":
+                time.sleep(1)
+                return
+            for _ in range(9):
+                time.sleep(0.1)
+                self.wfile.write(b"x")
+                self.wfile.flush()
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.mark.parametrize("transport_class", [RequestsTransport, Urllib3Transport])
+def test_transport_times_out_on_stalled_body(slow_body_server, transport_class):
+    """Test that a body which stops arriving after the headers raises LLUAPITimeoutError."""
+    with pytest.raises(LLUAPITimeoutError):
+        transport_class().request(
+            "GET", f"{slow_body_server}/stall", {}, None, (1, 0.2)
+        )
+
+
+@pytest.mark.parametrize("transport_class", [RequestsTransport, Urllib3Transport])
+def test_transport_enforces_deadline_on_trickling_body(
+    slow_body_server, transport_class
+):
+    """Test that a body arriving too slowly in total raises LLUAPITimeoutError, though each read is in time."""
+    with deadline(0.3), pytest.raises(LLUAPITimeoutError):
+        transport_class().request(
+            "GET", f"{slow_body_server}/trickle", {}, None, (1, 0.3)
+        )
+
+
+def test_urllib3_transport(server):
+    """Test that the urllib3 transport sends headers and JSON bodies and reads responses."""
+    transport = Urllib3Transport()
+
+    r = transport.request(
+        "POST", f"{server}/echo", {"authorization": "Bearer x"}, {"a": 1}, (1, 1)
+    )
+    transport.close()
+
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/json"
+    assert json.loads(r.content) == {
+        "method": "POST",
+        "path": "/echo",
+        "authorization": "Bearer x",
+        "body": {"a": 1},
+    }
+    with pytest.raises(LLUAPIError):
+        transport.request(
+            "GET", f"{server}/teapot", {}, None, (1, 1)
+        ).raise_for_status()
+
+
+def test_urllib3_transport_connection_error():
+    """Test that the urllib3 transport raises LLUAPIConnectionError when nothing is listening."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    with pytest.raises(LLUAPIConnectionError):
+        Urllib3Transport().request("GET", f"http://127.0.0.1:{port}/", {}, None, (1, 1))
+
+
+def test_httpx_transport(server):
+    """Test that the httpx transport sends headers and JSON bodies and reads responses."""
+    pytest.importorskip("httpx")
+    from pylibrelinkup.transport import HttpxTransport
+
+    transport = HttpxTransport()
+    r = transport.request(
+        "POST", f"{server}/echo", {"authorization": "Bearer x"}, {"a": 1}, (1, 1)
+    )
+    transport.close()
+
+    assert r.status_code == 200
+    assert json.loads(r.content)["body"] == {"a": 1}